@@ -1,14 +1,19 @@
+import asyncio
+import contextlib
 import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
 
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain.agents.middleware import AgentMiddleware, ModelFallbackMiddleware
 from langchain_core.messages import HumanMessage
-from langgraph.checkpoint.memory import InMemorySaver
 # from langchain.agents import AgentExecutor # Removed to fix ImportError
 
-from app.core.config import config
-from app.core.utils import print_agent_step, console
+from app.core.checkpoint import create_checkpointer
+from app.core.compaction import result_store
+from app.core.models import ModelSettings, get_fallback_models, get_model
+from app.core.streaming import STREAM_MODES, Done, StreamEvent, agraph_events, graph_events, render_events
+from app.core.utils import print_agent_step, console, is_quiet, quiet_iter, quiet_output
 from app.core.context import AgentContext
 
 logger = logging.getLogger(__name__)
@@ -17,13 +22,59 @@ class BaseAgent(ABC):
     """
     Base class for all agents in the system.
     """
+    # Whether instances built from the same models and checkpointer can share
+    # one compiled graph; false for agents whose graph refers to the instance
+    shares_graph = True
+
+    # Compiled graphs (and their history middleware) by agent class, models and checkpointer
+    _graphs: Dict[tuple, tuple] = {}
+    _graphs_lock = threading.Lock()
+
     def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
-            model=config.MODEL_NAME,
-            temperature=config.TEMPERATURE
-        )
-        self.checkpointer = InMemorySaver()
-        self.agent_executor = self._create_agent_executor()
+        settings = self.model_settings()
+        self.llm = get_model(settings)
+        self.fallback_llms = get_fallback_models(settings)
+        self.checkpointer = create_checkpointer(type(self).__name__)
+        self.agent_executor = self._shared_agent_executor()
+
+    def _shared_agent_executor(self):
+        """
+        Returns the compiled graph for this agent, building it only once per
+        process. Graphs are read-only at run time: conversations keep their
+        state in the checkpointer, and per-request data such as the date comes
+        from the run's context.
+        """
+        if not self.shares_graph:
+            return self._create_agent_executor()
+        # The cached graph holds these objects, so their ids stay unique while it is cached
+        key = (type(self), id(self.llm), *map(id, self.fallback_llms), id(self.checkpointer))
+        with BaseAgent._graphs_lock:
+            shared = BaseAgent._graphs.get(key)
+            if shared is None:
+                graph = self._create_agent_executor()
+                shared = BaseAgent._graphs[key] = (graph, getattr(self, "history", None))
+        graph, history = shared
+        if history is not None:
+            self.history = history
+        return graph
+
+    @property
+    def agent_name(self) -> str:
+        """Short name of the agent, e.g. 'calendar' for CalendarAgent."""
+        return type(self).__name__.removesuffix("Agent").lower()
+
+    def model_settings(self) -> ModelSettings:
+        """
+        The model tier and limits this agent runs with; agents override this.
+        """
+        return ModelSettings()
+
+    def _model_middleware(self) -> List[AgentMiddleware]:
+        """
+        Middleware retrying a failed model call (e.g. a timeout or an
+        overloaded model) on the tier's fallback model.
+        """
+        return [ModelFallbackMiddleware(*self.fallback_llms)] if self.fallback_llms else []
 
     @abstractmethod
     def _create_agent_executor(self):
@@ -33,20 +84,39 @@ class BaseAgent(ABC):
         """
         pass
 
-    def chat(self, user_input: str, context: Optional[AgentContext] = None) -> Any:
+    def _thread_config(self, context: AgentContext, thread_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns the run config for the given thread, by default the context's session.
+        """
+        return {"configurable": {"thread_id": thread_id or context.session_id}}
+
+    def end_session(self, session_id: str):
+        """
+        Drops the checkpointed history of a session and its stored tool results.
+        """
+        self.delete_thread(session_id)
+        result_store.drop(session_id)
+
+    def delete_thread(self, thread_id: str):
+        """
+        Drops a single checkpoint thread, e.g. one used for a finished sub-task.
+        """
+        self.checkpointer.delete_thread(thread_id)
+
+    def chat(self, user_input: str, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> Any:
         """
         Process a user message and return the agent's response.
         """
-        thread_config = {"configurable": {"thread_id": "default"}}
-        
         # Default context if none provided
         if context is None:
             context = AgentContext(user_name="User")
+        thread_config = self._thread_config(context, thread_id)
 
         response_messages = []
         try:
             # Stream the response
-            with console.status("[bold green]Thinking...[/]", spinner="dots"):
+            spinner = contextlib.nullcontext() if is_quiet() else console.status("[bold green]Thinking...[/]", spinner="dots")
+            with spinner:
                 for step in self.agent_executor.stream(
                     {"messages": [HumanMessage(content=user_input)]},
                     config=thread_config,
@@ -70,19 +140,19 @@ class BaseAgent(ABC):
             logger.error(f"Error during chat: {e}")
             return f"An error occurred: {e}"
 
-    def invoke(self, user_input: str, context: Optional[AgentContext] = None) -> Any:
+    def invoke(self, user_input: str, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> Any:
         """
         Programmatically invoke the agent and return the final response.
         """
-        return self.chat(user_input, context=context)
+        return self.chat(user_input, context=context, thread_id=thread_id)
 
-    def resume(self, command: Any, context: Optional[AgentContext] = None) -> Any:
+    def resume(self, command: Any, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> Any:
         """
         Resume the agent execution with a command (for HITL).
         """
-        thread_config = {"configurable": {"thread_id": "default"}}
         if context is None:
             context = AgentContext(user_name="User")
+        thread_config = self._thread_config(context, thread_id)
 
         response_messages = []
         try:
@@ -108,6 +178,115 @@ class BaseAgent(ABC):
             logger.error(f"Error during resume: {e}")
             return f"An error occurred during resume: {e}"
 
+    async def achat(self, user_input: str, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> Any:
+        """
+        Async variant of chat(). Tool calls emitted in the same model step run
+        concurrently through the tools' async variants.
+        """
+        return await self._arun(
+            {"messages": [HumanMessage(content=user_input)]},
+            context,
+            default="I'm not sure how to respond to that.",
+            thread_id=thread_id,
+        )
+
+    async def ainvoke(self, user_input: str, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> Any:
+        """
+        Programmatically invoke the agent asynchronously and return the final response.
+        """
+        return await self.achat(user_input, context=context, thread_id=thread_id)
+
+    async def aresume(self, command: Any, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> Any:
+        """
+        Async variant of resume().
+        """
+        return await self._arun(command, context, default="Resumed successfully.", thread_id=thread_id)
+
+    async def _arun(self, graph_input: Any, context: Optional[AgentContext], default: str, thread_id: Optional[str] = None) -> Any:
+        if context is None:
+            context = AgentContext(user_name="User")
+        thread_config = self._thread_config(context, thread_id)
+
+        response_messages = []
+        try:
+            async for step in self.agent_executor.astream(
+                graph_input,
+                config=thread_config,
+                context=context
+            ):
+                if "__interrupt__" in step:
+                    return step["__interrupt__"]
+
+                for update in step.values():
+                    if update and "messages" in update:
+                        for message in update["messages"]:
+                            response_messages.append(message)
+                            print_agent_step(message)
+
+            last_ai_message = next((m for m in reversed(response_messages) if m.type == "ai"), None)
+            return last_ai_message.content if last_ai_message else default
+        except Exception as e:
+            logger.error(f"Error during async run: {e}")
+            return f"An error occurred: {e}"
+
+    def stream(self, user_input: str, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> Iterator[StreamEvent]:
+        """
+        Streams the reply as typed events (see app.core.streaming): model tokens
+        as they are generated, including those of sub-agents, tool call starts
+        and ends, an Interrupt when approval is needed, and a final Done.
+        Nothing is printed; the caller renders the events.
+        """
+        return self._stream({"messages": [HumanMessage(content=user_input)]}, context, "I'm not sure how to respond to that.", thread_id)
+
+    def stream_resume(self, command: Any, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> Iterator[StreamEvent]:
+        """
+        Streaming variant of resume().
+        """
+        return self._stream(command, context, "Resumed successfully.", thread_id)
+
+    async def astream(self, user_input: str, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> AsyncIterator[StreamEvent]:
+        """
+        Async variant of stream().
+        """
+        async for event in self._astream({"messages": [HumanMessage(content=user_input)]}, context, "I'm not sure how to respond to that.", thread_id):
+            yield event
+
+    def _stream(self, graph_input: Any, context: Optional[AgentContext], default: str, thread_id: Optional[str] = None) -> Iterator[StreamEvent]:
+        if context is None:
+            context = AgentContext(user_name="User")
+        graph_stream = self.agent_executor.stream(
+            graph_input,
+            config=self._thread_config(context, thread_id),
+            context=context,
+            stream_mode=STREAM_MODES,
+        )
+        return graph_events(quiet_iter(graph_stream), self.agent_name, default)
+
+    async def _astream(self, graph_input: Any, context: Optional[AgentContext], default: str, thread_id: Optional[str] = None) -> AsyncIterator[StreamEvent]:
+        if context is None:
+            context = AgentContext(user_name="User")
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def pump():
+            # Runs in its own task, so quiet output does not leak to the caller
+            with quiet_output():
+                graph_stream = self.agent_executor.astream(
+                    graph_input,
+                    config=self._thread_config(context, thread_id),
+                    context=context,
+                    stream_mode=STREAM_MODES,
+                )
+                async for event in agraph_events(graph_stream, self.agent_name, default):
+                    await events.put(event)
+
+        task = asyncio.create_task(pump())
+        try:
+            while not isinstance(event := await events.get(), Done):
+                yield event
+            yield event
+        finally:
+            await task
+
     def run_interactive(self, context: Optional[AgentContext] = None):
         """
         Run the agent in an interactive CLI loop.
@@ -129,8 +308,7 @@ class BaseAgent(ABC):
                     console.print("[bold red]Goodbye![/]")
                     break
                 
-                response = self.chat(user_input, context=context)
-                # console.print(f"\n[bold purple]Agent:[/]\n{response}") # Removed to avoid double printing
+                response = render_events(self.stream(user_input, context=context))
             except KeyboardInterrupt:
                 console.print("\n[bold red]Exiting...[/]")
                 break
@@ -1,26 +1,45 @@
 import datetime
 import logging
 from langchain.agents import create_agent
+from langchain.agents.middleware import dynamic_prompt, ModelRequest
 # from langchain.agents import AgentExecutor
 
 from app.agents.base import BaseAgent
-from app.tools.calendar import list_events, create_event, get_available_time_slots
+from app.tools.calendar import list_events, create_event, create_events_bulk, get_available_time_slots, find_meeting_slots
+from app.tools.results import get_more_results
+from app.core.config import config
+from app.core.context import AgentContext
+from app.core.history import HistoryBudgetMiddleware
+from app.core.models import ModelSettings
 from app.core.prompt_loader import PromptLoader
+from app.core.utils import resolve_time_zone
 
 logger = logging.getLogger(__name__)
 
+@dynamic_prompt
+def calendar_agent_prompt(request: ModelRequest) -> str:
+    """Generate system prompt with the current date in the user's time zone."""
+    context = request.runtime.context
+    tz = resolve_time_zone(context.time_zone if context else None)
+    now = datetime.datetime.now(tz)
+
+    return PromptLoader.get_prompt("calendar", today=now.date().isoformat(), time_zone=getattr(tz, "key", None) or now.strftime("UTC%z"))
+
 class CalendarAgent(BaseAgent):
+    def model_settings(self) -> ModelSettings:
+        return ModelSettings(config.CALENDAR_MODEL_TIER, config.CALENDAR_MAX_OUTPUT_TOKENS, config.CALENDAR_MODEL_TIMEOUT)
+
     def _create_agent_executor(self):
-        today = datetime.date.today().isoformat()
-        
-        system_prompt = PromptLoader.get_prompt("calendar", today=today)
+        tools = [list_events, create_event, create_events_bulk, get_available_time_slots, find_meeting_slots, get_more_results]
 
-        tools = [list_events, create_event, get_available_time_slots]
+        self.history = HistoryBudgetMiddleware(self.llm, config.CALENDAR_HISTORY_TOKEN_BUDGET, name="calendar")
 
         agent = create_agent(
             self.llm,
             tools=tools,
-            system_prompt=system_prompt,
+            name=self.agent_name,
+            middleware=[calendar_agent_prompt, self.history, *self._model_middleware()],
+            context_schema=AgentContext,
             checkpointer=self.checkpointer,
         )
         
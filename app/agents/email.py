@@ -1,12 +1,14 @@
 import logging
 from langchain.agents import create_agent
 from langchain.agents.middleware import HumanInTheLoopMiddleware
-from langgraph.checkpoint.memory import InMemorySaver
 from langchain.agents.middleware import dynamic_prompt, ModelRequest
 
 from app.agents.base import BaseAgent
-from app.tools.email import send_email
+from app.tools.email import send_email, send_emails_bulk
+from app.core.config import config
 from app.core.context import AgentContext
+from app.core.history import HistoryBudgetMiddleware
+from app.core.models import ModelSettings
 from app.core.prompt_loader import PromptLoader
 
 logger = logging.getLogger(__name__)
@@ -19,25 +21,36 @@ def email_agent_prompt(request: ModelRequest) -> str:
     return PromptLoader.get_prompt("email", user_name=user_name)
 
 class EmailAgent(BaseAgent):
+    def model_settings(self) -> ModelSettings:
+        return ModelSettings(config.EMAIL_MODEL_TIER, config.EMAIL_MAX_OUTPUT_TOKENS, config.EMAIL_MODEL_TIMEOUT)
+
     def _create_agent_executor(self):
-        tools = [send_email]
+        tools = [send_email, send_emails_bulk]
+        self.history = HistoryBudgetMiddleware(self.llm, config.EMAIL_HISTORY_TOKEN_BUDGET, name="email")
 
         agent = create_agent(
             self.llm,
             tools=tools,
+            name=self.agent_name,
             middleware=[
                 email_agent_prompt,
+                self.history,
                 HumanInTheLoopMiddleware(
                     interrupt_on={
                         "send_email": {
                             "allowed_decisions": ["approve", "edit", "reject"],
-                        }
+                        },
+                        # One approval covers the whole batch
+                        "send_emails_bulk": {
+                            "allowed_decisions": ["approve", "edit", "reject"],
+                        },
                     },
                     description_prefix="Email sending pending approval",
                 ),
+                *self._model_middleware(),
             ],
             context_schema=AgentContext,
-            checkpointer=InMemorySaver(), # Use InMemorySaver for now, or self.checkpointer if it's compatible
+            checkpointer=self.checkpointer,
         )
         
         return agent
@@ -1,32 +1,412 @@
 import logging
+import re
+import threading
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Union
 from langchain.agents import create_agent
 from langchain.tools import tool, ToolRuntime
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from langgraph.types import Command
 
 from app.agents.base import BaseAgent
-from app.agents.calendar import CalendarAgent
-from app.agents.email import EmailAgent
+from app.core.checkpoint import checkpoint_path
+from app.core.concurrency import run_blocking
+from app.core.config import config
 from app.core.context import AgentContext
+from app.core.draft_edits import apply_edits
+from app.core.dispatch import SubAgentDispatchMiddleware
+from app.core.history import HistoryBudgetMiddleware
+from app.core.models import ModelSettings
 from app.core.prompt_loader import PromptLoader
+from app.core.router import IntentRouter, RouteDecision
+from app.core.streaming import Done, StreamEvent, ToolCallEnd, ToolCallStart, stream_call
+from app.core.tasks import TaskThreads
+from app.core.utils import print_agent_step
 
 logger = logging.getLogger(__name__)
 
-# Initialize sub-agents - REMOVED GLOBAL STATE
-# calendar_agent = CalendarAgent()
-# email_agent = EmailAgent()
+# A sub-agent, or a callable building it on first use
+SubAgent = Union[BaseAgent, Callable[[], BaseAgent]]
+
+def _calendar_agent() -> BaseAgent:
+    # Imported here so the Google API client is only loaded once it is needed
+    from app.agents.calendar import CalendarAgent
+    return CalendarAgent()
+
+def _email_agent() -> BaseAgent:
+    from app.agents.email import EmailAgent
+    return EmailAgent()
+
+def interrupt_action(result) -> Optional[Dict[str, Any]]:
+    """
+    Returns the action (tool name and args) a sub-agent approval interrupt asks
+    for, or None if the result is not an interrupt.
+    """
+    # Result might be a list/tuple of Interrupt objects
+    interrupt_value = None
+    if isinstance(result, (list, tuple)) and len(result) > 0:
+        first_item = result[0]
+        if hasattr(first_item, "value"):
+            interrupt_value = first_item.value
+    elif hasattr(result, "value"):
+         interrupt_value = result.value
+
+    # The interrupt value contains 'action_requests'
+    if interrupt_value and "action_requests" in interrupt_value and len(interrupt_value["action_requests"]) > 0:
+        action = interrupt_value["action_requests"][0]
+        return {"name": action.get("name"), "args": dict(action.get("args") or {})}
+    return None
+
+def describe_action(action: Dict[str, Any]) -> str:
+    """Formats an action waiting for approval, for the LLM or the user."""
+    return f"Action required: The Email Agent wants to call '{action['name']}' with args: {action['args']}. Reply 'Approve', 'Reject', or 'Edit: <changes>'."
+
+# Supervisor tools and the sub-agents they delegate to
+_TOOL_AGENTS = {"schedule_event": "calendar", "manage_email": "email"}
+_AGENT_TOOLS = {agent: tool_name for tool_name, agent in _TOOL_AGENTS.items()}
+
+# 'Approve', 'Approved!', 'Reject: wrong date', 'Edit: make it shorter', ...
+_APPROVAL_PATTERN = re.compile(r"^\s*(approve|reject|edit)(?:d|ed)?\b[\s:.,!-]*(.*)$", re.IGNORECASE | re.DOTALL)
+
+def parse_approval(text: str) -> Optional[Tuple[str, str]]:
+    """
+    Recognizes an approval command.
+
+    Returns:
+        The decision ('approve', 'reject' or 'edit') and the text after it, or None.
+    """
+    match = _APPROVAL_PATTERN.match(text)
+    if not match:
+        return None
+    return match.group(1).lower(), match.group(2).strip()
 
 class SupervisorAgent(BaseAgent):
-    def __init__(self, calendar_agent: BaseAgent, email_agent: BaseAgent):
-        self.calendar_agent = calendar_agent
-        self.email_agent = email_agent
+    # Its tools call this instance's sub-agents
+    shares_graph = False
+
+    def __init__(self, calendar_agent: Optional[SubAgent] = None, email_agent: Optional[SubAgent] = None, router: Optional[IntentRouter] = None):
+        """
+        Sub-agents can be passed as instances or as factories; factories (the
+        default) are called on the first delegation to that agent.
+        """
+        self._sub_agents: Dict[str, SubAgent] = {
+            "calendar": calendar_agent or _calendar_agent,
+            "email": email_agent or _email_agent,
+        }
+        self._sub_agents_lock = threading.Lock()
+        self.dispatcher = SubAgentDispatchMiddleware()
+        self.tasks = TaskThreads(path=checkpoint_path("SupervisorTasks"))
+        self.router = router or IntentRouter()
+        self.fast_approvals = 0
         super().__init__()
 
+    def model_settings(self) -> ModelSettings:
+        # Choosing a sub-agent and relaying its answer does not need the standard tier
+        return ModelSettings(config.SUPERVISOR_MODEL_TIER, config.SUPERVISOR_MAX_OUTPUT_TOKENS, config.SUPERVISOR_MODEL_TIMEOUT)
+
+    def chat(self, user_input: str, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> Any:
+        context = context or AgentContext(user_name="User")
+        approval = self._approval_shortcut(user_input, context)
+        if approval:
+            return self._fast_approval(user_input, approval, context, thread_id)
+        decision = self._route(user_input, context)
+        if decision is not None and self.router.should_route(decision):
+            return self._run_routed(decision, user_input, context, thread_id)
+        response = super().chat(user_input, context=context, thread_id=thread_id)
+        if decision is not None:
+            self.router.record(user_input, decision, routed=False, actual=self._supervisor_choice(context, thread_id))
+        return response
+
+    async def achat(self, user_input: str, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> Any:
+        context = context or AgentContext(user_name="User")
+        approval = self._approval_shortcut(user_input, context)
+        if approval:
+            return await run_blocking(self._fast_approval, user_input, approval, context, thread_id)
+        decision = self._route(user_input, context)
+        if decision is not None and self.router.should_route(decision):
+            return await run_blocking(self._run_routed, decision, user_input, context, thread_id)
+        response = await super().achat(user_input, context=context, thread_id=thread_id)
+        if decision is not None:
+            actual = await run_blocking(self._supervisor_choice, context, thread_id)
+            self.router.record(user_input, decision, routed=False, actual=actual)
+        return response
+
+    def stream(self, user_input: str, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> Iterator[StreamEvent]:
+        context = context or AgentContext(user_name="User")
+        shortcut, decision = self._stream_shortcut(user_input, context, thread_id)
+        if shortcut is not None:
+            return shortcut
+        return self._recorded(super().stream(user_input, context=context, thread_id=thread_id), decision, user_input, context, thread_id)
+
+    async def astream(self, user_input: str, context: Optional[AgentContext] = None, thread_id: Optional[str] = None) -> AsyncIterator[StreamEvent]:
+        context = context or AgentContext(user_name="User")
+        shortcut, decision = self._stream_shortcut(user_input, context, thread_id)
+        if shortcut is not None:
+            # Shortcuts call sub-agents directly; step through them on the worker pool
+            while (event := await run_blocking(next, shortcut, None)) is not None:
+                yield event
+            return
+        async for event in super().astream(user_input, context=context, thread_id=thread_id):
+            if isinstance(event, Done) and decision is not None:
+                actual = await run_blocking(self._supervisor_choice, context, thread_id)
+                self.router.record(user_input, decision, routed=False, actual=actual)
+            yield event
+
+    def end_session(self, session_id: str):
+        """
+        Drops the session's history here and in both sub-agents.
+        """
+        super().end_session(session_id)
+        # Sub-agents that were never built have no history to drop
+        for agent in self._built_sub_agents():
+            agent.end_session(session_id)
+        for agent_name, thread_id in self.tasks.end_session(session_id):
+            self._sub_agent(agent_name).delete_thread(thread_id)
+
+    @property
+    def calendar_agent(self) -> BaseAgent:
+        return self._sub_agent("calendar")
+
+    @property
+    def email_agent(self) -> BaseAgent:
+        return self._sub_agent("email")
+
+    def _sub_agent(self, agent_name: str) -> BaseAgent:
+        """Returns a sub-agent, building it on first use."""
+        agent = self._sub_agents[agent_name]
+        if isinstance(agent, BaseAgent):
+            return agent
+        with self._sub_agents_lock:
+            # Parallel tool calls may race to build the same agent
+            agent = self._sub_agents[agent_name]
+            if not isinstance(agent, BaseAgent):
+                logger.info(f"Starting the {agent_name} agent")
+                agent = self._sub_agents[agent_name] = agent()
+            return agent
+
+    def _built_sub_agents(self) -> List[BaseAgent]:
+        return [agent for agent in self._sub_agents.values() if isinstance(agent, BaseAgent)]
+
+    def _finish_task(self, agent_name: str, context: AgentContext, thread_id: str, request: str, result: Any):
+        """Deletes a finished task's thread and remembers its outcome."""
+        if self.tasks.is_ephemeral(thread_id, context.session_id):
+            self._sub_agent(agent_name).delete_thread(thread_id)
+        self.tasks.record(context.session_id, agent_name, request, result)
+
+    def _resume_email(self, command: Command, context: AgentContext) -> str:
+        """Resumes the session's email task that is waiting for approval."""
+        thread_id = self.tasks.pending(context.session_id, "email")
+        if thread_id is None:
+            return "There is no email waiting for approval."
+
+        result = self.email_agent.resume(command, context=context, thread_id=thread_id)
+        action = interrupt_action(result)
+        if action:
+            # e.g. a redraft after a rejection, which needs approval again
+            self.tasks.set_pending(context.session_id, "email", thread_id, action)
+            return describe_action(action)
+        self.tasks.clear_pending(context.session_id, "email")
+        self._finish_task("email", context, thread_id, "approval", result)
+        return str(result)
+
+    def _resolve_approval(self, decision: str, detail: str, context: AgentContext) -> str:
+        """Turns an approval command into the matching resume command for the pending email."""
+        action = self.tasks.pending_action(context.session_id, "email")
+        if decision == "approve":
+            if action and action.get("edited"):
+                # Send the locally edited draft instead of the agent's original
+                edited_action = {"name": action["name"], "args": action["args"]}
+                command = Command(resume={"decisions": [{"type": "edit", "edited_action": edited_action}]})
+            else:
+                command = Command(resume={"decisions": [{"type": "approve"}]})
+        elif decision == "reject":
+            command = Command(resume={"decisions": [{"type": "reject", "message": detail or "Rejected by user"}]})
+        else:
+            if not detail:
+                return "Please provide instructions on what to edit (e.g., 'Edit: Change subject to...')"
+            # Structured edits are applied to the draft here and shown for approval again
+            edited_args = apply_edits(detail, action["args"]) if action else None
+            if edited_args is not None:
+                self.tasks.edit_pending_action(context.session_id, "email", edited_args)
+                logger.info("Applied email draft edits without redrafting")
+                return describe_action(dict(action, args=edited_args))
+            # Free-form changes: treat "Edit" as a "Reject" with feedback.
+            # This prompts the EmailAgent to regenerate the draft with the new instructions.
+            feedback = f"User requested changes: {detail}. Please update the email draft and try again."
+            command = Command(resume={"decisions": [{"type": "reject", "message": feedback}]})
+        return self._resume_email(command, context)
+
+    def _schedule_event(self, request: str, context: AgentContext) -> str:
+        """Runs a calendar request as a task of the calendar agent."""
+        thread_id = self.tasks.start(context.session_id, "calendar")
+        result = None
+        try:
+            task = self.tasks.with_summary(context.session_id, "calendar", request)
+            result = self.calendar_agent.invoke(task, context=context, thread_id=thread_id)
+            return result
+        except Exception as e:
+            logger.error(f"Error in schedule_event: {e}")
+            result = f"Error in schedule_event: {e}"
+            return result
+        finally:
+            self._finish_task("calendar", context, thread_id, request, result)
+
+    def _manage_email(self, request: str, context: AgentContext) -> str:
+        """Runs an email request as a task of the email agent, or resolves an approval command."""
+        approval = parse_approval(request)
+        if approval:
+            return self._resolve_approval(*approval, context)
+
+        thread_id = self.tasks.start(context.session_id, "email")
+        try:
+            # Normal invocation
+            task = self.tasks.with_summary(context.session_id, "email", request)
+            result = self.email_agent.invoke(task, context=context, thread_id=thread_id)
+
+            # Check for interrupt; the task's thread must stay resumable until it is resolved
+            action = interrupt_action(result)
+            if action:
+                abandoned = self.tasks.set_pending(context.session_id, "email", thread_id, action)
+                if abandoned and self.tasks.is_ephemeral(abandoned, context.session_id):
+                    logger.info(f"Discarding unanswered email approval in thread {abandoned}")
+                    self.email_agent.delete_thread(abandoned)
+                return describe_action(action)
+
+            self._finish_task("email", context, thread_id, request, result)
+            return str(result)
+        except Exception as e:
+            logger.error(f"Error in manage_email: {e}")
+            self._finish_task("email", context, thread_id, request, f"Error: {e}")
+            return f"Error in manage_email: {e}"
+
+    def _approval_shortcut(self, user_input: str, context: AgentContext) -> Optional[Tuple[str, str]]:
+        """
+        Returns the parsed command when the user only typed an approval command
+        for a pending email, which can then skip the supervisor model turn.
+        """
+        parsed = parse_approval(user_input)
+        if parsed is None or self.tasks.pending(context.session_id, "email") is None:
+            return None
+        if parsed[0] == "approve" and parsed[1]:
+            # e.g. "approve the budget and email Bob" is left to the model
+            return None
+        return parsed
+
+    def _fast_approval(self, user_input: str, approval: Tuple[str, str], context: AgentContext, thread_id: Optional[str] = None) -> str:
+        """
+        Resolves a pending email directly. The exchange is still added to the
+        supervisor's transcript.
+        """
+        decision, detail = approval
+        try:
+            response = self._resolve_approval(decision, detail, context)
+        except Exception as e:
+            logger.error(f"Error resolving approval: {e}")
+            response = f"Error in manage_email: {e}"
+        self.agent_executor.update_state(
+            self._thread_config(context, thread_id),
+            {"messages": [HumanMessage(content=user_input), AIMessage(content=response)]},
+            as_node="model",
+        )
+        self.fast_approvals += 1
+        logger.info(f"Resolved '{decision}' for session {context.session_id} without a supervisor turn")
+        print_agent_step(AIMessage(content=response))
+        return response
+
+    def _route(self, user_input: str, context: AgentContext) -> Optional[RouteDecision]:
+        """
+        Returns the pre-router's decision, or None when the router is not consulted.
+        A disabled router still decides, so its choices are logged against the
+        supervisor's; only should_route() checks whether it is enabled.
+        """
+        if self.tasks.pending(context.session_id, "email") is not None:
+            # With an email awaiting approval, the reply may be about it
+            return None
+        return self.router.route(user_input)
+
+    def _run_routed(self, decision: RouteDecision, user_input: str, context: AgentContext, thread_id: Optional[str] = None, call_id: Optional[str] = None) -> str:
+        """
+        Hands a request straight to a sub-agent, skipping the supervisor model.
+        The delegation is written to the supervisor's transcript as if the
+        supervisor had made it, so later turns can refer to it.
+        """
+        tool_name = _AGENT_TOOLS[decision.agent]
+        call_id = call_id or f"route_{uuid.uuid4().hex[:12]}"
+        print_agent_step(AIMessage(content="", tool_calls=[{"name": tool_name, "args": {"request": user_input}, "id": call_id}]))
+        if decision.agent == "calendar":
+            result = str(self._schedule_event(user_input, context))
+        else:
+            result = self._manage_email(user_input, context)
+
+        self.agent_executor.update_state(
+            self._thread_config(context, thread_id),
+            {"messages": [
+                HumanMessage(content=user_input),
+                AIMessage(content="", tool_calls=[{"name": tool_name, "args": {"request": user_input}, "id": call_id}]),
+                ToolMessage(content=result, name=tool_name, tool_call_id=call_id),
+                AIMessage(content=result),
+            ]},
+            as_node="model",
+        )
+        self.router.record(user_input, decision, routed=True, outcome="error" if result.startswith("Error") else "ok")
+        print_agent_step(AIMessage(content=result))
+        return result
+
+    def _stream_shortcut(self, user_input: str, context: AgentContext, thread_id: Optional[str] = None) -> Tuple[Optional[Iterator[StreamEvent]], Optional[RouteDecision]]:
+        """
+        Returns events for a turn answered without the supervisor model (or
+        None), and the router's decision for the turn.
+        """
+        approval = self._approval_shortcut(user_input, context)
+        if approval:
+            return self._stream_fast_approval(user_input, approval, context, thread_id), None
+        decision = self._route(user_input, context)
+        if decision is not None and self.router.should_route(decision):
+            return self._stream_routed(decision, user_input, context, thread_id), decision
+        return None, decision
+
+    def _stream_fast_approval(self, user_input: str, approval: Tuple[str, str], context: AgentContext, thread_id: Optional[str] = None) -> Iterator[StreamEvent]:
+        response = yield from stream_call(self._fast_approval, user_input, approval, context, thread_id, agent="email")
+        yield Done(agent=self.agent_name, response=response)
+
+    def _stream_routed(self, decision: RouteDecision, user_input: str, context: AgentContext, thread_id: Optional[str] = None) -> Iterator[StreamEvent]:
+        tool_name = _AGENT_TOOLS[decision.agent]
+        call_id = f"route_{uuid.uuid4().hex[:12]}"
+        yield ToolCallStart(agent=self.agent_name, name=tool_name, args={"request": user_input}, call_id=call_id)
+        result = yield from stream_call(self._run_routed, decision, user_input, context, thread_id, call_id, agent=decision.agent)
+        yield ToolCallEnd(agent=self.agent_name, name=tool_name, call_id=call_id, output=result, ok=not result.startswith("Error"))
+        yield Done(agent=self.agent_name, response=result)
+
+    def _recorded(self, events: Iterator[StreamEvent], decision: Optional[RouteDecision], user_input: str, context: AgentContext, thread_id: Optional[str] = None) -> Iterator[StreamEvent]:
+        """Passes supervisor events through, recording the routing outcome before Done."""
+        for event in events:
+            if isinstance(event, Done) and decision is not None:
+                self.router.record(user_input, decision, routed=False, actual=self._supervisor_choice(context, thread_id))
+            yield event
+
+    def _supervisor_choice(self, context: AgentContext, thread_id: Optional[str] = None) -> Optional[str]:
+        """Returns the sub-agent the supervisor delegated the latest turn to ('mixed' for both)."""
+        try:
+            messages = self.agent_executor.get_state(self._thread_config(context, thread_id)).values.get("messages", [])
+        except Exception as e:
+            logger.error(f"Error reading supervisor state: {e}")
+            return None
+        start = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)), 0)
+        agents = {
+            _TOOL_AGENTS[call["name"]]
+            for message in messages[start:] if isinstance(message, AIMessage)
+            for call in message.tool_calls if call["name"] in _TOOL_AGENTS
+        }
+        if len(agents) > 1:
+            return "mixed"
+        return agents.pop() if agents else None
+
     def _create_agent_executor(self):
         system_prompt = PromptLoader.get_prompt("supervisor")
 
         # Define tools dynamically to use instance attributes
         @tool
-        def schedule_event(request: str) -> str:
+        def schedule_event(request: str, runtime: ToolRuntime[AgentContext]) -> str:
             """
             Schedule calendar events using natural language.
             Use this when the user wants to create, modify, or check calendar appointments.
@@ -34,7 +414,7 @@ class SupervisorAgent(BaseAgent):
             
             Input: Natural language scheduling request (e.g., 'meeting with design team next Tuesday at 2pm')
             """
-            return self.calendar_agent.invoke(request)
+            return self._schedule_event(request, runtime.context)
 
         @tool
         def manage_email(request: str, runtime: ToolRuntime[AgentContext]) -> str:
@@ -46,69 +426,19 @@ class SupervisorAgent(BaseAgent):
             Input: Natural language email request (e.g., 'send them a reminder about the meeting')
             OR approval commands: 'Approve', 'Reject', 'Edit: [changes]'
             """
-            # Extract context from runtime
-            context = runtime.context
-            
-            # Simple heuristic to detect approval/rejection
-            # In a real app, we might check the agent state or use a separate tool.
-            lower_request = request.lower()
-            
-            if lower_request.startswith("approve"):
-                command = Command(resume={"decisions": [{"type": "approve"}]})
-                return self.email_agent.resume(command, context=context)
-                
-            elif lower_request.startswith("reject"):
-                reason = request[6:].strip() or "Rejected by user"
-                command = Command(resume={"decisions": [{"type": "reject", "message": reason}]})
-                return self.email_agent.resume(command, context=context)
-                
-            elif lower_request.startswith("edit"):
-                # Treat "Edit" as a "Reject" with feedback.
-                # This prompts the EmailAgent to regenerate the draft with the new instructions.
-                instructions = request[5:].strip()
-                if not instructions:
-                     return "Please provide instructions on what to edit (e.g., 'Edit: Change subject to...')"
-                
-                feedback = f"User requested changes: {instructions}. Please update the email draft and try again."
-                command = Command(resume={"decisions": [{"type": "reject", "message": feedback}]})
-                return self.email_agent.resume(command, context=context)
-            
-            try:
-                # Normal invocation
-                result = self.email_agent.invoke(request, context=context)
-                
-                # Check for interrupt
-                # Result might be a list/tuple of Interrupt objects
-                interrupt_value = None
-                if isinstance(result, (list, tuple)) and len(result) > 0:
-                    first_item = result[0]
-                    if hasattr(first_item, "value"):
-                        interrupt_value = first_item.value
-                elif hasattr(result, "value"):
-                     interrupt_value = result.value
-                
-                if interrupt_value:
-                    # Format interrupt for the LLM
-                    # The interrupt value contains 'action_requests'
-                    if "action_requests" in interrupt_value and len(interrupt_value["action_requests"]) > 0:
-                        action = interrupt_value["action_requests"][0]
-                        tool_name = action.get("name")
-                        args = action.get("args")
-                        return f"Action required: The Email Agent wants to call '{tool_name}' with args: {args}. Please ask the user to 'Approve', 'Reject', or 'Edit'."
-                
-                return str(result)
-            except Exception as e:
-                logger.error(f"Error in manage_email: {e}")
-                return f"Error in manage_email: {e}"
+            return self._manage_email(request, runtime.context)
 
         tools = [schedule_event, manage_email]
+        self.history = HistoryBudgetMiddleware(self.llm, config.SUPERVISOR_HISTORY_TOKEN_BUDGET, name="supervisor")
 
         agent = create_agent(
             self.llm,
             tools=tools,
+            name=self.agent_name,
             system_prompt=system_prompt,
             checkpointer=self.checkpointer,
             context_schema=AgentContext,
+            middleware=[self.dispatcher, self.history, *self._model_middleware()],
         )
         
         return agent
@@ -1,4 +1,11 @@
+import os
 import os.path
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -9,51 +16,207 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def authenticate_google_services():
+@contextmanager
+def _file_lock(path: str):
     """
-    Authenticates the user with Google APIs (Calendar, Gmail, etc.).
-    
-    Returns:
-        creds: The authenticated Google OAuth2 credentials.
+    Holds an exclusive advisory lock on `path` for the duration of the block.
+    Used to serialize token refreshes and writes across worker processes.
+    """
+    with open(path, "a+") as lock_file:
+        if sys.platform == "win32":
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def _write_atomic(path: str, data: str):
+    """Writes `data` to a temporary file next to `path` and renames it into place."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".token-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as tmp:
+            tmp.write(data)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class CredentialManager:
+    """
+    Keeps Google OAuth2 credentials in memory and refreshes them before they expire.
+
+    A single credentials object is handed out for the lifetime of the process and
+    updated in place, so service clients built from it stay valid. Refreshes are
+    single-flight across threads, and token.json is only read and written under
+    an exclusive file lock so several processes can share it.
     """
-    creds = None
-    
-    # The file token.json stores the user's access and refresh tokens
-    if os.path.exists(config.TOKEN_FILE):
+
+    def __init__(
+        self,
+        token_file: Optional[str] = None,
+        credentials_file: Optional[str] = None,
+        scopes: Optional[list] = None,
+        refresh_margin: Optional[int] = None,
+        background: bool = True,
+    ):
+        self.token_file = token_file or config.TOKEN_FILE
+        self.credentials_file = credentials_file or config.CREDENTIALS_FILE
+        self.scopes = scopes or config.SCOPES
+        self.refresh_margin = config.TOKEN_REFRESH_MARGIN if refresh_margin is None else refresh_margin
+        self.background = background
+        self._creds: Optional[Credentials] = None
+        self._refresh_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self.refresh_count = 0
+
+    @property
+    def lock_file(self) -> str:
+        return f"{self.token_file}.lock"
+
+    def get_credentials(self) -> Credentials:
+        """
+        Returns valid credentials, refreshing only if they are missing or about to expire.
+
+        Returns:
+            creds: The authenticated Google OAuth2 credentials.
+        """
+        creds = self._creds
+        if creds is not None and not self._needs_refresh(creds):
+            return creds
+        return self.refresh()
+
+    def refresh(self, force: bool = False) -> Credentials:
+        """
+        Refreshes the credentials. Concurrent callers wait for the in-flight
+        refresh instead of starting their own.
+        """
+        with self._refresh_lock:
+            # Another thread may have refreshed while we were waiting
+            if not force and self._creds is not None and not self._needs_refresh(self._creds):
+                return self._creds
+
+            with _file_lock(self.lock_file):
+                # Another process may have refreshed token.json in the meantime
+                stored = self._load_from_disk()
+                if stored is not None and stored.valid and not self._needs_refresh(stored) and not force:
+                    self._adopt(stored)
+                    logger.info(f"Loaded fresh credentials from {self.token_file}")
+                else:
+                    self._adopt(self._obtain(stored or self._creds))
+                    self._save()
+
+            self._schedule_refresh()
+            return self._creds
+
+    def _needs_refresh(self, creds: Credentials) -> bool:
+        if not creds.valid:
+            return True
+        remaining = self._seconds_until_expiry(creds)
+        return remaining is not None and remaining <= self.refresh_margin
+
+    @staticmethod
+    def _seconds_until_expiry(creds: Credentials) -> Optional[float]:
+        if creds.expiry is None:
+            return None
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (creds.expiry - now).total_seconds()
+
+    def _load_from_disk(self) -> Optional[Credentials]:
+        # The file token.json stores the user's access and refresh tokens
+        if not os.path.exists(self.token_file):
+            return None
         try:
-            creds = Credentials.from_authorized_user_file(config.TOKEN_FILE, config.SCOPES)
+            return Credentials.from_authorized_user_file(self.token_file, self.scopes)
         except Exception as e:
-            logger.error(f"Error loading credentials from {config.TOKEN_FILE}: {e}")
-            # If loading fails, we might want to re-authenticate or just let creds be None
-            creds = None
+            logger.error(f"Error loading credentials from {self.token_file}: {e}")
+            return None
 
-    # If there are no (valid) credentials available, let the user log in.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
+    def _obtain(self, creds: Optional[Credentials]) -> Credentials:
+        if creds and creds.refresh_token:
             try:
-                logger.info("Refreshing expired credentials...")
+                logger.info("Refreshing credentials...")
                 creds.refresh(Request())
+                self.refresh_count += 1
+                return creds
             except Exception as e:
                 logger.error(f"Error refreshing credentials: {e}")
-                creds = None
-        
-        if not creds:
-            try:
-                logger.info("Initiating new authentication flow...")
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    config.CREDENTIALS_FILE, config.SCOPES
-                )
-                creds = flow.run_local_server(port=0)
-            except Exception as e:
-                logger.error(f"Error during authentication flow: {e}")
-                raise RuntimeError(f"Failed to authenticate: {e}")
 
+        # If there are no (valid) credentials available, let the user log in.
+        try:
+            logger.info("Initiating new authentication flow...")
+            flow = InstalledAppFlow.from_client_secrets_file(
+                self.credentials_file, self.scopes
+            )
+            return flow.run_local_server(port=0)
+        except Exception as e:
+            logger.error(f"Error during authentication flow: {e}")
+            raise RuntimeError(f"Failed to authenticate: {e}")
+
+    def _adopt(self, creds: Credentials):
+        if self._creds is None or creds is self._creds:
+            self._creds = creds
+            return
+        # Update in place so clients holding the object see the new token
+        self._creds.token = creds.token
+        self._creds.expiry = creds.expiry
+        if creds.refresh_token:
+            self._creds._refresh_token = creds.refresh_token
+
+    def _save(self):
         # Save the credentials for the next run
         try:
-            with open(config.TOKEN_FILE, "w") as token:
-                token.write(creds.to_json())
-            logger.info(f"Credentials saved to {config.TOKEN_FILE}")
+            _write_atomic(self.token_file, self._creds.to_json())
+            logger.info(f"Credentials saved to {self.token_file}")
+        except Exception as e:
+            logger.error(f"Error saving credentials to {self.token_file}: {e}")
+
+    def _schedule_refresh(self):
+        if not self.background:
+            return
+        remaining = self._seconds_until_expiry(self._creds)
+        if remaining is None or remaining <= self.refresh_margin:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = remaining - self.refresh_margin + 1
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            self.get_credentials()
         except Exception as e:
-            logger.error(f"Error saving credentials to {config.TOKEN_FILE}: {e}")
+            # The next caller will retry synchronously
+            logger.error(f"Background credential refresh failed: {e}")
+
+    def close(self):
+        """Cancels any scheduled background refresh."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+credential_manager = CredentialManager()
+
+def authenticate_google_services():
+    """
+    Authenticates the user with Google APIs (Calendar, Gmail, etc.).
 
-    return creds
+    Returns:
+        creds: The authenticated Google OAuth2 credentials.
+    """
+    return credential_manager.get_credentials()
@@ -0,0 +1,204 @@
+from array import array
+from datetime import datetime, time, timedelta, tzinfo
+from typing import List, Sequence, Tuple
+
+# All times handled here are integer epoch seconds. Callers convert to and from
+# datetimes at the edges so the inner loops never touch timedelta arithmetic.
+
+def merge_intervals(
+    starts: Sequence[int],
+    ends: Sequence[int],
+    buffer: int = 0,
+) -> Tuple[array, array]:
+    """
+    Merges overlapping busy intervals in a single pass after sorting by start.
+
+    Args:
+        starts: Interval start times.
+        ends: Interval end times, parallel to `starts`.
+        buffer: Seconds of padding added before and after every interval.
+
+    Returns:
+        tuple: Two parallel arrays of merged, non-overlapping start and end times.
+    """
+    order = sorted(range(len(starts)), key=starts.__getitem__)
+    merged_starts = array("q")
+    merged_ends = array("q")
+
+    for i in order:
+        start = starts[i] - buffer
+        end = ends[i] + buffer
+        if merged_ends and start <= merged_ends[-1]:
+            if end > merged_ends[-1]:
+                merged_ends[-1] = end
+        else:
+            merged_starts.append(start)
+            merged_ends.append(end)
+
+    return merged_starts, merged_ends
+
+def free_gaps(
+    starts: Sequence[int],
+    ends: Sequence[int],
+    window_start: int,
+    window_end: int,
+    buffer: int = 0,
+) -> Tuple[array, array]:
+    """
+    Computes the free gaps inside a window, given busy intervals.
+
+    Returns:
+        tuple: Two parallel arrays of gap start and end times, in order.
+    """
+    busy_starts, busy_ends = merge_intervals(starts, ends, buffer)
+    gap_starts = array("q")
+    gap_ends = array("q")
+    cursor = window_start
+
+    for start, end in zip(busy_starts, busy_ends):
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            gap_starts.append(cursor)
+            gap_ends.append(start)
+        cursor = end
+
+    if cursor < window_end:
+        gap_starts.append(cursor)
+        gap_ends.append(window_end)
+
+    return gap_starts, gap_ends
+
+def slot_starts(
+    gap_starts: Sequence[int],
+    gap_ends: Sequence[int],
+    duration: int,
+    granularity: int,
+    origin: int,
+) -> array:
+    """
+    Expands free gaps into candidate slot start times.
+
+    Candidates lie on a grid of `granularity` seconds anchored at `origin`, and
+    each one leaves room for `duration` seconds before its gap closes.
+    """
+    result = array("q")
+    for gap_start, gap_end in zip(gap_starts, gap_ends):
+        # Round the gap start up to the next grid point
+        first = origin - ((origin - gap_start) // granularity) * granularity
+        last = gap_end - duration
+        if first <= last:
+            result.extend(range(first, last + 1, granularity))
+    return result
+
+def find_slots(
+    starts: Sequence[int],
+    ends: Sequence[int],
+    window_start: int,
+    window_end: int,
+    duration: int,
+    granularity: int = 1800,
+    buffer: int = 0,
+) -> array:
+    """
+    Finds every slot of `duration` seconds that fits between busy intervals.
+
+    Args:
+        starts: Busy interval start times.
+        ends: Busy interval end times, parallel to `starts`.
+        window_start: Start of the search window.
+        window_end: End of the search window.
+        duration: Required slot length in seconds.
+        granularity: Spacing of candidate start times in seconds.
+        buffer: Seconds kept free before and after every busy interval.
+
+    Returns:
+        array: Candidate slot start times in ascending order.
+    """
+    gap_starts, gap_ends = free_gaps(starts, ends, window_start, window_end, buffer)
+    return slot_starts(gap_starts, gap_ends, duration, granularity, window_start)
+
+def off_hours(
+    window_start: int,
+    window_end: int,
+    day_start: time,
+    day_end: time,
+    tz: tzinfo,
+    include_weekends: bool = False,
+) -> Tuple[array, array]:
+    """
+    Returns the parts of a window that fall outside someone's working hours.
+
+    Working hours are interpreted in the attendee's own time zone, so the result
+    can be merged with everyone else's busy time as ordinary busy intervals.
+
+    Args:
+        window_start: Start of the search window.
+        window_end: End of the search window.
+        day_start: Local start of the working day.
+        day_end: Local end of the working day.
+        tz: The attendee's time zone.
+        include_weekends: Whether Saturdays and Sundays are working days.
+
+    Returns:
+        tuple: Two parallel arrays of off-hours start and end times.
+    """
+    starts = array("q")
+    ends = array("q")
+    cursor = window_start
+    day = datetime.fromtimestamp(window_start, tz).date() - timedelta(days=1)
+    last_day = datetime.fromtimestamp(window_end, tz).date() + timedelta(days=1)
+
+    while day <= last_day and cursor < window_end:
+        if include_weekends or day.weekday() < 5:
+            opens = int(datetime.combine(day, day_start, tzinfo=tz).timestamp())
+            closes = int(datetime.combine(day, day_end, tzinfo=tz).timestamp())
+            if opens > cursor:
+                starts.append(cursor)
+                ends.append(min(opens, window_end))
+            cursor = max(cursor, closes)
+        day += timedelta(days=1)
+
+    if cursor < window_end:
+        starts.append(cursor)
+        ends.append(window_end)
+
+    return starts, ends
+
+def rank_slots(
+    gap_starts: Sequence[int],
+    gap_ends: Sequence[int],
+    duration: int,
+    granularity: int,
+    origin: int,
+    limit: int,
+) -> List[int]:
+    """
+    Picks up to `limit` slot start times, spread across free gaps.
+
+    The earliest slot of every gap ranks first, then the second slot of every
+    gap, and so on, so the top results offer distinct options rather than
+    back-to-back starts within the same gap.
+    """
+    firsts = []
+    for gap_start, gap_end in zip(gap_starts, gap_ends):
+        first = origin - ((origin - gap_start) // granularity) * granularity
+        if first <= gap_end - duration:
+            firsts.append((first, gap_end - duration))
+
+    ranked = []
+    offset = 0
+    while firsts and len(ranked) < limit:
+        remaining = []
+        for first, last in firsts:
+            candidate = first + offset
+            if candidate <= last:
+                ranked.append(candidate)
+                remaining.append((first, last))
+                if len(ranked) == limit:
+                    break
+        firsts = remaining
+        offset += granularity
+    return ranked
@@ -0,0 +1,494 @@
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+class CompressedSerializer:
+    """
+    Wraps a serializer (msgpack-based JsonPlusSerializer by default) and
+    zlib-compresses payloads of at least `min_size` bytes.
+    """
+
+    SUFFIX = "+zlib"
+
+    def __init__(self, serde: Optional[SerializerProtocol] = None, level: int = 6, min_size: int = 128):
+        self.serde = serde or JsonPlusSerializer()
+        self.level = level
+        self.min_size = min_size
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        self.raw_bytes += len(data)
+        if len(data) >= self.min_size:
+            compressed = zlib.compress(data, self.level)
+            if len(compressed) < len(data):
+                type_, data = type_ + self.SUFFIX, compressed
+        self.stored_bytes += len(data)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(self.SUFFIX):
+            type_, payload = type_[:-len(self.SUFFIX)], zlib.decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS blob_refs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, channel)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+"""
+
+class SQLiteSaver(BaseCheckpointSaver[str]):
+    """
+    Checkpoint saver that keeps conversation state in a SQLite file.
+
+    Checkpoints are msgpack-serialized and zlib-compressed, and channel values
+    are stored once per version instead of once per checkpoint. After every
+    write only the newest `max_depth` checkpoints of the thread are kept
+    (0 keeps all), and threads not written to for `ttl` seconds are deleted
+    (0 never expires). State survives restarts.
+
+    Pruning drops whole superseded checkpoints, so it must be disabled
+    (max_depth=0) for graphs whose state uses DeltaChannel, which rebuilds
+    values from ancestor checkpoints. The agents in this app do not.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        max_depth: Optional[int] = None,
+        ttl: Optional[float] = None,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        self.compressor = CompressedSerializer(serde, level=config.CHECKPOINT_COMPRESSION_LEVEL)
+        super().__init__(serde=self.compressor)
+        self.path = path
+        self.max_depth = config.CHECKPOINT_MAX_DEPTH if max_depth is None else max_depth
+        self.ttl = config.CHECKPOINT_TTL if ttl is None else ttl
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._last_expiry = 0.0
+        self.pruned = 0
+        self.expired = 0
+
+    # Reads
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        with self._lock:
+            if checkpoint_id:
+                row = self.conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                    "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                    "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._to_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            with self._lock:
+                result = self._to_tuple(thread_id, checkpoint_ns, row)
+            if filter and not all(result.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield result
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row: Sequence[Any]) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_b, metadata_type, metadata_b = row
+        checkpoint = self.serde.loads_typed((type_, checkpoint_b))
+        writes = self.conn.execute(
+            "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda w: writes_sort_key(w[5], w[0], w[1]))
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata_b)),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": parent_checkpoint_id,
+                }}
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, value)))
+                for task_id, _, channel, type_, value, _ in writes
+            ],
+        )
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            row = self.conn.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is not None and row[0] != "empty":
+                values[channel] = self.serde.loads_typed(row)
+        return values
+
+    # Writes
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values = c.pop("channel_values")
+        type_, checkpoint_b = self.serde.dumps_typed(c)
+        metadata_type, metadata_b = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version),
+             *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")))
+            for channel, version in new_versions.items()
+        ]
+        refs = [
+            (thread_id, checkpoint_ns, checkpoint["id"], channel, str(version))
+            for channel, version in checkpoint["channel_versions"].items()
+        ]
+
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            self.conn.executemany("INSERT OR REPLACE INTO blob_refs VALUES (?, ?, ?, ?, ?)", refs)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, checkpoint_b, metadata_type, metadata_b),
+            )
+            self._touch(thread_id)
+            if self.max_depth:
+                self._prune(thread_id, checkpoint_ns, self.max_depth)
+        self._expire_if_due()
+
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            rows.append((
+                WRITES_IDX_MAP.get(channel, idx),
+                (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                 channel, *self.serde.dumps_typed(value), task_path),
+            ))
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            for idx, row in rows:
+                # Regular writes are kept on retry; special writes (errors, interrupts) are replaced
+                verb = "INSERT OR IGNORE" if idx >= 0 else "INSERT OR REPLACE"
+                self.conn.execute(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            self._delete_threads([thread_id])
+
+    # Async variants; SQLite calls are short and local, as with InMemorySaver
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return self.delete_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # Housekeeping
+
+    def expire_idle(self, ttl: Optional[float] = None) -> int:
+        """
+        Deletes threads that have not been written to for `ttl` seconds.
+
+        Returns:
+            int: Number of threads deleted.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            thread_ids = [row[0] for row in self.conn.execute(
+                "SELECT thread_id FROM threads WHERE updated_at < ?", (time.time() - ttl,)
+            )]
+            self._delete_threads(thread_ids)
+        if thread_ids:
+            self.expired += len(thread_ids)
+            logger.info(f"Expired {len(thread_ids)} idle checkpoint thread(s)")
+        return len(thread_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns row counts, stored and uncompressed sizes, and the database size on disk."""
+        with self._lock:
+            count = lambda table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+            page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+            return {
+                "threads": count("threads"),
+                "checkpoints": count("checkpoints"),
+                "blobs": count("blobs"),
+                "writes": count("writes"),
+                "pruned_checkpoints": self.pruned,
+                "expired_threads": self.expired,
+                "serialized_bytes": self.compressor.raw_bytes,
+                "compressed_bytes": self.compressor.stored_bytes,
+                "disk_bytes": page_size * page_count,
+                # SQLite's page cache is the only process memory it holds on to
+                "cache_bytes": sqlite3_cache_bytes(self.conn),
+            }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _touch(self, thread_id: str):
+        self.conn.execute("INSERT OR REPLACE INTO threads VALUES (?, ?)", (thread_id, time.time()))
+
+    def _prune(self, thread_id: str, checkpoint_ns: str, depth: int):
+        """Drops checkpoints beyond the newest `depth`, their writes, and unreferenced blobs."""
+        stale = [row[0] for row in self.conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, checkpoint_ns, depth),
+        )]
+        if not stale:
+            return
+        for table in ("checkpoints", "writes", "blob_refs"):
+            self.conn.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in stale],
+            )
+        self.conn.execute(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND NOT EXISTS ("
+            "SELECT 1 FROM blob_refs r WHERE r.thread_id = blobs.thread_id AND r.checkpoint_ns = blobs.checkpoint_ns "
+            "AND r.channel = blobs.channel AND r.version = blobs.version)",
+            (thread_id, checkpoint_ns),
+        )
+        self.pruned += len(stale)
+
+    def _delete_threads(self, thread_ids: Sequence[str]):
+        for table in ("checkpoints", "blobs", "blob_refs", "writes", "threads"):
+            self.conn.executemany(f"DELETE FROM {table} WHERE thread_id = ?", [(t,) for t in thread_ids])
+
+    def _expire_if_due(self):
+        # Expiry scans every thread, so it runs at most once a minute
+        now = time.monotonic()
+        if self.ttl and now - self._last_expiry >= 60:
+            self._last_expiry = now
+            self.expire_idle()
+
+def sqlite3_cache_bytes(conn: sqlite3.Connection) -> int:
+    """Upper bound of the page cache SQLite may keep for a connection."""
+    cache_size = conn.execute("PRAGMA cache_size").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    # Negative cache_size is a limit in KiB rather than in pages
+    return -cache_size * 1024 if cache_size < 0 else cache_size * page_size
+
+_savers: Dict[Tuple[str, str], BaseCheckpointSaver] = {}
+_savers_lock = threading.Lock()
+
+def checkpoint_path(name: str) -> Optional[str]:
+    """Returns the database file for `name` under CHECKPOINT_DIR, or None with the memory backend."""
+    if config.CHECKPOINT_BACKEND == "memory":
+        return None
+    if config.CHECKPOINT_BACKEND == "sqlite":
+        return os.path.abspath(os.path.join(config.CHECKPOINT_DIR, f"{name}.sqlite"))
+    raise ValueError(f"Unknown CHECKPOINT_BACKEND: {config.CHECKPOINT_BACKEND}")
+
+def create_checkpointer(name: str) -> BaseCheckpointSaver:
+    """
+    Returns the checkpoint saver for one agent, as selected by CHECKPOINT_BACKEND.
+    Agents with the same name share one saver (and database connection) per process.
+
+    Args:
+        name: Agent name; each agent gets its own database file because
+            agents reuse the session id as their thread id.
+    """
+    path = checkpoint_path(name)
+    key = ("memory", name) if path is None else ("sqlite", path)
+    with _savers_lock:
+        saver = _savers.get(key)
+        if saver is None:
+            saver = _savers[key] = InMemorySaver() if key[0] == "memory" else SQLiteSaver(key[1])
+        return saver
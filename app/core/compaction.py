@@ -0,0 +1,179 @@
+import logging
+import math
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, tzinfo
+from typing import Dict, List, Optional
+
+from app.core.config import config
+from app.core.datetimes import parse_datetime
+from app.core.utils import to_time_zone
+
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), good enough for budgeting."""
+    return math.ceil(len(text) / 4)
+
+def compact_events(events: List[dict], tz: Optional[tzinfo] = None) -> List[str]:
+    """
+    Groups events by day into one line per day. Timed events are shown in
+    `tz` (the user's time zone), whatever zone their calendar uses.
+
+    Example:
+        "2024-01-01 (Mon): 10:00 Meeting A | 14:00 Meeting B"
+    """
+    days: Dict[str, List[str]] = OrderedDict()
+    for event in events:
+        summary = event.get("summary", "No Title")
+        if "dateTime" in event["start"]:
+            start = to_time_zone(parse_datetime(event["start"]["dateTime"]), tz)
+            day, when = start.date().isoformat(), start.strftime("%H:%M")
+        else:
+            day, when = event["start"].get("date", ""), "all day"
+        days.setdefault(day, []).append(f"{when} {summary}")
+
+    lines = []
+    for day, entries in days.items():
+        try:
+            label = f"{day} ({datetime.fromisoformat(day).strftime('%a')})"
+        except ValueError:
+            label = day
+        lines.append(f"{label}: " + " | ".join(entries))
+    return lines
+
+def compact_slots(slots: List[str], step_minutes: int) -> List[str]:
+    """
+    Collapses runs of slot start times spaced `step_minutes` apart into ranges.
+
+    Example:
+        "2024-01-01T09:00:00+00:00 to 2024-01-01T11:30:00+00:00 (any start every 30 min)"
+    """
+    lines = []
+    run_start = previous = None
+    for slot in slots:
+        current = datetime.fromisoformat(slot)
+        if previous is not None and (current - previous).total_seconds() == step_minutes * 60:
+            previous = current
+            continue
+        if run_start is not None:
+            lines.append(_slot_range(run_start, previous, step_minutes))
+        run_start = previous = current
+    if run_start is not None:
+        lines.append(_slot_range(run_start, previous, step_minutes))
+    return lines
+
+def _slot_range(first: datetime, last: datetime, step_minutes: int) -> str:
+    if first == last:
+        return first.isoformat()
+    return f"{first.isoformat()} to {last.isoformat()} (any start every {step_minutes} min)"
+
+class ResultStore:
+    """
+    Keeps the full, compacted lines of recent tool results so the model can
+    page through whatever did not fit in the token budget.
+
+    Results are kept per session: a session can only page its own results,
+    and its `max_results` most recent ones are never evicted by other
+    sessions. The least recently used session is dropped beyond `max_sessions`.
+    """
+
+    def __init__(self, max_results: Optional[int] = None, max_sessions: Optional[int] = None):
+        self.max_results = max_results or config.TOOL_RESULT_CACHE_SIZE
+        self.max_sessions = max_sessions or config.SESSION_MAX_COUNT
+        self._sessions: "OrderedDict[str, OrderedDict[str, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def put(self, lines: List[str], session_id: str = "default") -> str:
+        result_id = uuid.uuid4().hex[:8]
+        with self._lock:
+            results = self._sessions.get(session_id)
+            if results is None:
+                results = self._sessions[session_id] = OrderedDict()
+            self._sessions.move_to_end(session_id)
+            results[result_id] = lines
+            while len(results) > self.max_results:
+                results.popitem(last=False)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return result_id
+
+    def get(self, result_id: str, session_id: str = "default") -> Optional[List[str]]:
+        with self._lock:
+            results = self._sessions.get(session_id)
+            lines = results.get(result_id) if results is not None else None
+            if lines is not None:
+                self._sessions.move_to_end(session_id)
+                results.move_to_end(result_id)
+            return lines
+
+    def drop(self, session_id: str):
+        """Forgets a session's results, e.g. when the session ends."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def record(self, tool_name: str, before: int, after: int):
+        with self._lock:
+            self.calls += 1
+            self.tokens_before += before
+            self.tokens_after += after
+        logger.info(f"Compacted {tool_name} output: ~{before} -> ~{after} tokens (saved ~{max(before - after, 0)})")
+
+    def stats(self) -> Dict[str, int]:
+        """Returns aggregate token savings across all compacted tool calls."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "tokens_before": self.tokens_before,
+                "tokens_after": self.tokens_after,
+                "tokens_saved": max(self.tokens_before - self.tokens_after, 0),
+            }
+
+result_store = ResultStore()
+
+def fit_to_budget(
+    lines: List[str],
+    budget: Optional[int] = None,
+    offset: int = 0,
+    result_id: Optional[str] = None,
+    session_id: str = "default",
+) -> List[str]:
+    """
+    Returns the lines starting at `offset` that fit in the token budget.
+
+    When lines are left over, the full result is kept in the session's part
+    of the result store and an explicit "N more" marker tells the model how
+    to fetch the next page.
+    At least one line is always returned.
+    """
+    budget = budget or config.TOOL_OUTPUT_TOKEN_BUDGET
+    page = []
+    used = 0
+    for line in lines[offset:]:
+        cost = estimate_tokens(line) + 1
+        if page and used + cost > budget:
+            break
+        page.append(line)
+        used += cost
+
+    remaining = len(lines) - offset - len(page)
+    if remaining > 0:
+        result_id = result_id or result_store.put(lines, session_id)
+        page.append(
+            f"... {remaining} more. Call get_more_results with result_id='{result_id}' "
+            f"and offset={offset + len(page)} to see them."
+        )
+    return page
+
+def compact_output(tool_name: str, raw: str, lines: List[str], budget: Optional[int] = None, session_id: str = "default") -> List[str]:
+    """
+    Fits compacted lines into the budget and records tokens saved versus `raw`,
+    the output the tool would have returned uncompacted.
+    """
+    page = fit_to_budget(lines, budget, session_id=session_id)
+    result_store.record(tool_name, estimate_tokens(raw), estimate_tokens("\n".join(page)))
+    return page
@@ -0,0 +1,42 @@
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from langchain_core.tools import BaseTool
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Bounded pool for the blocking Google API client calls made by async tools
+_executor = ThreadPoolExecutor(max_workers=config.TOOL_MAX_WORKERS, thread_name_prefix="tool")
+
+async def run_blocking(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Runs a blocking function on the shared tool pool without blocking the event loop.
+    Context variables are carried over to the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, context.run, functools.partial(fn, *args, **kwargs))
+
+def with_async(tool: BaseTool) -> BaseTool:
+    """
+    Gives a synchronous tool an async variant that runs its body on the shared
+    pool, so several tool calls in one model step overlap under an async graph run.
+
+    Usage:
+        @with_async
+        @tool(args_schema=...)
+        def my_tool(...): ...
+    """
+    func = tool.func
+
+    async def coroutine(**kwargs: Any) -> Any:
+        return await run_blocking(func, **kwargs)
+
+    tool.coroutine = coroutine
+    return tool
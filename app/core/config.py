@@ -16,12 +16,132 @@ class Config:
     # Credentials File Paths
     CREDENTIALS_FILE = os.getenv("CREDENTIALS_FILE", "credentials.json")
     TOKEN_FILE = os.getenv("TOKEN_FILE", "token.json")
+    # Seconds before expiry at which credentials are refreshed in the background
+    TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", "300"))
     
     # Model Configuration
     MODEL_NAME = os.getenv("MODEL_NAME", "gemini-2.5-flash-preview-09-2025")
     TEMPERATURE = float(os.getenv("TEMPERATURE", "0"))
     
+    # Model Tiers ("standard" runs on MODEL_NAME, "fast" on a lighter model)
+    FAST_MODEL_NAME = os.getenv("FAST_MODEL_NAME", "gemini-2.5-flash-lite")
+    # Tried when a tier's model fails, e.g. times out or is overloaded; empty disables the fallback
+    FALLBACK_MODEL_NAME = os.getenv("FALLBACK_MODEL_NAME", "gemini-2.5-flash")
+    FAST_FALLBACK_MODEL_NAME = os.getenv("FAST_FALLBACK_MODEL_NAME", MODEL_NAME)
+    # Default seconds per model request, and retries before falling back
+    MODEL_TIMEOUT = float(os.getenv("MODEL_TIMEOUT", "60"))
+    MODEL_MAX_RETRIES = int(os.getenv("MODEL_MAX_RETRIES", "2"))
+    # Per-agent tier, output token cap (0 keeps the model's default) and request timeout
+    SUPERVISOR_MODEL_TIER = os.getenv("SUPERVISOR_MODEL_TIER", "fast")
+    SUPERVISOR_MAX_OUTPUT_TOKENS = int(os.getenv("SUPERVISOR_MAX_OUTPUT_TOKENS", "2048"))
+    SUPERVISOR_MODEL_TIMEOUT = float(os.getenv("SUPERVISOR_MODEL_TIMEOUT", "20"))
+    CALENDAR_MODEL_TIER = os.getenv("CALENDAR_MODEL_TIER", "standard")
+    CALENDAR_MAX_OUTPUT_TOKENS = int(os.getenv("CALENDAR_MAX_OUTPUT_TOKENS", "0"))
+    CALENDAR_MODEL_TIMEOUT = float(os.getenv("CALENDAR_MODEL_TIMEOUT", "60"))
+    EMAIL_MODEL_TIER = os.getenv("EMAIL_MODEL_TIER", "standard")
+    EMAIL_MAX_OUTPUT_TOKENS = int(os.getenv("EMAIL_MAX_OUTPUT_TOKENS", "0"))
+    EMAIL_MODEL_TIMEOUT = float(os.getenv("EMAIL_MODEL_TIMEOUT", "60"))
+    
+    # LLM Response Cache (only used at temperature 0)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")
+    LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+    # Never replay a response on a later day than it was cached (prompts mention "today")
+    LLM_CACHE_DAILY = os.getenv("LLM_CACHE_DAILY", "true").lower() == "true"
+    
+    # Datetime Parsing
+    # Parsed timestamps memoized (most repeat across FreeBusy responses and tool calls)
+    DATETIME_CACHE_SIZE = int(os.getenv("DATETIME_CACHE_SIZE", "4096"))
+    
+    # HTTP Transport
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+    # Worker threads for blocking API calls made by async tool variants
+    TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+    
+    # Tool Output Compaction
+    # Approximate token budget for a single tool result sent back to the model
+    TOOL_OUTPUT_TOKEN_BUDGET = int(os.getenv("TOOL_OUTPUT_TOKEN_BUDGET", "400"))
+    # Number of full results kept for paging with get_more_results
+    TOOL_RESULT_CACHE_SIZE = int(os.getenv("TOOL_RESULT_CACHE_SIZE", "32"))
+    
     # Application Settings
     CALENDAR_ID = "primary"
+    LIST_EVENTS_PAGE_SIZE = int(os.getenv("LIST_EVENTS_PAGE_SIZE", "250"))
+    
+    # Calendar batch requests are limited to 50 calls each
+    CALENDAR_BATCH_SIZE = int(os.getenv("CALENDAR_BATCH_SIZE", "50"))
+    
+    # Retries for rate-limited or failed Google API calls
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "1"))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "32"))
+    
+    # Gmail sending quota: messages.send costs 100 of the 250 quota units per user per second
+    GMAIL_SEND_RATE = float(os.getenv("GMAIL_SEND_RATE", "2.5"))
+    GMAIL_SEND_BURST = float(os.getenv("GMAIL_SEND_BURST", "5"))
+    EMAIL_MAX_CONCURRENCY = int(os.getenv("EMAIL_MAX_CONCURRENCY", "4"))
+    
+    # Local Calendar Mirror (answers list_events locally, synced with syncToken)
+    CALENDAR_MIRROR_ENABLED = os.getenv("CALENDAR_MIRROR_ENABLED", "false").lower() == "true"
+    # Seconds a mirror may serve queries before pulling changes again
+    CALENDAR_MIRROR_MAX_AGE = float(os.getenv("CALENDAR_MIRROR_MAX_AGE", "30"))
+    CALENDAR_MIRROR_PAST_DAYS = int(os.getenv("CALENDAR_MIRROR_PAST_DAYS", "30"))
+    
+    # Availability Search
+    SLOT_GRANULARITY_MINUTES = int(os.getenv("SLOT_GRANULARITY_MINUTES", "30"))
+    SLOT_BUFFER_MINUTES = int(os.getenv("SLOT_BUFFER_MINUTES", "0"))
+    WORKDAY_START = os.getenv("WORKDAY_START", "08:00")
+    WORKDAY_END = os.getenv("WORKDAY_END", "17:00")
+    # IANA time zone name (e.g. "Europe/Berlin"); empty means the system time zone,
+    # which must then have an IANA name ($TZ or /etc/localtime) for meeting searches
+    TIME_ZONE = os.getenv("TIME_ZONE", "")
+    SEARCH_DAYS = int(os.getenv("SEARCH_DAYS", "14"))
+    # FreeBusy accepts at most 50 calendars per request
+    FREEBUSY_MAX_CALENDARS = int(os.getenv("FREEBUSY_MAX_CALENDARS", "50"))
+    FREEBUSY_MAX_WORKERS = int(os.getenv("FREEBUSY_MAX_WORKERS", "8"))
+    
+    # Conversation History
+    # Approximate tokens of history sent per model call before older turns are summarized (0 disables)
+    SUPERVISOR_HISTORY_TOKEN_BUDGET = int(os.getenv("SUPERVISOR_HISTORY_TOKEN_BUDGET", "4000"))
+    CALENDAR_HISTORY_TOKEN_BUDGET = int(os.getenv("CALENDAR_HISTORY_TOKEN_BUDGET", "3000"))
+    EMAIL_HISTORY_TOKEN_BUDGET = int(os.getenv("EMAIL_HISTORY_TOKEN_BUDGET", "2000"))
+    # Most recent exchanges (user message and everything after it) always sent verbatim
+    HISTORY_KEEP_EXCHANGES = int(os.getenv("HISTORY_KEEP_EXCHANGES", "3"))
+    
+    # Sub-agent Tasks
+    # Run every delegated task in a fresh sub-agent thread that is deleted afterwards
+    SUBAGENT_EPHEMERAL_THREADS = os.getenv("SUBAGENT_EPHEMERAL_THREADS", "true").lower() == "true"
+    # Prepend one-line outcomes of the session's recent tasks to each new task
+    SUBAGENT_CARRY_SUMMARY = os.getenv("SUBAGENT_CARRY_SUMMARY", "false").lower() == "true"
+    SUBAGENT_SUMMARY_TASKS = int(os.getenv("SUBAGENT_SUMMARY_TASKS", "5"))
+    
+    # Intent Pre-router (sends unambiguous requests straight to a sub-agent).
+    # Opt-in until the logged routing outcomes (ROUTER_LOG_PATH) support it
+    ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "false").lower() == "true"
+    # Minimum confidence for skipping the supervisor model
+    ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.85"))
+    # JSON lines log of routing decisions and outcomes for tuning; empty disables it
+    ROUTER_LOG_PATH = os.getenv("ROUTER_LOG_PATH", "")
+    
+    # Conversation Checkpoints
+    # "sqlite" keeps state on disk across restarts; "memory" keeps everything in RAM
+    CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite")
+    CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", ".checkpoints")
+    # Checkpoints kept per conversation thread (0 keeps all)
+    CHECKPOINT_MAX_DEPTH = int(os.getenv("CHECKPOINT_MAX_DEPTH", "20"))
+    # Seconds after the last write at which a thread is deleted (0 never expires)
+    CHECKPOINT_TTL = float(os.getenv("CHECKPOINT_TTL", str(7 * 24 * 3600)))
+    CHECKPOINT_COMPRESSION_LEVEL = int(os.getenv("CHECKPOINT_COMPRESSION_LEVEL", "6"))
+    
+    # Multi-user Server
+    SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+    # Conversations processed at the same time; further requests wait for a worker
+    SESSION_MAX_WORKERS = int(os.getenv("SESSION_MAX_WORKERS", "8"))
+    # Seconds without activity after which a session and its history are dropped
+    SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", "1800"))
+    SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "1000"))
     
 config = Config()
@@ -1,3 +1,4 @@
+from typing import Any, Optional
 from pydantic import BaseModel, Field
 
 class AgentContext(BaseModel):
@@ -5,3 +6,10 @@ class AgentContext(BaseModel):
     Context shared across agents.
     """
     user_name: str = Field(default="User", description="The name of the user interacting with the agent.")
+    session_id: str = Field(default="default", description="Conversation the request belongs to; used as the checkpoint thread id.")
+    time_zone: Optional[str] = Field(default=None, description="The user's IANA time zone, e.g. 'Europe/Berlin'. Defaults to the configured time zone.")
+
+def context_of(runtime: Any) -> AgentContext:
+    """Returns the context a tool runs with, or the defaults when it is invoked directly."""
+    context = getattr(runtime, "context", None)
+    return context if isinstance(context, AgentContext) else AgentContext()
@@ -0,0 +1,71 @@
+from array import array
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from dateutil import parser
+
+from app.core.config import config
+
+@lru_cache(maxsize=config.DATETIME_CACHE_SIZE)
+def _parse_iso(value: str) -> datetime:
+    # Datetimes are immutable, so cached results can be shared
+    return datetime.fromisoformat(value)
+
+def parse_datetime(value: str) -> datetime:
+    """
+    Parses a timestamp.
+
+    ISO 8601 / RFC 3339 strings, which is what the model and the Google APIs
+    send, take the fast path through datetime.fromisoformat and are memoized.
+    Anything else (e.g. "Jan 7 2030 10am") falls back to dateutil and is
+    parsed every time, since partial inputs such as "10:00" or "Friday 10am"
+    are completed from the current date.
+
+    Raises:
+        ValueError: If the string is not a recognizable date or time.
+    """
+    try:
+        return _parse_iso(value)
+    except ValueError:
+        return parser.parse(value)
+
+def _to_epoch(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.astimezone()
+    return int(dt.timestamp())
+
+@lru_cache(maxsize=config.DATETIME_CACHE_SIZE)
+def _iso_epoch_seconds(value: str) -> int:
+    return _to_epoch(_parse_iso(value))
+
+def epoch_seconds(value: str) -> int:
+    """Returns a timestamp as epoch seconds. Naive timestamps are local time."""
+    try:
+        return _iso_epoch_seconds(value)
+    except ValueError:
+        return _to_epoch(parser.parse(value))
+
+def clear_caches():
+    """Empties the memoized ISO timestamps."""
+    _parse_iso.cache_clear()
+    _iso_epoch_seconds.cache_clear()
+
+def busy_arrays(calendars: Dict[str, Any]) -> Tuple[array, array, List[str]]:
+    """
+    Converts the 'calendars' of a FreeBusy response in one pass.
+
+    Returns:
+        The busy intervals' starts and ends as epoch seconds, and the ids of
+        calendars that could not be checked.
+    """
+    starts = array("q")
+    ends = array("q")
+    unavailable = []
+    for cal_id, data in calendars.items():
+        if data.get("errors"):
+            unavailable.append(cal_id)
+        for busy in data.get("busy", []):
+            starts.append(epoch_seconds(busy["start"]))
+            ends.append(epoch_seconds(busy["end"]))
+    return starts, ends, unavailable
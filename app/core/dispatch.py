@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Tuple
+
+from langchain.agents.middleware import AgentMiddleware, ToolCallRequest
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.errors import GraphBubbleUp
+
+from app.core.concurrency import run_blocking
+from app.core.utils import print_branch_timing
+
+logger = logging.getLogger(__name__)
+
+class SubAgentDispatchMiddleware(AgentMiddleware):
+    """
+    Coordinates the supervisor's sub-agent tool calls within one model step.
+
+    The graph already runs every tool call of a step in parallel. Calls to
+    different sub-agents are independent and keep running concurrently, but
+    calls to the same sub-agent share its conversation thread, so they are
+    run one at a time in the order the model emitted them (e.g. a draft
+    followed by its approval). A failing call is reported as an error result
+    for that call only, and every call's wall-clock time is logged and kept
+    in `timings`.
+
+    An earlier call that does not show up within `arrival_grace` seconds is
+    assumed to have completed already (e.g. the step is being resumed after
+    an interrupt), so later calls never wait on it forever.
+    """
+
+    arrival_grace = 1.0
+    max_tracked_steps = 256
+
+    def __init__(self, max_timings: int = 100):
+        super().__init__()
+        self.timings: deque = deque(maxlen=max_timings)
+        # (step, tool) -> (positions started, positions finished)
+        self._steps: "OrderedDict[Tuple[str, str], Tuple[set[int], set[int]]]" = OrderedDict()
+        self._condition = threading.Condition()
+
+    def wrap_tool_call(self, request: ToolCallRequest, handler: Callable[[ToolCallRequest], Any]) -> Any:
+        key, position, count = self._sequence(request)
+        self._wait_turn(key, position)
+        try:
+            return self._timed(request, lambda: handler(request))
+        finally:
+            self._finish_turn(key, position, count)
+
+    async def awrap_tool_call(self, request: ToolCallRequest, handler: Callable[[ToolCallRequest], Any]) -> Any:
+        key, position, count = self._sequence(request)
+        await run_blocking(self._wait_turn, key, position)
+        started = time.perf_counter()
+        try:
+            result = await handler(request)
+        except GraphBubbleUp:
+            raise
+        except Exception as e:
+            self._record(request, started, ok=False)
+            return self._error_message(request, e)
+        else:
+            self._record(request, started, ok=True)
+            return result
+        finally:
+            self._finish_turn(key, position, count)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Returns the most recent per-call timings, oldest first."""
+        return list(self.timings)
+
+    def _timed(self, request: ToolCallRequest, call: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = call()
+        except GraphBubbleUp:
+            raise
+        except Exception as e:
+            self._record(request, started, ok=False)
+            return self._error_message(request, e)
+        self._record(request, started, ok=True)
+        return result
+
+    def _sequence(self, request: ToolCallRequest) -> Tuple[Tuple[str, str], int, int]:
+        """
+        Locates the call among the calls to the same tool in its model step.
+
+        Returns:
+            The step/tool key, the call's position, and the number of such calls.
+        """
+        call_id = request.tool_call["id"]
+        name = request.tool_call["name"]
+        messages = request.state.get("messages", []) if isinstance(request.state, dict) else []
+        for message in reversed(messages):
+            if isinstance(message, AIMessage) and any(call["id"] == call_id for call in message.tool_calls):
+                siblings = [call["id"] for call in message.tool_calls if call["name"] == name]
+                return (siblings[0], name), siblings.index(call_id), len(siblings)
+        return (call_id, name), 0, 1
+
+    def _wait_turn(self, key: Tuple[str, str], position: int):
+        with self._condition:
+            if key not in self._steps:
+                self._steps[key] = (set(), set())
+                while len(self._steps) > self.max_tracked_steps:
+                    self._steps.popitem(last=False)
+            started, finished = self._steps[key]
+            started.add(position)
+            self._condition.notify_all()
+            if position == 0:
+                return
+            earlier = range(position)
+            self._condition.wait_for(lambda: all(p in started for p in earlier), timeout=self.arrival_grace)
+            self._condition.wait_for(lambda: all(p in finished for p in earlier if p in started))
+
+    def _finish_turn(self, key: Tuple[str, str], position: int, count: int):
+        with self._condition:
+            started, finished = self._steps.get(key, (set(), set()))
+            finished.add(position)
+            if len(finished) >= count:
+                self._steps.pop(key, None)
+            self._condition.notify_all()
+
+    def _record(self, request: ToolCallRequest, started: float, ok: bool):
+        elapsed = time.perf_counter() - started
+        name = request.tool_call["name"]
+        self.timings.append({"tool": name, "tool_call_id": request.tool_call["id"], "seconds": elapsed, "ok": ok})
+        logger.info(f"{name} ({request.tool_call['id']}) {'finished' if ok else 'failed'} in {elapsed:.2f}s")
+        print_branch_timing(name, elapsed, ok)
+
+    def _error_message(self, request: ToolCallRequest, error: Exception) -> ToolMessage:
+        name = request.tool_call["name"]
+        logger.error(f"Error in {name}: {error}")
+        return ToolMessage(
+            content=f"Error in {name}: {error}",
+            name=name,
+            tool_call_id=request.tool_call["id"],
+            status="error",
+        )
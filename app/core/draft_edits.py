@@ -0,0 +1,120 @@
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+# A plausible email address; anything else (e.g. a name) needs the email agent to resolve it
+_ADDRESS = re.compile(r"^[^@\s,;]+@[^@\s,;]+\.[^@\s,;]+$")
+
+def _unquote(text: str) -> str:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    return text
+
+def _addresses(text: str) -> Optional[List[str]]:
+    parts = [p.strip() for p in re.split(r",|;|\band\b", _unquote(text.strip().rstrip("."))) if p.strip()]
+    if not parts or not all(_ADDRESS.match(p) for p in parts):
+        return None
+    return parts
+
+def _paragraphs(body: str) -> List[str]:
+    return [p for p in re.split(r"\n\s*\n", body.strip()) if p.strip()]
+
+def _set_subject(args: Dict[str, Any], match: re.Match) -> bool:
+    if "subject" not in args:
+        return False
+    args["subject"] = _unquote(match.group(1).strip().rstrip("."))
+    return True
+
+def _set_recipient(args: Dict[str, Any], match: re.Match) -> bool:
+    addresses = _addresses(match.group(1))
+    if "to" not in args or not addresses:
+        return False
+    args["to"] = ", ".join(addresses)
+    return True
+
+def _add_cc(args: Dict[str, Any], match: re.Match) -> bool:
+    addresses = _addresses(match.group(1))
+    if "to" not in args or not addresses:
+        return False
+    current = [a.strip() for a in (args.get("cc") or "").split(",") if a.strip()]
+    args["cc"] = ", ".join(current + [a for a in addresses if a not in current])
+    return True
+
+def _remove_cc(args: Dict[str, Any], match: re.Match) -> bool:
+    addresses = _addresses(match.group(1))
+    current = [a.strip() for a in (args.get("cc") or "").split(",") if a.strip()]
+    if not addresses or not set(addresses) <= set(current):
+        return False
+    args["cc"] = ", ".join(a for a in current if a not in addresses) or None
+    return True
+
+def _replace_paragraph(args: Dict[str, Any], match: re.Match) -> bool:
+    paragraphs = _paragraphs(args.get("body") or "")
+    index = int(match.group(1)) - 1
+    if not 0 <= index < len(paragraphs):
+        return False
+    paragraphs[index] = _unquote(match.group(2))
+    args["body"] = "\n\n".join(paragraphs)
+    return True
+
+def _remove_paragraph(args: Dict[str, Any], match: re.Match) -> bool:
+    paragraphs = _paragraphs(args.get("body") or "")
+    index = int(match.group(1)) - 1
+    if not 0 <= index < len(paragraphs) or len(paragraphs) == 1:
+        return False
+    del paragraphs[index]
+    args["body"] = "\n\n".join(paragraphs)
+    return True
+
+def _append_paragraph(args: Dict[str, Any], match: re.Match) -> bool:
+    if "body" not in args:
+        return False
+    args["body"] = "\n\n".join(_paragraphs(args["body"] or "") + [_unquote(match.group(1))])
+    return True
+
+def _replace_text(args: Dict[str, Any], match: re.Match) -> bool:
+    old, new = match.group(1), match.group(2)
+    changed = False
+    for key in ("subject", "body"):
+        if isinstance(args.get(key), str) and old in args[key]:
+            args[key] = args[key].replace(old, new)
+            changed = True
+    return changed
+
+_EDITS: List[tuple[re.Pattern, Callable[[Dict[str, Any], re.Match], bool]]] = [
+    (re.compile(r"^(?:change|set|update|make)\s+(?:the\s+)?subject\s*(?:to|:)\s*(.+)$", re.I | re.S), _set_subject),
+    (re.compile(r"^(?:change|set|update)\s+(?:the\s+)?(?:recipient|to)\s*(?:to|:)\s*(.+)$", re.I), _set_recipient),
+    (re.compile(r"^send\s+(?:it\s+)?to\s+(.+)$", re.I), _set_recipient),
+    (re.compile(r"^(?:add\s+)?cc\s*:?\s*(.+)$", re.I), _add_cc),
+    (re.compile(r"^remove\s+(?:the\s+)?cc\s*:?\s*(.+)$", re.I), _remove_cc),
+    (re.compile(r"^(?:replace|change|rewrite)\s+paragraph\s+(\d+)\s*(?:with|to|:)\s*(.+)$", re.I | re.S), _replace_paragraph),
+    (re.compile(r"^(?:remove|delete|drop)\s+paragraph\s+(\d+)\.?$", re.I), _remove_paragraph),
+    (re.compile(r"^(?:append|add\s+(?:a\s+)?(?:paragraph|line)|add\s+at\s+the\s+end)\s*:?\s*(.+)$", re.I | re.S), _append_paragraph),
+    (re.compile(r"^replace\s+[\"'](.+?)[\"']\s+with\s+[\"'](.*?)[\"']\.?$", re.I | re.S), _replace_text),
+]
+
+def apply_edits(instructions: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Applies structured edit instructions to a pending email's arguments.
+
+    Instructions are separated by ';' or new lines, e.g.
+    "change subject to Q3 review; add cc ana@example.com; replace paragraph 2 with ...".
+
+    Returns:
+        The edited arguments, or None if any instruction is free-form (or does
+        not fit the draft) and needs the email agent to redraft.
+    """
+    clauses = [c.strip() for c in re.split(r";|\n", instructions) if c.strip()]
+    if not clauses:
+        return None
+    edited = dict(args)
+    for clause in clauses:
+        for pattern, edit in _EDITS:
+            match = pattern.match(clause)
+            if match:
+                if not edit(edited, match):
+                    return None
+                break
+        else:
+            return None
+    return edited
@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from googleapiclient.errors import HttpError
+
+from app.core.config import config
+from app.core.datetimes import epoch_seconds
+
+logger = logging.getLogger(__name__)
+
+# Partial-response mask for sync pages; the mirror never needs full event resources
+SYNC_FIELDS = "items(id,status,summary,start,end,htmlLink),nextPageToken,nextSyncToken"
+
+def event_bounds(event: Dict[str, Any]) -> tuple:
+    """Returns an event's (start, end) as epoch seconds. All-day events use local midnight."""
+    return tuple(epoch_seconds(event[key].get("dateTime", event[key].get("date"))) for key in ("start", "end"))
+
+class EventStore:
+    """
+    Local mirror of a single calendar, kept current with incremental sync.
+
+    The first sync pulls every event from `past_days` ago onwards. Later syncs
+    send the stored `syncToken` and only receive changes, falling back to a full
+    resync when Google invalidates the token (HTTP 410). Events are kept in a
+    start-sorted index so range queries are answered without an API call.
+    """
+
+    def __init__(
+        self,
+        calendar_id: str,
+        service_factory: Callable[[], Any],
+        max_age: Optional[float] = None,
+        past_days: Optional[int] = None,
+    ):
+        self.calendar_id = calendar_id
+        self.service_factory = service_factory
+        self.max_age = config.CALENDAR_MIRROR_MAX_AGE if max_age is None else max_age
+        self.past_days = config.CALENDAR_MIRROR_PAST_DAYS if past_days is None else past_days
+        self._lock = threading.RLock()
+        self._events: Dict[str, Dict[str, Any]] = {}
+        self._bounds: Dict[str, tuple] = {}
+        self._sync_token: Optional[str] = None
+        self._synced_at = 0.0
+        self._covered_from: Optional[int] = None
+        self._index_starts: List[int] = []
+        self._index_ids: List[str] = []
+        self._max_duration = 0
+        self._dirty = False
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+
+    def sync(self):
+        """Pulls changes since the last sync, or everything if there is no sync token yet."""
+        with self._lock:
+            if self._sync_token is None:
+                self._full_sync()
+                return
+            try:
+                self._pull(syncToken=self._sync_token)
+                self.incremental_syncs += 1
+            except HttpError as e:
+                if e.resp.status != 410:
+                    raise
+                logger.info(f"Sync token for {self.calendar_id} expired, running a full resync")
+                self._full_sync()
+
+    def _full_sync(self):
+        self._sync_token = None
+        self._covered_from = None
+        self._events.clear()
+        self._bounds.clear()
+        self._dirty = True
+        covered_from = datetime.now().astimezone() - timedelta(days=self.past_days)
+        self._pull(timeMin=covered_from.isoformat())
+        self._covered_from = int(covered_from.timestamp())
+        self.full_syncs += 1
+
+    def _pull(self, **params):
+        service = self.service_factory()
+        page_token = None
+        while True:
+            response = service.events().list(
+                calendarId=self.calendar_id,
+                singleEvents=True,
+                showDeleted=True,
+                maxResults=2500,
+                pageToken=page_token,
+                fields=SYNC_FIELDS,
+                **params,
+            ).execute()
+            for event in response.get("items", []):
+                if event.get("status") == "cancelled":
+                    self._remove(event["id"])
+                else:
+                    self._put(event)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                self._sync_token = response.get("nextSyncToken")
+                self._synced_at = time.monotonic()
+                return
+
+    def _put(self, event: Dict[str, Any]):
+        self._events[event["id"]] = event
+        self._bounds[event["id"]] = event_bounds(event)
+        self._dirty = True
+
+    def _remove(self, event_id: str):
+        if self._events.pop(event_id, None) is not None:
+            del self._bounds[event_id]
+            self._dirty = True
+
+    def _rebuild_index(self):
+        ordered = sorted(self._bounds.items(), key=lambda item: item[1][0])
+        self._index_ids = [event_id for event_id, _ in ordered]
+        self._index_starts = [bounds[0] for _, bounds in ordered]
+        self._max_duration = max((end - start for start, end in self._bounds.values()), default=0)
+        self._dirty = False
+
+    def upsert(self, event: Dict[str, Any]):
+        """Writes an event created or updated through the API into the mirror."""
+        with self._lock:
+            if event.get("status") == "cancelled":
+                self._remove(event["id"])
+            else:
+                self._put(event)
+
+    def query(self, time_min: int, time_max: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns events overlapping [time_min, time_max), ordered by start time.
+
+        Args:
+            time_min: Range start in epoch seconds.
+            time_max: Range end in epoch seconds.
+
+        Returns:
+            list: The matching events, or None if the range starts before the mirrored window.
+        """
+        with self._lock:
+            if self._sync_token is None or time.monotonic() - self._synced_at > self.max_age:
+                self.sync()
+            if self._covered_from is None or time_min < self._covered_from:
+                return None
+            if self._dirty:
+                self._rebuild_index()
+
+            # Only events starting within max_duration before the range can overlap it
+            lo = bisect_left(self._index_starts, time_min - self._max_duration)
+            hi = bisect_left(self._index_starts, time_max)
+            result = []
+            for i in range(lo, hi):
+                event_id = self._index_ids[i]
+                if self._bounds[event_id][1] > time_min:
+                    result.append(self._events[event_id])
+            return result
+
+_stores: Dict[str, EventStore] = {}
+_stores_lock = threading.Lock()
+
+def get_event_store(calendar_id: str, service_factory: Callable[[], Any]) -> Optional[EventStore]:
+    """
+    Returns the process-wide mirror for a calendar, or None when mirroring is disabled.
+    """
+    if not config.CALENDAR_MIRROR_ENABLED:
+        return None
+    with _stores_lock:
+        store = _stores.get(calendar_id)
+        if store is None:
+            store = _stores[calendar_id] = EventStore(calendar_id, service_factory)
+        return store
@@ -0,0 +1,141 @@
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from typing_extensions import NotRequired
+from langchain.agents.middleware import AgentMiddleware, AgentState, ModelRequest
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, SystemMessage
+
+from app.core.compaction import estimate_tokens
+from app.core.config import config
+from app.core.prompt_loader import PromptLoader
+
+logger = logging.getLogger(__name__)
+
+def message_tokens(messages: List[AnyMessage]) -> int:
+    """Rough token count of messages, including tool call arguments."""
+    total = 0
+    for message in messages:
+        total += estimate_tokens(str(message.content)) + 4
+        if isinstance(message, AIMessage) and message.tool_calls:
+            total += estimate_tokens(json.dumps([call["args"] for call in message.tool_calls], default=str))
+    return total
+
+def render_transcript(messages: List[AnyMessage]) -> str:
+    """Renders messages as plain 'Role: text' lines for the summarizer."""
+    lines = []
+    for message in messages:
+        if isinstance(message, AIMessage) and message.tool_calls:
+            calls = ", ".join(f"{call['name']}({call['args']})" for call in message.tool_calls)
+            lines.append(f"Assistant called: {calls}")
+        if message.content:
+            role = {"human": "User", "ai": "Assistant", "tool": f"Tool {getattr(message, 'name', '')}".strip()}.get(message.type, message.type)
+            lines.append(f"{role}: {message.content}")
+    return "\n".join(lines)
+
+class HistoryState(AgentState):
+    history_summary: NotRequired[str]
+    # Number of leading messages already folded into history_summary
+    summarized_count: NotRequired[int]
+
+class HistoryBudgetMiddleware(AgentMiddleware):
+    """
+    Keeps the history sent to the model within a token budget.
+
+    The full conversation stays in the checkpointed state. When the messages
+    not yet summarized exceed the budget, everything before the last
+    `keep_exchanges` exchanges (an exchange starts at a user message) is folded
+    into a running summary, which is updated incrementally with the model.
+    Model calls then get the system prompt plus the summary and the recent
+    messages. Pending tool calls, including ones waiting for approval, always
+    belong to the latest exchange and are never folded.
+    """
+
+    state_schema = HistoryState
+
+    def __init__(self, model: Any, budget: int, keep_exchanges: Optional[int] = None, name: str = "agent"):
+        super().__init__()
+        self.model = model
+        self.budget = budget
+        # The latest exchange holds any pending tool calls, so it is always kept
+        self.keep_exchanges = max(1, config.HISTORY_KEEP_EXCHANGES if keep_exchanges is None else keep_exchanges)
+        self.label = name
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.summaries = 0
+
+    def before_model(self, state: HistoryState, runtime: Any) -> Optional[Dict[str, Any]]:
+        if not self.budget:
+            return None
+        messages = state["messages"]
+        summary = state.get("history_summary", "")
+        start = min(state.get("summarized_count", 0), len(messages))
+        if estimate_tokens(summary) + message_tokens(messages[start:]) <= self.budget:
+            return None
+
+        cut = self._cut_index(messages, start)
+        if cut <= start:
+            return None
+        try:
+            summary = self._summarize(summary, messages[start:cut])
+        except Exception as e:
+            logger.error(f"Error summarizing {self.label} history, sending it in full: {e}")
+            return None
+        with self._lock:
+            self.summaries += 1
+        logger.info(f"Folded {cut - start} {self.label} messages into the history summary")
+        return {"history_summary": summary, "summarized_count": cut}
+
+    def wrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], Any]) -> Any:
+        return handler(self._trimmed(request))
+
+    async def awrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], Any]) -> Any:
+        return await handler(self._trimmed(request))
+
+    def stats(self) -> Dict[str, int]:
+        """Returns aggregate token savings across all model calls."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "summaries": self.summaries,
+                "tokens_before": self.tokens_before,
+                "tokens_after": self.tokens_after,
+                "tokens_saved": max(self.tokens_before - self.tokens_after, 0),
+            }
+
+    def _trimmed(self, request: ModelRequest) -> ModelRequest:
+        summary = request.state.get("history_summary", "") if request.state else ""
+        start = min(request.state.get("summarized_count", 0), len(request.messages)) if request.state else 0
+        before = message_tokens(request.messages)
+        if not summary or not start:
+            self._record(before, before)
+            return request
+
+        base = request.system_message.content if request.system_message else ""
+        system_message = SystemMessage(content=f"{base}\n\nSummary of the earlier conversation:\n{summary}".strip())
+        messages = request.messages[start:]
+        self._record(before, message_tokens(messages) + estimate_tokens(summary))
+        return request.override(system_message=system_message, messages=messages)
+
+    def _record(self, before: int, after: int):
+        with self._lock:
+            self.calls += 1
+            self.tokens_before += before
+            self.tokens_after += after
+        if before > after:
+            logger.info(f"{self.label} history: ~{before} -> ~{after} tokens (saved ~{before - after})")
+
+    def _cut_index(self, messages: List[AnyMessage], start: int) -> int:
+        """Index of the first message of the oldest exchange that is kept verbatim."""
+        exchange_starts = [i for i in range(start, len(messages)) if isinstance(messages[i], HumanMessage)]
+        if len(exchange_starts) <= self.keep_exchanges:
+            return start
+        return exchange_starts[-self.keep_exchanges]
+
+    def _summarize(self, summary: str, messages: List[AnyMessage]) -> str:
+        prompt = PromptLoader.get_prompt("history_summary", summary=summary, transcript=render_transcript(messages))
+        response = self.model.invoke([HumanMessage(content=prompt)])
+        return str(response.content).strip()
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, Generation
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Only model outputs are ever stored, so only these classes are deserialized
+_ALLOWED_OBJECTS = [AIMessage, AIMessageChunk, ChatGeneration, ChatGenerationChunk, Generation]
+
+# Parts of a serialized message that differ between otherwise identical runs
+_VOLATILE_KEYS = {"id", "response_metadata", "usage_metadata"}
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Returns a canonical form of a serialized message list for cache keys.
+
+    Message ids and response metadata are dropped, and tool call ids (random
+    per run) are renumbered in order of appearance, so the same conversation
+    always maps to the same key.
+    """
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    call_ids: Dict[str, str] = {}
+
+    def call_id(value: str) -> str:
+        return call_ids.setdefault(value, f"call_{len(call_ids)}")
+
+    def clean(node: Any) -> Any:
+        if isinstance(node, list):
+            return [clean(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        if node.get("lc") == 1 and isinstance(node.get("kwargs"), dict):
+            kwargs = {k: v for k, v in node["kwargs"].items() if k not in _VOLATILE_KEYS}
+            if "tool_call_id" in kwargs:
+                kwargs["tool_call_id"] = call_id(kwargs["tool_call_id"])
+            for field in ("tool_calls", "invalid_tool_calls"):
+                if field in kwargs:
+                    kwargs[field] = [dict(call, id=call_id(call.get("id") or "")) for call in kwargs[field]]
+            return {**node, "kwargs": clean(kwargs)}
+        return {k: clean(v) for k, v in node.items()}
+
+    return json.dumps(clean(messages), sort_keys=True, separators=(",", ":"))
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Persistent cache of model responses for deterministic (temperature 0) calls.
+
+    Keys cover the model name, temperature and bound tool schemas (LangChain's
+    llm_string) and the normalized messages. Entries expire after `ttl`
+    seconds and, with `daily`, never outlive the day they were written, so
+    answers that depend on "today" are not replayed on a later date. The least
+    recently used entries are evicted beyond `max_entries` or `max_bytes`.
+
+    Replayed responses get fresh message and tool call ids, so a hit can be
+    added to a thread that already holds the original response.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        daily: Optional[bool] = None,
+    ):
+        self.path = path or config.LLM_CACHE_PATH
+        self.ttl = config.LLM_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries or config.LLM_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or config.LLM_CACHE_MAX_BYTES
+        self.daily = config.LLM_CACHE_DAILY if daily is None else daily
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, last_used REAL NOT NULL, latency REAL NOT NULL DEFAULT 0, "
+            "hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+        self._lock = threading.Lock()
+        # key -> time of the lookup miss, to measure how long the real call took
+        self._misses: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.evictions = 0
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT value, created_at, latency FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                self._misses[key] = time.perf_counter()
+                return None
+            self.conn.execute("UPDATE llm_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.hits += 1
+            self.saved_seconds += row[2]
+        return [_fresh_ids(generation) for generation in loads(row[0], allowed_objects=_ALLOWED_OBJECTS)]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = self._key(prompt, llm_string)
+        value = dumps(list(return_val))
+        now = time.time()
+        with self._lock:
+            started = self._misses.pop(key, None)
+            latency = time.perf_counter() - started if started is not None else 0.0
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, last_used, latency) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now, latency),
+            )
+            self._evict()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM llm_cache")
+            self._misses.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit rate, time saved by hits, and the cache's size."""
+        with self._lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+                "entries": entries,
+                "bytes": size,
+                "evictions": self.evictions,
+            }
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        bucket = date.today().isoformat() if self.daily else ""
+        digest = hashlib.sha256()
+        for part in (bucket, llm_string, normalize_prompt(prompt)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _evict(self):
+        if self.ttl:
+            expired = self.conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+            self.evictions += max(expired, 0)
+        entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+        # Drop least recently used entries until both limits hold
+        removed = 0
+        for key, entry_size in self.conn.execute("SELECT key, size FROM llm_cache ORDER BY last_used").fetchall():
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            entries -= 1
+            size -= entry_size
+            removed += 1
+        self.evictions += removed
+
+def _fresh_ids(generation: Generation) -> Generation:
+    message = getattr(generation, "message", None)
+    if message is not None:
+        message.id = None
+        for call in getattr(message, "tool_calls", None) or []:
+            call["id"] = f"call_{uuid.uuid4().hex[:24]}"
+    return generation
+
+_cache: Optional[SQLiteLLMCache] = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache(temperature: float) -> Optional[SQLiteLLMCache]:
+    """
+    Returns the shared response cache, or None when caching is disabled or the
+    model samples (temperature above 0), since its responses are not meant to repeat.
+    """
+    global _cache
+    if not config.LLM_CACHE_ENABLED or temperature > 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteLLMCache()
+        return _cache
@@ -0,0 +1,86 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from app.core.config import config
+from app.core.llm_cache import get_llm_cache
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("fast", "standard")
+
+@dataclass(frozen=True)
+class ModelSettings:
+    """The model an agent runs on: a tier plus the agent's own limits."""
+    tier: str = "standard"
+    # None (or 0) leaves the model's default
+    max_output_tokens: Optional[int] = None
+    timeout: Optional[float] = None
+
+def tier_models(tier: str) -> List[str]:
+    """Returns the names of a tier's primary model and its fallback, if any."""
+    if tier == "fast":
+        names = [config.FAST_MODEL_NAME or config.MODEL_NAME, config.FAST_FALLBACK_MODEL_NAME]
+    elif tier == "standard":
+        names = [config.MODEL_NAME, config.FALLBACK_MODEL_NAME]
+    else:
+        raise ValueError(f"Unknown model tier: {tier}")
+    # Drop an empty or repeated fallback
+    return [name for i, name in enumerate(names) if name and name not in names[:i]]
+
+class ModelRegistry:
+    """
+    Hands out chat models by tier.
+
+    Every model name gets a single client, and with it one HTTP connection
+    pool, shared by all agents. Per-agent limits are applied to copies of
+    that model which reuse its client.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Any] = {}
+        self._models: Dict[Tuple[str, Optional[int], Optional[float]], Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, settings: ModelSettings) -> Any:
+        """Returns the primary model of the settings' tier."""
+        return self._model(tier_models(settings.tier)[0], settings)
+
+    def fallbacks(self, settings: ModelSettings) -> List[Any]:
+        """Returns the models to try when the primary one fails (e.g. times out or is overloaded)."""
+        return [self._model(name, settings) for name in tier_models(settings.tier)[1:]]
+
+    def _model(self, name: str, settings: ModelSettings) -> Any:
+        key = (name, settings.max_output_tokens or None, settings.timeout or config.MODEL_TIMEOUT or None)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                # Copies skip validation, so they keep the shared client
+                model = self._models[key] = self._client(name).model_copy(update={
+                    "max_output_tokens": key[1],
+                    "timeout": key[2],
+                })
+            return model
+
+    def _client(self, name: str) -> Any:
+        client = self._clients.get(name)
+        if client is None:
+            logger.info(f"Creating model client for {name}")
+            client = self._clients[name] = ChatGoogleGenerativeAI(
+                model=name,
+                temperature=config.TEMPERATURE,
+                max_retries=config.MODEL_MAX_RETRIES,
+                cache=get_llm_cache(config.TEMPERATURE),
+            )
+        return client
+
+_registry = ModelRegistry()
+
+def get_model(settings: ModelSettings) -> Any:
+    return _registry.get(settings)
+
+def get_fallback_models(settings: ModelSettings) -> List[Any]:
+    return _registry.fallbacks(settings)
@@ -1,29 +1,119 @@
+import logging
 import os
+import re
+import threading
 import yaml
-from typing import Dict, Any
-from jinja2 import Template
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+from jinja2 import Environment, Template
+
+logger = logging.getLogger(__name__)
+
+# Resolved from the package, so prompts load from any working directory
+DEFAULT_PROMPTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts", "prompts.yaml")
+
+# Shared by all prompts; same settings as a bare jinja2.Template
+_env = Environment()
+
+# Start of the first Jinja expression, statement or comment
+_FIRST_TAG = re.compile(r"\{[{%#]")
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """
+    A prompt split into its static prefix (the text before the first Jinja
+    tag) and a compiled template for the rest.
+    """
+    source: str
+    static_prefix: str
+    template: Optional[Template]
+
+    @classmethod
+    def compile(cls, source: str) -> "CompiledPrompt":
+        match = _FIRST_TAG.search(source)
+        if match is None:
+            # Fully static; rendered once so trailing newlines are handled like any template
+            return cls(source, _env.from_string(source).render(), None)
+        prefix, rest = source[:match.start()], source[match.start():]
+        if rest[2:3] == "-":
+            # "{{-" strips the whitespace before it
+            prefix = prefix.rstrip()
+        return cls(source, prefix, _env.from_string(rest))
+
+    def render(self, **kwargs: Any) -> str:
+        if self.template is None:
+            return self.static_prefix
+        return self.static_prefix + self.template.render(**kwargs)
 
 class PromptLoader:
+    """
+    Registry of the prompts in prompts.yaml.
+
+    Templates are compiled once when the file is loaded, and the file is
+    reloaded when its modification time changes. A reload replaces all
+    prompts at once, and a file that fails to load leaves the previous
+    prompts in place.
+    """
     _prompts: Dict[str, str] = {}
+    _compiled: Dict[str, CompiledPrompt] = {}
+    _path: Optional[str] = None
+    _mtime: Optional[int] = None
+    _lock = threading.Lock()
 
     @classmethod
-    def load_prompts(cls, file_path: str = "app/prompts/prompts.yaml"):
-        """Load prompts from a YAML file."""
-        abs_path = os.path.abspath(file_path)
+    def load_prompts(cls, file_path: Optional[str] = None):
+        """Load prompts from a YAML file (prompts.yaml in the package by default)."""
+        abs_path = os.path.abspath(file_path or DEFAULT_PROMPTS_FILE)
         if not os.path.exists(abs_path):
             raise FileNotFoundError(f"Prompts file not found at {abs_path}")
-            
-        with open(abs_path, "r") as f:
-            cls._prompts = yaml.safe_load(f)
+
+        with cls._lock:
+            mtime = os.stat(abs_path).st_mtime_ns
+            with open(abs_path, "r", encoding="utf-8") as f:
+                prompts = yaml.safe_load(f) or {}
+            compiled = {key: CompiledPrompt.compile(str(source)) for key, source in prompts.items()}
+            # Readers only ever see the old or the new set of prompts
+            cls._compiled = compiled
+            cls._prompts = prompts
+            cls._path, cls._mtime = abs_path, mtime
 
     @classmethod
     def get_prompt(cls, key: str, **kwargs: Any) -> str:
         """Get a prompt by key and render it with provided variables."""
+        return cls._get(key).render(**kwargs)
+
+    @classmethod
+    def get_static_prefix(cls, key: str) -> str:
+        """
+        Returns the part of a prompt that does not depend on its variables.
+        Every rendering of the prompt starts with exactly this string.
+        """
+        return cls._get(key).static_prefix
+
+    @classmethod
+    def _get(cls, key: str) -> CompiledPrompt:
         if not cls._prompts:
             cls.load_prompts()
-            
-        if key not in cls._prompts:
+        else:
+            cls._reload_if_changed()
+
+        prompt = cls._compiled.get(key)
+        if prompt is None:
             raise KeyError(f"Prompt key '{key}' not found.")
-            
-        template = Template(cls._prompts[key])
-        return template.render(**kwargs)
+        return prompt
+
+    @classmethod
+    def _reload_if_changed(cls):
+        try:
+            mtime = os.stat(cls._path).st_mtime_ns
+        except (OSError, TypeError):
+            return
+        if mtime == cls._mtime:
+            return
+        try:
+            cls.load_prompts(cls._path)
+            logger.info(f"Reloaded prompts from {cls._path}")
+        except Exception as e:
+            logger.error(f"Error reloading prompts, keeping the previous ones: {e}")
+            # Do not retry on every call until the file changes again
+            cls._mtime = mtime
@@ -0,0 +1,84 @@
+import logging
+import random
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Google reports some quota errors as 403 with one of these reasons
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Returns True if a Google API error is transient (rate limit or server error).
+    """
+    if not isinstance(error, HttpError):
+        return False
+    status = error.resp.status
+    if status in RETRYABLE_STATUSES:
+        return True
+    if status == 403:
+        details = f"{error.error_details} {error.reason}"
+        return any(reason in details for reason in RATE_LIMIT_REASONS)
+    return False
+
+def backoff_delay(attempt: int, base: float = None, cap: float = None) -> float:
+    """
+    Returns a "full jitter" exponential backoff delay for a retry attempt.
+
+    Args:
+        attempt: The retry number, starting at 1.
+        base: Delay in seconds for the first retry. Defaults to config.RETRY_BASE_DELAY.
+        cap: Upper bound in seconds. Defaults to config.RETRY_MAX_DELAY.
+
+    Returns:
+        float: Seconds to wait, uniformly drawn from [0, min(cap, base * 2^(attempt-1))].
+    """
+    base = config.RETRY_BASE_DELAY if base is None else base
+    cap = config.RETRY_MAX_DELAY if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+def sleep_before_retry(attempt: int) -> float:
+    """Sleeps for the backoff delay of a retry attempt and returns the delay."""
+    delay = backoff_delay(attempt)
+    logger.info(f"Retry {attempt}: backing off for {delay:.2f}s")
+    time.sleep(delay)
+    return delay
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Tokens refill continuously at `rate` per second up
+    to `capacity`; acquire() blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Takes `tokens` from the bucket, waiting for a refill if necessary.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
@@ -0,0 +1,234 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+AGENTS = ("calendar", "email")
+
+@dataclass
+class RouteDecision:
+    """Where the router would send a request; agent is None for the supervisor."""
+    agent: Optional[str]
+    confidence: float
+    reason: str
+
+@dataclass
+class Rule:
+    agent: str
+    name: str
+    pattern: re.Pattern
+    confidence: float
+
+class Classifier(Protocol):
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Returns the most likely label ('calendar', 'email' or 'other') and its probability."""
+        ...
+
+def _tokens(text: str) -> List[str]:
+    text = re.sub(r"[^@\s]+@[^@\s]+\.\w+", " __address__ ", text.lower())
+    text = re.sub(r"\b\d{1,2}(:\d{2})?\s*(am|pm)\b", " __time__ ", text)
+    return re.findall(r"[a-z_0-9']+", text)
+
+# Seed examples for the built-in classifier; 'other' covers chit-chat and mixed requests
+SEED_EXAMPLES: Dict[str, List[str]] = {
+    "calendar": [
+        "what's on my calendar tomorrow",
+        "what do I have on friday",
+        "show my meetings next week",
+        "schedule a meeting with the design team on tuesday at 2pm",
+        "book a call with ana at 10am",
+        "am I free on thursday afternoon",
+        "find a time for a sync with the team next week",
+        "create an event for the dentist appointment",
+        "set up lunch with bob on monday",
+        "list my events for today",
+        "when is my next meeting",
+        "check my availability on wednesday",
+    ],
+    "email": [
+        "send an email to bob@example.com",
+        "email the team about the release",
+        "write an email to ana saying thanks",
+        "send a reminder to the client",
+        "draft a message to hr about my leave",
+        "compose an email with the meeting notes",
+        "send a thank you note to the interviewers",
+        "mail alice@example.com the report",
+        "notify everyone that the office is closed",
+        "send a follow up to the vendor",
+    ],
+    "other": [
+        "hello",
+        "hi there",
+        "thanks",
+        "what can you do",
+        "who are you",
+        "help",
+        "how are you",
+        "tell me a joke",
+        "good morning",
+        "what is the weather like",
+    ],
+}
+
+class NaiveBayesClassifier:
+    """
+    Multinomial naive Bayes over word tokens, trained on a handful of examples.
+
+    Small and fast enough to run on every message; it is a second opinion on
+    the rules rather than a router on its own.
+    """
+
+    def __init__(self, examples: Optional[Dict[str, List[str]]] = None):
+        examples = examples or SEED_EXAMPLES
+        total = sum(len(texts) for texts in examples.values())
+        self.priors = {label: math.log(len(texts) / total) for label, texts in examples.items()}
+        self.counts = {label: Counter(t for text in texts for t in _tokens(text)) for label, texts in examples.items()}
+        self.totals = {label: sum(counts.values()) for label, counts in self.counts.items()}
+        self.vocabulary = set().union(*self.counts.values())
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        tokens = [t for t in _tokens(text) if t in self.vocabulary]
+        scores = {}
+        for label, prior in self.priors.items():
+            denominator = self.totals[label] + len(self.vocabulary)
+            scores[label] = prior + sum(math.log((self.counts[label][t] + 1) / denominator) for t in tokens)
+        best = max(scores, key=scores.get)
+        norm = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1 / norm
+
+_OPTIONAL_PLEASE = r"^(?:please\s+|can you\s+|could you\s+)?"
+
+DEFAULT_RULES = [
+    Rule("calendar", "agenda_query", re.compile(
+        r"^(?:what'?s|what is|what do i have|do i have|show|list|anything)\b.*\b(?:calendar|schedule|agenda|meetings?|events?|appointments?)\b", re.I), 0.95),
+    Rule("calendar", "schedule_command", re.compile(
+        _OPTIONAL_PLEASE + r"(?:schedule|book|set up|create|add|put)\b.*\b(?:meeting|call|event|appointment|lunch|dinner|sync|1:1|one-on-one|standup|review|interview)s?\b", re.I), 0.9),
+    Rule("calendar", "availability", re.compile(
+        r"\b(?:am i|are we|are they|is \w+) (?:free|busy|available)\b|\bfind (?:a |some )?(?:time|slot)s?\b", re.I), 0.9),
+    Rule("email", "send_command", re.compile(
+        _OPTIONAL_PLEASE + r"(?:send|write|draft|compose)\b.*\b(?:e-?mail|message|note|reminder)s?\b", re.I), 0.9),
+    Rule("email", "email_address", re.compile(
+        _OPTIONAL_PLEASE + r"(?:e-?mail|send|write to|message|mail)\b.*[^@\s]+@[^@\s]+\.\w+", re.I), 0.95),
+]
+
+# Requests touching both agents are left to the supervisor, which can run them in parallel
+_CALENDAR_WORDS = re.compile(r"\b(?:schedule|reschedule|book|calendar|agenda|free|busy|available|availability|cancel)\b", re.I)
+_EMAIL_WORDS = re.compile(r"\b(?:e-?mail|send|mail|notify|reply|inbox)\b", re.I)
+# References to earlier turns need the supervisor's conversation to be resolved
+_REFERENCES = re.compile(r"\b(?:it|them|they|him|her|he|she|those|that one|this one|the same|again|above|previous)\b", re.I)
+
+# Classifier-only decisions stay below the default threshold, so by default
+# a request is routed only when a rule matches and the classifier agrees
+CLASSIFIER_ONLY_CAP = 0.8
+
+class IntentRouter:
+    """
+    Deterministic intent pre-router in front of the supervisor.
+
+    Compiled rules propose a sub-agent and a confidence, and a local
+    classifier has to agree. Mixed requests, references to earlier turns
+    and anything below `threshold` go to the supervisor model. Decisions are
+    logged (as JSON lines to `log_path`, if set) together with what the
+    supervisor chose for requests it handled, so the rules and threshold can
+    be tuned against its choices.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        rules: Optional[List[Rule]] = None,
+        classifier: Optional[Classifier] = None,
+        enabled: Optional[bool] = None,
+        log_path: Optional[str] = None,
+    ):
+        self.threshold = config.ROUTER_CONFIDENCE_THRESHOLD if threshold is None else threshold
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.classifier = classifier or NaiveBayesClassifier()
+        self.enabled = config.ROUTER_ENABLED if enabled is None else enabled
+        self.log_path = config.ROUTER_LOG_PATH if log_path is None else log_path
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.fallbacks = 0
+        self.compared = 0
+        self.agreed = 0
+        self.errors = 0
+
+    def route(self, text: str) -> RouteDecision:
+        if not text.strip():
+            return RouteDecision(None, 0.0, "empty")
+        if _CALENDAR_WORDS.search(text) and _EMAIL_WORDS.search(text):
+            return RouteDecision(None, 0.0, "mixed intent")
+        if _REFERENCES.search(text):
+            return RouteDecision(None, 0.0, "refers to earlier turns")
+
+        label, probability = self.classifier.predict(text)
+        matches = [rule for rule in self.rules if rule.pattern.search(text)]
+        if not matches:
+            agent = label if label in AGENTS else None
+            return RouteDecision(agent, min(probability, CLASSIFIER_ONLY_CAP) if agent else 0.0, f"classifier:{label}")
+
+        rule = max(matches, key=lambda r: r.confidence)
+        if any(other.agent != rule.agent for other in matches):
+            return RouteDecision(None, 0.0, "rules disagree")
+        if label != rule.agent:
+            return RouteDecision(rule.agent, rule.confidence * (1 - probability), f"rule:{rule.name}, classifier:{label}")
+        return RouteDecision(rule.agent, rule.confidence, f"rule:{rule.name}")
+
+    def should_route(self, decision: RouteDecision) -> bool:
+        return self.enabled and decision.agent is not None and decision.confidence >= self.threshold
+
+    def record(self, text: str, decision: RouteDecision, routed: bool, actual: Optional[str] = None, outcome: Optional[str] = None):
+        """
+        Records a decision. For requests the supervisor handled, `actual` is the
+        sub-agent it chose ('calendar', 'email', 'mixed' or None).
+        """
+        entry: Dict[str, Any] = {
+            "ts": round(time.time(), 3),
+            "text": text[:200],
+            "agent": decision.agent,
+            "confidence": round(decision.confidence, 3),
+            "reason": decision.reason,
+            "routed": routed,
+        }
+        with self._lock:
+            if routed:
+                self.routed += 1
+                self.errors += outcome == "error"
+                entry["outcome"] = outcome
+            else:
+                self.fallbacks += 1
+                self.compared += 1
+                # Deferring a mixed request to the supervisor is the right call
+                self.agreed += decision.agent == actual or (decision.agent is None and actual == "mixed")
+                entry["actual"] = actual
+            if self.log_path:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(entry) + "\n")
+                except OSError as e:
+                    logger.error(f"Error writing routing log: {e}")
+        logger.info(f"Routing {'->' if routed else 'fallback'} {decision.agent} ({decision.confidence:.2f}, {decision.reason})")
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns routing counts and how often the router agreed with the supervisor."""
+        with self._lock:
+            total = self.routed + self.fallbacks
+            return {
+                "routed": self.routed,
+                "fallbacks": self.fallbacks,
+                "route_rate": self.routed / total if total else 0.0,
+                "routed_errors": self.errors,
+                "agreement": self.agreed / self.compared if self.compared else 0.0,
+            }
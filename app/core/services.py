@@ -0,0 +1,109 @@
+import json
+import logging
+import threading
+from typing import Any, Dict, Tuple
+
+import httplib2
+import google_auth_httplib2
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+from app.core.auth import authenticate_google_services
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+class ServiceRegistry:
+    """
+    Process-wide registry of long-lived Google API service clients.
+
+    Credentials are resolved once per credential source and discovery documents
+    are parsed once per API. Service clients are cached per thread because the
+    underlying httplib2 transport is not thread-safe; each one keeps its HTTP
+    connections alive between calls.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._credentials: Dict[str, Any] = {}
+        self._documents: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, api: str, version: str, credentials_key: str = None) -> Any:
+        """
+        Returns a service client for the given API, building it on first use.
+
+        Args:
+            api: The API name (e.g. "calendar").
+            version: The API version (e.g. "v3").
+            credentials_key: Identifies the credential source. Defaults to the token file.
+
+        Returns:
+            The Google API service resource for the calling thread.
+        """
+        credentials_key = credentials_key or config.TOKEN_FILE
+        key = (api, version, credentials_key)
+
+        clients = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = {}
+
+        service = clients.get(key)
+        if service is not None:
+            with self._lock:
+                self.hits += 1
+            return service
+
+        with self._lock:
+            self.misses += 1
+
+        creds = self._get_credentials(credentials_key)
+        http = google_auth_httplib2.AuthorizedHttp(
+            creds, http=httplib2.Http(timeout=config.HTTP_TIMEOUT)
+        )
+        service = build_from_document(self._get_document(api, version), http=http)
+        clients[key] = service
+        logger.info(f"Built {api} {version} service client for thread {threading.current_thread().name}")
+        return service
+
+    def _get_credentials(self, credentials_key: str) -> Any:
+        with self._lock:
+            creds = self._credentials.get(credentials_key)
+            if creds is None:
+                creds = authenticate_google_services()
+                self._credentials[credentials_key] = creds
+            return creds
+
+    def _get_document(self, api: str, version: str) -> Dict[str, Any]:
+        with self._lock:
+            document = self._documents.get((api, version))
+            if document is None:
+                raw = discovery_cache.get_static_doc(api, version)
+                if raw is None:
+                    raise RuntimeError(f"No discovery document available for {api} {version}")
+                document = json.loads(raw)
+                self._documents[(api, version)] = document
+            return document
+
+    def clear(self):
+        """
+        Drops cached credentials and discovery documents so the next call rebuilds.
+        Clients already cached by other threads are replaced lazily.
+        """
+        with self._lock:
+            self._credentials.clear()
+            self._documents.clear()
+        self._local = threading.local()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss counters for verifying client reuse."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "credentials": len(self._credentials),
+            }
+
+service_registry = ServiceRegistry()
@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import config
+from app.core.context import AgentContext
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Session:
+    """A conversation served by the SessionManager."""
+    context: AgentContext
+    last_used: float = field(default_factory=time.monotonic)
+    # Turns queued or running
+    active: int = 0
+    # Turns waiting for the running one, in the order they were submitted
+    waiting: Deque[Tuple[str, Future]] = field(default_factory=deque)
+
+class SessionManager:
+    """
+    Serves many conversations with one agent.
+
+    Each session has its own checkpoint thread (its session_id), so the shared
+    agent graphs never mix conversations. Turns run on a bounded worker pool;
+    turns of the same session run one at a time, in the order they were
+    submitted, while different sessions run in parallel. Only the next turn
+    of a session is handed to the pool, so waiting turns never hold a worker. Sessions idle for longer than
+    `idle_timeout` are evicted together with their history, and the least
+    recently used idle session is evicted when `max_sessions` is reached.
+    Only sessions with no turn queued or running are ever ended.
+    """
+
+    def __init__(
+        self,
+        agent: Any,
+        max_workers: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        max_sessions: Optional[int] = None,
+    ):
+        self.agent = agent
+        self.idle_timeout = config.SESSION_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.max_sessions = max_sessions or config.SESSION_MAX_COUNT
+        self.max_workers = max_workers or config.SESSION_MAX_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="session")
+        self._sessions: Dict[str, Session] = {}
+        # Ids of ended sessions whose history is still being deleted
+        self._closing: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+        self.evictions = 0
+
+    def start(self):
+        """Starts the background thread that evicts idle sessions."""
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap, name="session-reaper", daemon=True)
+            self._reaper.start()
+
+    def submit(self, session_id: Optional[str], message: str, user_name: str = "User", time_zone: Optional[str] = None) -> Tuple[str, Future]:
+        """
+        Queues a user message for a session, creating the session if needed.
+
+        Returns:
+            The session id and a future resolving to the agent's response.
+        """
+        session_id = session_id or uuid.uuid4().hex
+        future = Future()
+        self._enqueue(session_id, user_name, time_zone, message, future)
+        return session_id, future
+
+    def chat(
+        self, session_id: Optional[str], message: str, user_name: str = "User", timeout: Optional[float] = None, time_zone: Optional[str] = None,
+    ) -> Tuple[str, Any]:
+        """Like submit(), but waits for the response."""
+        session_id, future = self.submit(session_id, message, user_name, time_zone)
+        return session_id, future.result(timeout=timeout)
+
+    def end(self, session_id: str) -> bool:
+        """
+        Ends a session and drops its history. Returns False if it does not exist.
+
+        Raises:
+            RuntimeError: If a turn of the session is queued or running.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            if session.active:
+                raise RuntimeError(f"Session {session_id} has a turn queued or running")
+            self._detach(session_id)
+        self._drop_history([session_id])
+        return True
+
+    def evict_idle(self) -> int:
+        """Ends every session that has been idle for longer than the timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items() if s.active == 0 and s.last_used < cutoff]
+            for sid in idle:
+                self._detach(sid)
+            self.evictions += len(idle)
+        self._drop_history(idle)
+        if idle:
+            logger.info(f"Evicted {len(idle)} idle session(s)")
+        return len(idle)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "active": sum(1 for s in self._sessions.values() if s.active),
+                "workers": self.max_workers,
+                "evictions": self.evictions,
+            }
+
+    def shutdown(self):
+        self._stopped.set()
+        self._executor.shutdown(wait=True)
+
+    def _enqueue(self, session_id: str, user_name: str, time_zone: Optional[str], message: str, future: Future):
+        while True:
+            overflow = None
+            with self._lock:
+                closing = self._closing.get(session_id)
+                if closing is None:
+                    session = self._sessions.get(session_id)
+                    if session is None:
+                        session = Session(context=AgentContext(user_name=user_name, session_id=session_id, time_zone=time_zone))
+                        self._sessions[session_id] = session
+                        if len(self._sessions) > self.max_sessions:
+                            idle = [(s.last_used, sid) for sid, s in self._sessions.items() if s.active == 0 and sid != session_id]
+                            if idle:
+                                overflow = min(idle)[1]
+                                self._detach(overflow)
+                                self.evictions += 1
+                    session.active += 1
+                    session.last_used = time.monotonic()
+                    session.waiting.append((message, future))
+                    if session.active == 1:
+                        self._start_next(session)
+                    break
+            # The id was just ended; start afresh once its old history is gone
+            closing.wait()
+        if overflow:
+            logger.info(f"Session limit reached, evicted least recently used session {overflow}")
+            self._drop_history([overflow])
+
+    def _start_next(self, session: Session):
+        """Hands the session's next waiting turn to the pool. Callers hold self._lock."""
+        message, future = session.waiting.popleft()
+        try:
+            self._executor.submit(self._run, session, message, future)
+        except RuntimeError as e:
+            # The pool is shut down; nothing queued for the session can run
+            futures = [future] + [waiting for _, waiting in session.waiting]
+            session.waiting.clear()
+            session.active -= len(futures)
+            for waiting in futures:
+                if not waiting.cancelled():
+                    waiting.set_exception(e)
+
+    def _detach(self, session_id: str):
+        """Removes an idle session; its id is blocked until _drop_history. Callers hold self._lock."""
+        del self._sessions[session_id]
+        self._closing[session_id] = threading.Event()
+
+    def _drop_history(self, session_ids: List[str]):
+        for session_id in session_ids:
+            try:
+                self.agent.end_session(session_id)
+            except Exception as e:
+                logger.error(f"Error deleting the history of session {session_id}: {e}")
+            finally:
+                with self._lock:
+                    self._closing.pop(session_id).set()
+
+    def _run(self, session: Session, message: str, future: Future):
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self.agent.chat(message, context=session.context))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                session.active -= 1
+                session.last_used = time.monotonic()
+                if session.waiting:
+                    self._start_next(session)
+
+    def _reap(self):
+        interval = max(min(self.idle_timeout / 4, 60), 1)
+        while not self._stopped.wait(interval):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.error(f"Error evicting idle sessions: {e}")
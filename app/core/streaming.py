@@ -0,0 +1,235 @@
+import contextvars
+import logging
+import queue
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Generator, Iterable, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tracers.context import register_configure_hook
+from rich.panel import Panel
+
+from app.core.utils import console, quiet_output
+
+logger = logging.getLogger(__name__)
+
+# LangGraph stream modes behind the events: model tokens plus node updates
+STREAM_MODES = ["messages", "updates"]
+
+@dataclass
+class StreamEvent:
+    """Base class of the events yielded by BaseAgent.stream(); `agent` is who produced it."""
+    agent: str
+
+@dataclass
+class Token(StreamEvent):
+    text: str
+
+@dataclass
+class ToolCallStart(StreamEvent):
+    name: str
+    args: Dict[str, Any]
+    call_id: str
+
+@dataclass
+class ToolCallEnd(StreamEvent):
+    name: str
+    call_id: str
+    output: str
+    ok: bool = True
+
+@dataclass
+class Interrupt(StreamEvent):
+    """The run stopped for human approval; `value` is what chat() would return."""
+    value: Any
+
+@dataclass
+class Done(StreamEvent):
+    """Always the last event; `response` is what chat() would return."""
+    response: Any
+
+def _text(message: Any) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+@dataclass
+class EventTranslator:
+    """Turns (mode, data) items of a LangGraph stream into typed events."""
+    agent: str
+    default: str
+    interrupted: bool = False
+    messages: List[Any] = field(default_factory=list)
+
+    def feed(self, mode: str, data: Any) -> List[StreamEvent]:
+        if mode == "messages":
+            message, metadata = data
+            # Skip other model calls, e.g. history summaries made in middleware
+            if isinstance(message, AIMessage) and metadata.get("langgraph_node") == "model":
+                text = _text(message)
+                if text:
+                    return [Token(agent=metadata.get("lc_agent_name") or self.agent, text=text)]
+            return []
+
+        if "__interrupt__" in data:
+            self.interrupted = True
+            return [Interrupt(agent=self.agent, value=data["__interrupt__"])]
+        events: List[StreamEvent] = []
+        for update in data.values():
+            if not update or not isinstance(update, dict) or "messages" not in update:
+                continue
+            for message in update["messages"]:
+                self.messages.append(message)
+                if isinstance(message, AIMessage):
+                    events += [ToolCallStart(agent=self.agent, name=call["name"], args=call["args"], call_id=call["id"]) for call in message.tool_calls]
+                elif isinstance(message, ToolMessage):
+                    events.append(ToolCallEnd(
+                        agent=self.agent, name=message.name or "", call_id=message.tool_call_id,
+                        output=str(message.content), ok=message.status != "error",
+                    ))
+        return events
+
+    def done(self, interrupt_value: Any = None) -> Done:
+        if self.interrupted:
+            return Done(agent=self.agent, response=interrupt_value)
+        last_ai_message = next((m for m in reversed(self.messages) if m.type == "ai"), None)
+        return Done(agent=self.agent, response=last_ai_message.content if last_ai_message else self.default)
+
+def graph_events(stream: Iterator[Any], agent: str, default: str) -> Iterator[StreamEvent]:
+    """Yields typed events from a graph stream run with STREAM_MODES, ending with Done."""
+    translator = EventTranslator(agent, default)
+    try:
+        for mode, data in stream:
+            events = translator.feed(mode, data)
+            yield from events
+            if translator.interrupted:
+                yield translator.done(events[-1].value)
+                return
+    except Exception as e:
+        logger.error(f"Error during streaming: {e}")
+        yield Done(agent=agent, response=f"An error occurred: {e}")
+        return
+    yield translator.done()
+
+async def agraph_events(stream: AsyncIterator[Any], agent: str, default: str) -> AsyncIterator[StreamEvent]:
+    """Async variant of graph_events()."""
+    translator = EventTranslator(agent, default)
+    try:
+        async for mode, data in stream:
+            events = translator.feed(mode, data)
+            for event in events:
+                yield event
+            if translator.interrupted:
+                yield translator.done(events[-1].value)
+                return
+    except Exception as e:
+        logger.error(f"Error during streaming: {e}")
+        yield Done(agent=agent, response=f"An error occurred: {e}")
+        return
+    yield translator.done()
+
+class _TokenHandler(BaseCallbackHandler):
+    """
+    Forwards agent model tokens to a sink. Its tap_output_* methods make it a
+    streaming handler, so models stream even when called with invoke().
+    """
+
+    def __init__(self, sink: Callable[[StreamEvent], None], agent: str):
+        self.sink = sink
+        self.agent = agent
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, *, run_id: UUID, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any):
+        self._runs[run_id] = metadata or {}
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any):
+        metadata = self._runs.get(run_id, {})
+        if token and metadata.get("langgraph_node") == "model":
+            self.sink(Token(agent=metadata.get("lc_agent_name") or self.agent, text=token))
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any):
+        self._runs.pop(run_id, None)
+
+    def tap_output_iter(self, run_id: UUID, output: Iterator[Any]) -> Iterator[Any]:
+        return output
+
+    def tap_output_aiter(self, run_id: UUID, output: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        return output
+
+_token_handler: ContextVar[Optional[_TokenHandler]] = ContextVar("stream_token_handler", default=None)
+register_configure_hook(_token_handler, inheritable=True)
+
+def stream_call(fn: Callable[..., Any], *args: Any, agent: str = "agent", **kwargs: Any) -> Generator[StreamEvent, None, Any]:
+    """
+    Runs a blocking call that invokes agents outside of a streamed graph (e.g.
+    a sub-agent called directly) and yields the tokens of their models as they
+    are produced. Agents stay quiet on the console meanwhile.
+
+    Usage:
+        result = yield from stream_call(agent.invoke, "request")
+    """
+    events: "queue.Queue[Any]" = queue.Queue()
+    finished = object()
+    outcome: Dict[str, Any] = {}
+
+    def run():
+        try:
+            with quiet_output():
+                outcome["result"] = fn(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            events.put(finished)
+
+    context = contextvars.copy_context()
+    context.run(_token_handler.set, _TokenHandler(events.put, agent))
+    threading.Thread(target=context.run, args=(run,), name="stream-call", daemon=True).start()
+    while (event := events.get()) is not finished:
+        yield event
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+def render_events(events: Iterable[StreamEvent]) -> Any:
+    """
+    Prints events on the console as they arrive: tokens inline, prefixed with
+    the agent producing them, tool calls as one-line markers.
+
+    Returns:
+        The final response (the Done event's).
+    """
+    speaker = None
+    streamed = ""
+    for event in events:
+        if isinstance(event, Token):
+            if event.agent != speaker:
+                console.print(("\n" if speaker else "") + f"[bold blue]🤖 {event.agent.title()}:[/] ", end="")
+                speaker, streamed = event.agent, ""
+            console.print(event.text, end="", markup=False, highlight=False)
+            streamed += event.text
+            continue
+
+        if speaker:
+            console.print()
+            speaker = None
+        if isinstance(event, ToolCallStart):
+            args = ", ".join(f"{k}={v!r}" for k, v in event.args.items())
+            console.print(f"[bold cyan]🔧 {event.name}[/][dim]({args})[/]", highlight=False)
+        elif isinstance(event, ToolCallEnd):
+            mark = "[green]✓[/]" if event.ok else "[red]✗[/]"
+            console.print(f"{mark} [dim]{event.name} finished[/]")
+        elif isinstance(event, Interrupt):
+            items = event.value if isinstance(event.value, (list, tuple)) else [event.value]
+            for item in items:
+                for action in (getattr(item, "value", None) or {}).get("action_requests", []):
+                    console.print(Panel(f"{action.get('name')}: {action.get('args')}", title="[bold yellow]Approval required[/]", border_style="yellow"))
+        elif isinstance(event, Done):
+            # Answers that were not streamed token by token (e.g. locally resolved approvals)
+            if isinstance(event.response, str) and event.response.strip() and event.response.strip() != streamed.strip():
+                console.print(Panel(event.response, title="[bold blue]🤖 Assistant Message[/]", border_style="blue"))
+            return event.response
+    return None
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+class TaskThreads:
+    """
+    Hands out short-lived checkpoint threads for sub-agent tasks.
+
+    Each delegated task runs in a fresh thread that is deleted once the task
+    is done, so a sub-agent's prompt only holds the current task no matter
+    how long the session is. A task that stops for approval keeps its thread
+    as the session's pending thread until it is resolved, together with the
+    action it wants to take (tool name and args), which can be edited locally
+    before it is approved.
+
+    With `carry_summary`, a compact line per finished task is kept (at most
+    `summary_tasks` per session and agent) and prepended to the next task.
+
+    With `path`, pending threads and actions are also written to a SQLite
+    file and reloaded on start, so an approval that was waiting when the
+    process stopped can still be resolved against the (persistent) sub-agent
+    checkpoint after a restart.
+    """
+
+    def __init__(self, ephemeral: Optional[bool] = None, carry_summary: Optional[bool] = None, summary_tasks: Optional[int] = None, path: Optional[str] = None):
+        self.ephemeral = config.SUBAGENT_EPHEMERAL_THREADS if ephemeral is None else ephemeral
+        self.carry_summary = config.SUBAGENT_CARRY_SUMMARY if carry_summary is None else carry_summary
+        self.summary_tasks = summary_tasks or config.SUBAGENT_SUMMARY_TASKS
+        self._pending: Dict[Tuple[str, str], str] = {}
+        self._actions: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._summaries: Dict[Tuple[str, str], Deque[str]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._open(path)
+
+    def _open(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending ("
+            "session_id TEXT NOT NULL, agent_name TEXT NOT NULL, thread_id TEXT NOT NULL, action TEXT, "
+            "PRIMARY KEY (session_id, agent_name))"
+        )
+        for session_id, agent_name, thread_id, action in self._conn.execute("SELECT * FROM pending"):
+            self._pending[(session_id, agent_name)] = thread_id
+            if action is not None:
+                self._actions[(session_id, agent_name)] = json.loads(action)
+        if self._pending:
+            logger.info(f"Restored {len(self._pending)} pending approval(s) from {path}")
+
+    def _save(self, key: Tuple[str, str]):
+        """Writes the pending state of `key` through to the database. Callers hold the lock."""
+        if self._conn is None:
+            return
+        thread_id = self._pending.get(key)
+        if thread_id is None:
+            self._conn.execute("DELETE FROM pending WHERE session_id = ? AND agent_name = ?", key)
+            return
+        action = self._actions.get(key)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO pending VALUES (?, ?, ?, ?)",
+            (*key, thread_id, None if action is None else json.dumps(action, default=str)),
+        )
+
+    def start(self, session_id: str, agent_name: str) -> str:
+        """Returns the thread id for a new task."""
+        if not self.ephemeral:
+            return session_id
+        return f"{session_id}:{agent_name}:{uuid.uuid4().hex[:12]}"
+
+    def is_ephemeral(self, thread_id: str, session_id: str) -> bool:
+        return thread_id != session_id
+
+    def pending(self, session_id: str, agent_name: str) -> Optional[str]:
+        """Returns the thread of the session's task that is waiting for approval, if any."""
+        with self._lock:
+            return self._pending.get((session_id, agent_name))
+
+    def set_pending(self, session_id: str, agent_name: str, thread_id: str, action: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Marks a thread as waiting for approval of `action`.
+
+        Returns:
+            The previously pending thread it replaces, if any.
+        """
+        with self._lock:
+            previous = self._pending.get((session_id, agent_name))
+            self._pending[(session_id, agent_name)] = thread_id
+            if action is None:
+                self._actions.pop((session_id, agent_name), None)
+            else:
+                self._actions[(session_id, agent_name)] = action
+            self._save((session_id, agent_name))
+        return previous if previous != thread_id else None
+
+    def pending_action(self, session_id: str, agent_name: str) -> Optional[Dict[str, Any]]:
+        """Returns the action waiting for approval, with any local edits applied."""
+        with self._lock:
+            return self._actions.get((session_id, agent_name))
+
+    def edit_pending_action(self, session_id: str, agent_name: str, args: Dict[str, Any]):
+        """Replaces the args of the action waiting for approval and marks it as edited."""
+        with self._lock:
+            action = self._actions.get((session_id, agent_name))
+            if action is not None:
+                self._actions[(session_id, agent_name)] = dict(action, args=args, edited=True)
+                self._save((session_id, agent_name))
+
+    def clear_pending(self, session_id: str, agent_name: str) -> Optional[str]:
+        with self._lock:
+            self._actions.pop((session_id, agent_name), None)
+            thread_id = self._pending.pop((session_id, agent_name), None)
+            self._save((session_id, agent_name))
+            return thread_id
+
+    def with_summary(self, session_id: str, agent_name: str, request: str) -> str:
+        """Prepends the summary of earlier tasks to a request, when enabled."""
+        if not self.carry_summary:
+            return request
+        with self._lock:
+            lines = list(self._summaries.get((session_id, agent_name), ()))
+        if not lines:
+            return request
+        return "Earlier tasks in this conversation:\n" + "\n".join(lines) + f"\n\nCurrent task: {request}"
+
+    def record(self, session_id: str, agent_name: str, request: str, result: str):
+        """Remembers a one-line summary of a finished task, when enabled."""
+        if not self.carry_summary:
+            return
+        outcome = " ".join(str(result).split())
+        line = f"- {_shorten(request, 120)} -> {_shorten(outcome, 200)}"
+        with self._lock:
+            self._summaries.setdefault((session_id, agent_name), deque(maxlen=self.summary_tasks)).append(line)
+
+    def end_session(self, session_id: str) -> List[Tuple[str, str]]:
+        """Forgets a session and returns its pending (agent_name, thread_id) pairs."""
+        with self._lock:
+            for key in [k for k in self._summaries if k[0] == session_id]:
+                del self._summaries[key]
+            for key in [k for k in self._actions if k[0] == session_id]:
+                del self._actions[key]
+            keys = [k for k in self._pending if k[0] == session_id]
+            ended = [(k[1], self._pending.pop(k)) for k in keys]
+            for key in keys:
+                self._save(key)
+            return ended
+
+def _shorten(text: str, width: int) -> str:
+    return text if len(text) <= width else text[:width - 3] + "..."
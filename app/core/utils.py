@@ -1,20 +1,27 @@
-from dateutil import parser
-from datetime import datetime
+from datetime import datetime, tzinfo
+import contextvars
 import logging
-from langchain_core.messages import AIMessage, ToolMessage
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterable, Iterator, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
+from app.core.config import config
+from app.core.datetimes import parse_datetime
 
 logger = logging.getLogger(__name__)
 
-def format_dt(dt_str: str) -> str:
+def format_dt(dt_str: str, tz: Optional[tzinfo] = None) -> str:
     """
     Parses a datetime string and ensures it is in RFC3339 format with a timezone.
-    If naive, assumes local system time.
+    If naive, assumes `tz`, or local system time when it is not given.
     
     Args:
         dt_str: The datetime string to parse.
+        tz: The time zone of naive datetimes (see localize).
         
     Returns:
         str: The ISO 8601 formatted datetime string.
@@ -23,21 +30,114 @@ def format_dt(dt_str: str) -> str:
         ValueError: If the datetime string is invalid.
     """
     try:
-        dt = parser.parse(dt_str)
-        if dt.tzinfo is None:
-            # If naive, assume local time
-            dt = dt.astimezone()
-        return dt.isoformat()
+        dt = parse_datetime(dt_str)
+        return localize(dt, tz).isoformat()
     except Exception as e:
         logger.error(f"Error parsing datetime string '{dt_str}': {e}")
         raise ValueError(f"Invalid datetime format: {dt_str}. Error: {e}")
 
+def system_time_zone_name() -> Optional[str]:
+    """
+    Returns the IANA name of the system time zone, read from $TZ,
+    /etc/localtime or /etc/timezone, or None if it has none (e.g. on Windows).
+    """
+    candidates = [os.environ.get("TZ", "").lstrip(":")]
+    candidates.append(os.path.realpath("/etc/localtime").partition("/zoneinfo/")[2])
+    try:
+        with open("/etc/timezone", encoding="utf-8") as f:
+            candidates.append(f.read().strip())
+    except OSError:
+        pass
+    for name in candidates:
+        if name:
+            try:
+                return ZoneInfo(name).key
+            except (ZoneInfoNotFoundError, ValueError):
+                continue
+    return None
+
+def resolve_time_zone_name(name: Optional[str] = None) -> str:
+    """
+    Returns the IANA name of the named time zone, or the configured/system one.
+
+    Raises:
+        ValueError: If no name is given or configured and the system zone has none.
+    """
+    name = name or config.TIME_ZONE or system_time_zone_name()
+    if not name:
+        raise ValueError("Could not determine the local time zone; set TIME_ZONE (e.g. 'Europe/Berlin')")
+    return name
+
+def localize(dt: datetime, tz: Optional[tzinfo] = None) -> datetime:
+    """
+    Attaches a time zone to a naive datetime; aware datetimes are returned as is.
+
+    Only a ZoneInfo knows the right offset for every date. Any other zone
+    (e.g. the fixed offset used when the system zone has no IANA name) falls
+    back to the system's local rules, so dates across a DST change still get
+    their own offset.
+    """
+    if dt.tzinfo is not None:
+        return dt
+    if isinstance(tz, ZoneInfo):
+        return dt.replace(tzinfo=tz)
+    return dt.astimezone()
+
+def to_time_zone(dt: datetime, tz: Optional[tzinfo] = None) -> datetime:
+    """
+    Converts a datetime to `tz`. As in localize, any zone but a ZoneInfo
+    means the system's local rules.
+    """
+    return dt.astimezone(tz) if isinstance(tz, ZoneInfo) else dt.astimezone()
+
+def resolve_time_zone(name: Optional[str] = None) -> tzinfo:
+    """Returns the named time zone, or the configured/local one."""
+    name = name or config.TIME_ZONE or system_time_zone_name()
+    if name:
+        return ZoneInfo(name)
+    # No IANA name to go by; the current local offset
+    return datetime.now().astimezone().tzinfo
+
 console = Console()
 
+# Set while a caller renders the run itself, e.g. from streamed events
+_quiet: ContextVar[bool] = ContextVar("quiet_output", default=False)
+
+@contextmanager
+def quiet_output():
+    """Suppresses agent step panels and spinners printed in this context."""
+    token = _quiet.set(True)
+    try:
+        yield
+    finally:
+        _quiet.reset(token)
+
+def is_quiet() -> bool:
+    return _quiet.get()
+
+def quiet_iter(iterable: Iterable[Any]) -> Iterator[Any]:
+    """
+    Iterates with output suppressed while each item is produced, including in
+    threads started meanwhile, without affecting the caller between items.
+    """
+    context = contextvars.copy_context()
+    context.run(_quiet.set, True)
+    iterator = context.run(iter, iterable)
+    while True:
+        try:
+            item = context.run(next, iterator)
+        except StopIteration:
+            return
+        yield item
+
 def print_agent_step(message):
     """
     Prints the agent step details in a formatted way using rich.
     """
+    if is_quiet():
+        return
+    # Imported here so the console can be used before LangChain is loaded
+    from langchain_core.messages import AIMessage, ToolMessage
     if isinstance(message, AIMessage):
         if message.tool_calls:
             for tool_call in message.tool_calls:
@@ -58,3 +158,12 @@ def print_agent_step(message):
     elif isinstance(message, ToolMessage):
         content = Text(f"{message.content}", style="green")
         console.print(Panel(content, title=f"[bold green]🔧 Tool Output: {message.name}[/]", border_style="green"))
+
+def print_branch_timing(tool_name: str, seconds: float, ok: bool = True):
+    """
+    Prints how long one delegated tool call took.
+    """
+    if is_quiet():
+        return
+    status = "[green]done[/]" if ok else "[red]failed[/]"
+    console.print(f"[dim]⏱ {tool_name} {status} in {seconds:.2f}s[/]")
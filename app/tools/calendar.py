@@ -1,60 +1,131 @@
 from pydantic import BaseModel, Field
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta, tzinfo
+from typing import Iterator, Optional
+from zoneinfo import ZoneInfo
 import logging
-from dateutil import parser
-from googleapiclient.discovery import build
-from langchain.tools import tool
-from app.core.auth import authenticate_google_services
-from app.core.utils import format_dt
+from langchain.tools import tool, ToolRuntime
+from app.core.compaction import compact_events, compact_output, compact_slots
+from app.core.availability import find_slots, free_gaps, off_hours, rank_slots
+from app.core.event_store import get_event_store
+from app.core.ratelimit import is_retryable, sleep_before_retry
+from app.core.services import service_registry
+from app.core.datetimes import busy_arrays, epoch_seconds, parse_datetime
+from app.core.utils import format_dt, localize, resolve_time_zone, resolve_time_zone_name
+from app.core.concurrency import with_async
+from app.core.context import AgentContext, context_of
 from app.core.config import config
 
 logger = logging.getLogger(__name__)
 
 def get_calendar_service():
     """Returns an authenticated Google Calendar service resource."""
-    creds = authenticate_google_services()
-    service = build("calendar", "v3", credentials=creds)
-    return service
+    return service_registry.get("calendar", "v3")
+
+def _user_time_zone(runtime: Optional[ToolRuntime[AgentContext]]) -> Optional[str]:
+    """The time zone of the user the tool runs for, if the request carries one."""
+    return context_of(runtime).time_zone
+
+def _format_events(events: list, total: Optional[int] = None, tz: Optional[tzinfo] = None, session_id: str = "default") -> str:
+    """Formats events grouped by day in `tz`, within the tool output token budget."""
+    if not events:
+        return "No events found."
+    
+    # What the model used to receive: one 'start - summary' line per event
+    raw = "\n".join(
+        f"{event['start'].get('dateTime', event['start'].get('date'))} - {event.get('summary', 'No Title')}"
+        for event in events
+    )
+    lines = compact_events(events, tz)
+    if total is not None and total > len(events):
+        lines.append(f"(More events in this range were not listed; showing the first {len(events)}.)")
+        
+    return "\n".join(compact_output("list_events", raw, lines, session_id=session_id))
+
+# Partial-response mask: list_events only reads start and summary
+LIST_EVENTS_FIELDS = "items(start,summary),nextPageToken"
+
+def iter_events(
+    service,
+    time_min: str,
+    time_max: str,
+    max_events: Optional[int] = None,
+    fields: str = LIST_EVENTS_FIELDS,
+) -> Iterator[dict]:
+    """
+    Lazily yields events in a range, following nextPageToken one page at a time.
+
+    Args:
+        service: The Google Calendar service resource.
+        time_min: RFC3339 range start.
+        time_max: RFC3339 range end.
+        max_events: Stop after this many events. None means no cap.
+        fields: Partial-response field mask applied to every page.
+
+    Yields:
+        dict: Event resources in start time order.
+    """
+    page_token = None
+    remaining = max_events
+    while remaining is None or remaining > 0:
+        page_size = config.LIST_EVENTS_PAGE_SIZE if remaining is None else min(remaining, config.LIST_EVENTS_PAGE_SIZE)
+        response = service.events().list(
+            calendarId=config.CALENDAR_ID,
+            timeMin=time_min,
+            timeMax=time_max,
+            singleEvents=True,
+            orderBy="startTime",
+            maxResults=page_size,
+            pageToken=page_token,
+            fields=fields,
+        ).execute()
+        for event in response.get("items", []):
+            yield event
+            if remaining is not None:
+                remaining -= 1
+                if remaining == 0:
+                    return
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return
 
 class ListEventsInput(BaseModel):
     start_datetime: str = Field(description="ISO 8601 string for start time (e.g., '2024-01-01T09:00:00')")
     end_datetime: str = Field(description="ISO 8601 string for end time (e.g., '2024-01-01T17:00:00')")
+    max_events: Optional[int] = Field(default=None, ge=1, description="Maximum number of events to return. Omit to return all events in the range.")
 
+@with_async
 @tool(args_schema=ListEventsInput)
-def list_events(start_datetime: str, end_datetime: str) -> str:
+def list_events(start_datetime: str, end_datetime: str, max_events: Optional[int] = None, runtime: ToolRuntime[AgentContext] = None) -> str:
     """
     List events on the user's calendar within a specified date range.
     """
     logger.info(f"Listing events from {start_datetime} to {end_datetime}")
-    service = get_calendar_service()
     
     try:
-        time_min = format_dt(start_datetime)
-        time_max = format_dt(end_datetime)
+        tz = resolve_time_zone(_user_time_zone(runtime))
+        time_min = format_dt(start_datetime, tz)
+        time_max = format_dt(end_datetime, tz)
     except ValueError as e:
         return f"Error parsing dates: {e}"
     
     try:
-        events_result = service.events().list(
-            calendarId=config.CALENDAR_ID,
-            timeMin=time_min,
-            timeMax=time_max,
-            singleEvents=True,
-            orderBy="startTime"
-        ).execute()
+        # Answer from the local mirror when enabled and the range is covered
+        store = get_event_store(config.CALENDAR_ID, get_calendar_service)
+        if store is not None:
+            events = store.query(
+                epoch_seconds(time_min),
+                epoch_seconds(time_max),
+            )
+            if events is not None:
+                return _format_events(events[:max_events], len(events), tz, context_of(runtime).session_id)
         
-        events = events_result.get("items", [])
+        service = get_calendar_service()
+        # Fetch one extra event so we can tell whether the cap cut anything off
+        limit = max_events + 1 if max_events is not None else None
+        events = list(iter_events(service, time_min, time_max, max_events=limit))
         
-        if not events:
-            return "No events found."
-        
-        result = []
-        for event in events:
-            start = event["start"].get("dateTime", event["start"].get("date"))
-            summary = event.get("summary", "No Title")
-            result.append(f"{start} - {summary}")
-            
-        return "\n".join(result)
+        return _format_events(events[:max_events], len(events), tz, context_of(runtime).session_id)
     except Exception as e:
         logger.error(f"Error listing events: {e}")
         return f"Error listing events: {e}"
@@ -65,8 +136,27 @@ class CreateEventInput(BaseModel):
     end_datetime: str = Field(description="ISO 8601 string for end time")
     attendees: list[str] = Field(default=[], description="List of email addresses for attendees")
 
+def _event_body(title: str, start_datetime: str, end_datetime: str, attendees: list[str], tz: Optional[tzinfo] = None) -> dict:
+    """
+    Builds an events.insert body. Naive datetimes are in `tz`.
+
+    Raises:
+        ValueError: If either datetime string is invalid.
+    """
+    return {
+        "summary": title,
+        "start": {
+            "dateTime": format_dt(start_datetime, tz),
+        },
+        "end": {
+            "dateTime": format_dt(end_datetime, tz),
+        },
+        "attendees": [{"email": email} for email in attendees],
+    }
+
+@with_async
 @tool(args_schema=CreateEventInput)
-def create_event(title: str, start_datetime: str, end_datetime: str, attendees: list[str] = []) -> str:
+def create_event(title: str, start_datetime: str, end_datetime: str, attendees: list[str] = [], runtime: ToolRuntime[AgentContext] = None) -> str:
     """
     Create a new event on the user's calendar.
     """
@@ -74,39 +164,115 @@ def create_event(title: str, start_datetime: str, end_datetime: str, attendees:
     service = get_calendar_service()
     
     try:
-        start_dt = format_dt(start_datetime)
-        end_dt = format_dt(end_datetime)
+        tz = resolve_time_zone(_user_time_zone(runtime))
+        event = _event_body(title, start_datetime, end_datetime, attendees, tz)
     except ValueError as e:
         return f"Error parsing dates: {e}"
     
-    event = {
-        "summary": title,
-        "start": {
-            "dateTime": start_dt,
-        },
-        "end": {
-            "dateTime": end_dt,
-        },
-        "attendees": [{"email": email} for email in attendees],
-    }
-    
     try:
         event = service.events().insert(calendarId=config.CALENDAR_ID, body=event).execute()
+        store = get_event_store(config.CALENDAR_ID, get_calendar_service)
+        if store is not None:
+            store.upsert(event)
         return f"Event created: {event.get('htmlLink')}"
     except Exception as e:
         logger.error(f"Error creating event: {e}")
         return f"Error creating event: {e}"
 
+class CreateEventsBulkInput(BaseModel):
+    events: list[CreateEventInput] = Field(description="The events to create, each with title, start_datetime, end_datetime and attendees")
+
+def _insert_batch(service, bodies: dict) -> dict:
+    """
+    Sends events.insert calls for {index: body} as HTTP batch requests.
+
+    A batch that fails as a whole marks only its own items with the error;
+    items answered by earlier batches keep their outcomes, so created events
+    are never sent again.
+
+    Returns:
+        dict: {index: created event or exception} for every submitted item.
+    """
+    outcomes = {}
+
+    def on_response(request_id, response, exception):
+        outcomes[int(request_id)] = exception if exception is not None else response
+
+    items = list(bodies.items())
+    size = config.CALENDAR_BATCH_SIZE
+    for i in range(0, len(items), size):
+        chunk = items[i:i + size]
+        batch = service.new_batch_http_request(callback=on_response)
+        for index, body in chunk:
+            batch.add(service.events().insert(calendarId=config.CALENDAR_ID, body=body), request_id=str(index))
+        try:
+            batch.execute()
+        except Exception as e:
+            logger.error(f"Error sending event batch: {e}")
+            for index, _ in chunk:
+                outcomes.setdefault(index, e)
+    return outcomes
+
+@with_async
+@tool(args_schema=CreateEventsBulkInput)
+def create_events_bulk(events: list[CreateEventInput], runtime: ToolRuntime[AgentContext] = None) -> str:
+    """
+    Create several events at once, e.g. a series of 1:1 meetings.
+    Prefer this over calling create_event repeatedly.
+    """
+    logger.info(f"Creating {len(events)} events in bulk")
+    service = get_calendar_service()
+    store = get_event_store(config.CALENDAR_ID, get_calendar_service)
+    tz = resolve_time_zone(_user_time_zone(runtime))
+    
+    results = {}
+    pending = {}
+    for index, spec in enumerate(events):
+        try:
+            pending[index] = _event_body(spec.title, spec.start_datetime, spec.end_datetime, spec.attendees, tz)
+        except ValueError as e:
+            results[index] = f"Error parsing dates: {e}"
+    
+    # Only items that failed with a transient error are sent again
+    for attempt in range(1, config.RETRY_MAX_ATTEMPTS + 1):
+        if not pending:
+            break
+        if attempt > 1:
+            sleep_before_retry(attempt - 1)
+        
+        outcomes = _insert_batch(service, pending)
+        
+        retry = {}
+        for index, body in pending.items():
+            outcome = outcomes.get(index)
+            if isinstance(outcome, dict):
+                if store is not None:
+                    store.upsert(outcome)
+                results[index] = f"Event created: {outcome.get('htmlLink')}"
+            elif is_retryable(outcome) and attempt < config.RETRY_MAX_ATTEMPTS:
+                retry[index] = body
+            else:
+                results[index] = f"Error creating event: {outcome}"
+        pending = retry
+    
+    created = sum(1 for result in results.values() if result.startswith("Event created"))
+    lines = [f"Created {created} of {len(events)} events."]
+    for index, spec in enumerate(events):
+        lines.append(f"{index + 1}. {spec.title}: {results[index]}")
+    return "\n".join(lines)
+
 class GetAvailabilityInput(BaseModel):
     attendees: list[str] = Field(description="List of email addresses to check availability for")
     date: str = Field(description="The date to check availability on (ISO format: '2024-01-15')")
     duration_minutes: int = Field(default=30, description="The duration of the desired slot in minutes")
 
+@with_async
 @tool(args_schema=GetAvailabilityInput)
 def get_available_time_slots(
     attendees: list[str],
     date: str,
-    duration_minutes: int = 30
+    duration_minutes: int = 30,
+    runtime: ToolRuntime[AgentContext] = None,
 ) -> list[str]:
     """
     Check calendar availability for given attendees on a specific date.
@@ -117,9 +283,7 @@ def get_available_time_slots(
     
     try:
         # Parse the target date
-        target_date = parser.parse(date)
-        if target_date.tzinfo is None:
-            target_date = target_date.astimezone()
+        target_date = localize(parse_datetime(date), resolve_time_zone(_user_time_zone(runtime)))
             
         # Define working hours (08:00 to 17:00) for that day
         work_start = target_date.replace(hour=8, minute=0, second=0, microsecond=0)
@@ -155,56 +319,148 @@ def get_available_time_slots(
         freebusy_result = service.freebusy().query(body=body).execute()
         calendars = freebusy_result.get("calendars", {})
         
-        # Step 2: Merge Busy Slots
-        busy_intervals = []
-        for cal_id, data in calendars.items():
-            for busy in data.get("busy", []):
-                start = parser.parse(busy["start"])
-                end = parser.parse(busy["end"])
-                busy_intervals.append((start, end))
+        # Step 2: Collect Busy Slots as epoch seconds
+        busy_starts, busy_ends, _ = busy_arrays(calendars)
                 
-        # Sort by start time
-        busy_intervals.sort(key=lambda x: x[0])
-        
-        merged_busy = []
-        for b_start, b_end in busy_intervals:
-            if not merged_busy:
-                merged_busy.append((b_start, b_end))
-            else:
-                last_start, last_end = merged_busy[-1]
-                if b_start < last_end:
-                    # Overlap, extend end if needed
-                    merged_busy[-1] = (last_start, max(last_end, b_end))
-                else:
-                    merged_busy.append((b_start, b_end))
-                    
-        # Step 3 & 4: Calculate Free Slots & Filter Duration
-        available_slots = []
-        current_time = work_start
-        
-        # Iterate through the day in 30-minute steps (or whatever granularity desired)
-        while current_time + timedelta(minutes=duration_minutes) <= work_end:
-            slot_end = current_time + timedelta(minutes=duration_minutes)
-            is_busy = False
-            
-            # Check if this candidate slot overlaps with ANY "Forbidden Zone"
-            for b_start, b_end in merged_busy:
-                # Overlap condition: StartA < EndB AND EndA > StartB
-                if current_time < b_end and slot_end > b_start:
-                    is_busy = True
-                    break
-            
-            if not is_busy:
-                available_slots.append(current_time.isoformat())
-                
-            # Step forward by 30 minutes
-            current_time += timedelta(minutes=30)
+        # Step 3 & 4: Merge, Calculate Free Slots & Filter Duration
+        slots = find_slots(
+            busy_starts,
+            busy_ends,
+            int(work_start.timestamp()),
+            int(work_end.timestamp()),
+            duration=duration_minutes * 60,
+            granularity=config.SLOT_GRANULARITY_MINUTES * 60,
+            buffer=config.SLOT_BUFFER_MINUTES * 60,
+        )
+        available_slots = [
+            datetime.fromtimestamp(slot, tz=work_start.tzinfo).isoformat() for slot in slots
+        ]
             
         if not available_slots:
             return ["No available slots found for the given criteria."]
             
-        return available_slots
+        return compact_output(
+            "get_available_time_slots",
+            str(available_slots),
+            compact_slots(available_slots, config.SLOT_GRANULARITY_MINUTES),
+            session_id=context_of(runtime).session_id,
+        )
 
     except Exception as e:
         logger.error(f"Error checking availability: {e}")
         return [f"Error checking availability: {e}"]
+
+class WorkingHours(BaseModel):
+    start: str = Field(default=config.WORKDAY_START, description="Local start of the working day ('HH:MM')")
+    end: str = Field(default=config.WORKDAY_END, description="Local end of the working day ('HH:MM')")
+    time_zone: Optional[str] = Field(default=None, description="IANA time zone, e.g. 'Europe/Berlin'. Defaults to the organizer's time zone.")
+
+class FindMeetingSlotsInput(BaseModel):
+    attendees: list[str] = Field(description="List of email addresses that must all be free")
+    start_date: str = Field(description="First date to search (ISO format: '2024-01-15')")
+    end_date: Optional[str] = Field(default=None, description="Last date to search, inclusive (ISO format). Defaults to two weeks from start_date.")
+    duration_minutes: int = Field(default=30, description="The duration of the desired slot in minutes")
+    working_hours: dict[str, WorkingHours] = Field(default={}, description="Working hours per attendee email, for attendees whose hours or time zone differ from the default")
+    time_zone: Optional[str] = Field(default=None, description="The organizer's IANA time zone. Defaults to the user's time zone.")
+    top_n: int = Field(default=5, ge=1, description="Maximum number of slots to return")
+
+def _query_freebusy_chunk(calendar_ids: list[str], time_min: str, time_max: str, time_zone: str) -> dict:
+    """Runs one FreeBusy query. Each worker thread gets its own pooled service client."""
+    service = get_calendar_service()
+    body = {
+        "timeMin": time_min,
+        "timeMax": time_max,
+        "timeZone": time_zone,
+        "items": [{"id": calendar_id} for calendar_id in calendar_ids],
+    }
+    return service.freebusy().query(body=body).execute().get("calendars", {})
+
+def _query_freebusy(calendar_ids: list[str], time_min: str, time_max: str, time_zone: str) -> dict:
+    """Splits calendars into API-sized chunks and queries them concurrently."""
+    size = config.FREEBUSY_MAX_CALENDARS
+    chunks = [calendar_ids[i:i + size] for i in range(0, len(calendar_ids), size)]
+    calendars = {}
+    with ThreadPoolExecutor(max_workers=min(config.FREEBUSY_MAX_WORKERS, len(chunks))) as executor:
+        for result in executor.map(lambda chunk: _query_freebusy_chunk(chunk, time_min, time_max, time_zone), chunks):
+            calendars.update(result)
+    return calendars
+
+@with_async
+@tool(args_schema=FindMeetingSlotsInput)
+def find_meeting_slots(
+    attendees: list[str],
+    start_date: str,
+    end_date: Optional[str] = None,
+    duration_minutes: int = 30,
+    working_hours: dict[str, WorkingHours] = {},
+    time_zone: Optional[str] = None,
+    top_n: int = 5,
+    runtime: ToolRuntime[AgentContext] = None,
+) -> list[str]:
+    """
+    Find the best meeting slots across a date range for any number of attendees.
+    Respects each attendee's working hours and time zone. Use this instead of
+    get_available_time_slots for multi-day searches or large groups.
+    """
+    logger.info(f"Searching {len(attendees)} attendees for {duration_minutes}-minute slots from {start_date}")
+
+    try:
+        time_zone_name = resolve_time_zone_name(time_zone or _user_time_zone(runtime))
+        tz = ZoneInfo(time_zone_name)
+        first_day = parse_datetime(start_date).date()
+        last_day = parse_datetime(end_date).date() if end_date else first_day + timedelta(days=config.SEARCH_DAYS - 1)
+
+        window_start = int(datetime.combine(first_day, time.min, tzinfo=tz).timestamp())
+        window_end = int(datetime.combine(last_day + timedelta(days=1), time.min, tzinfo=tz).timestamp())
+
+        # Never offer slots in the past
+        granularity = config.SLOT_GRANULARITY_MINUTES * 60
+        now = int(datetime.now().timestamp())
+        if window_end <= now:
+            return ["Date range is in the past."]
+        if window_start < now:
+            window_start = -(-now // granularity) * granularity
+
+        # Step 1: Fetch busy time for everyone, in parallel chunks
+        calendar_ids = list(dict.fromkeys([config.CALENDAR_ID] + attendees))
+        calendars = _query_freebusy(
+            calendar_ids,
+            datetime.fromtimestamp(window_start, tz).isoformat(),
+            datetime.fromtimestamp(window_end, tz).isoformat(),
+            time_zone_name,
+        )
+
+        busy_starts, busy_ends, unavailable = busy_arrays(calendars)
+
+        # Step 2: Treat time outside each attendee's working hours as busy
+        schedules = set()
+        for cal_id in calendar_ids:
+            hours = working_hours.get(cal_id) or WorkingHours()
+            schedules.add((hours.start, hours.end, hours.time_zone or time_zone_name))
+        for day_start, day_end, zone in schedules:
+            off_starts, off_ends = off_hours(
+                window_start,
+                window_end,
+                time.fromisoformat(day_start),
+                time.fromisoformat(day_end),
+                ZoneInfo(zone),
+            )
+            busy_starts.extend(off_starts)
+            busy_ends.extend(off_ends)
+
+        # Step 3: Find common free gaps and rank candidate slots
+        gap_starts, gap_ends = free_gaps(
+            busy_starts, busy_ends, window_start, window_end, config.SLOT_BUFFER_MINUTES * 60
+        )
+        slots = rank_slots(gap_starts, gap_ends, duration_minutes * 60, granularity, window_start, top_n)
+
+        result = [datetime.fromtimestamp(slot, tz).isoformat() for slot in slots]
+        if not result:
+            result = ["No available slots found for the given criteria."]
+        if unavailable:
+            result.append(f"Could not check availability for: {', '.join(sorted(unavailable))}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Error finding meeting slots: {e}")
+        return [f"Error finding meeting slots: {e}"]
@@ -1,42 +1,152 @@
 from pydantic import BaseModel, Field
 import logging
 import base64
+import queue
+import threading
 from email.mime.text import MIMEText
-from googleapiclient.discovery import build
-from langchain.tools import tool
-from app.core.auth import authenticate_google_services
+from typing import Optional
+from langchain.tools import tool, ToolRuntime
+from app.core.compaction import compact_output
+from app.core.concurrency import with_async
+from app.core.config import config
+from app.core.context import AgentContext, context_of
+from app.core.ratelimit import TokenBucket, is_retryable, sleep_before_retry
+from app.core.services import service_registry
 
 logger = logging.getLogger(__name__)
 
+# Shared by every send in the process so single and bulk sends draw on the same quota
+send_bucket = TokenBucket(rate=config.GMAIL_SEND_RATE, capacity=config.GMAIL_SEND_BURST)
+
 def get_gmail_service():
     """Returns an authenticated Gmail service resource."""
-    creds = authenticate_google_services()
-    service = build("gmail", "v1", credentials=creds)
-    return service
+    return service_registry.get("gmail", "v1")
+
+def _build_message(to: str, subject: str, body: str, cc: Optional[str] = None) -> dict:
+    """Builds a messages.send body from plain-text parts."""
+    message = MIMEText(body)
+    message["to"] = to
+    if cc:
+        message["cc"] = cc
+    message["subject"] = subject
+
+    raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
+    return {"raw": raw_message}
 
 class SendEmailInput(BaseModel):
     to: str = Field(description="Email address of the recipient")
     subject: str = Field(description="Subject of the email")
     body: str = Field(description="Body content of the email")
+    cc: Optional[str] = Field(default=None, description="Comma-separated email addresses to copy")
 
+@with_async
 @tool(args_schema=SendEmailInput)
-def send_email(to: str, subject: str, body: str) -> str:
+def send_email(to: str, subject: str, body: str, cc: Optional[str] = None) -> str:
     """
     Send an email via Gmail.
     """
     logger.info(f"Sending email to {to} with subject '{subject}'")
     service = get_gmail_service()
-    
+
     try:
-        message = MIMEText(body)
-        message["to"] = to
-        message["subject"] = subject
-        
-        raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
-        body = {"raw": raw_message}
-        
-        sent_message = service.users().messages().send(userId="me", body=body).execute()
+        send_bucket.acquire()
+        sent_message = service.users().messages().send(userId="me", body=_build_message(to, subject, body, cc)).execute()
         return f"Email sent! Message ID: {sent_message['id']}"
     except Exception as e:
         logger.error(f"Error sending email: {e}")
         return f"Error sending email: {e}"
+
+class BulkEmailSender:
+    """
+    Sends many messages from a queue with a bounded number of worker threads.
+
+    Every send first takes a token from the shared bucket, so the batch stays
+    within the Gmail per-user sending quota. Rate-limit and server errors are
+    retried with jittered exponential backoff.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, bucket: Optional[TokenBucket] = None):
+        self.max_workers = max_workers or config.EMAIL_MAX_CONCURRENCY
+        self.bucket = bucket or send_bucket
+
+    def send_all(self, messages: list[SendEmailInput]) -> list[str]:
+        """
+        Sends every message and returns a status line per message, in input order.
+        """
+        work = queue.Queue()
+        for index, message in enumerate(messages):
+            work.put((index, message))
+        results = [None] * len(messages)
+
+        def worker():
+            while True:
+                try:
+                    index, message = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[index] = self._send_one(message)
+                except Exception as e:
+                    # e.g. the service or the message could not be built
+                    logger.error(f"Error sending email to {message.to}: {e}")
+                    results[index] = f"Failed: {e}"
+
+        workers = [
+            threading.Thread(target=worker, name=f"bulk-email-{i}", daemon=True)
+            for i in range(min(self.max_workers, len(messages)))
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return results
+
+    def _send_one(self, message: SendEmailInput) -> str:
+        service = get_gmail_service()
+        body = _build_message(message.to, message.subject, message.body, message.cc)
+        for attempt in range(1, config.RETRY_MAX_ATTEMPTS + 1):
+            self.bucket.acquire()
+            try:
+                sent_message = service.users().messages().send(userId="me", body=body).execute()
+                return f"Sent (Message ID: {sent_message['id']})"
+            except Exception as e:
+                if not is_retryable(e) or attempt == config.RETRY_MAX_ATTEMPTS:
+                    logger.error(f"Error sending email to {message.to}: {e}")
+                    return f"Failed after {attempt} attempt(s): {e}"
+                sleep_before_retry(attempt)
+
+class SendEmailsBulkInput(BaseModel):
+    messages: list[SendEmailInput] = Field(default=[], description="Individual messages, each with its own recipient, subject and body")
+    recipients: list[str] = Field(default=[], description="Recipients who should each get their own copy of the shared subject and body")
+    subject: Optional[str] = Field(default=None, description="Shared subject for all recipients")
+    body: Optional[str] = Field(default=None, description="Shared body for all recipients")
+
+@with_async
+@tool(args_schema=SendEmailsBulkInput)
+def send_emails_bulk(
+    messages: list[SendEmailInput] = [],
+    recipients: list[str] = [],
+    subject: Optional[str] = None,
+    body: Optional[str] = None,
+    runtime: ToolRuntime[AgentContext] = None,
+) -> str:
+    """
+    Send many emails at once, e.g. a notification to a whole team.
+    Each recipient gets an individual message. The whole batch needs a single approval.
+    """
+    messages = list(messages)
+    if recipients:
+        if subject is None or body is None:
+            return "Error: 'subject' and 'body' are required when sending to 'recipients'."
+        messages.extend(SendEmailInput(to=to, subject=subject, body=body) for to in recipients)
+    if not messages:
+        return "Error: No messages to send."
+
+    logger.info(f"Sending {len(messages)} emails in bulk")
+    # A message without a status was never handed to Gmail
+    statuses = [status or "Failed: not sent" for status in BulkEmailSender().send_all(messages)]
+
+    sent = sum(1 for status in statuses if status.startswith("Sent"))
+    lines = [f"{message.to}: {status}" for message, status in zip(messages, statuses)]
+    summary = f"Sent {sent} of {len(messages)} emails."
+    return "\n".join([summary] + compact_output("send_emails_bulk", "\n".join(lines), lines, session_id=context_of(runtime).session_id))
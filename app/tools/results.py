@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+import logging
+from langchain.tools import tool, ToolRuntime
+from app.core.compaction import result_store, fit_to_budget
+from app.core.context import AgentContext, context_of
+
+logger = logging.getLogger(__name__)
+
+class GetMoreResultsInput(BaseModel):
+    result_id: str = Field(description="The result_id from a '... N more' marker")
+    offset: int = Field(description="The offset from the same marker")
+
+@tool(args_schema=GetMoreResultsInput)
+def get_more_results(result_id: str, offset: int, runtime: ToolRuntime[AgentContext] = None) -> str:
+    """
+    Show the next page of a tool result that was cut off with a '... N more' marker.
+    """
+    logger.info(f"Paging result {result_id} from offset {offset}")
+    session_id = context_of(runtime).session_id
+    lines = result_store.get(result_id, session_id)
+    if lines is None:
+        return f"No stored result with id '{result_id}'. Run the original tool again."
+    if offset >= len(lines):
+        return "No more results."
+    
+    return "\n".join(fit_to_budget(lines, offset=offset, result_id=result_id, session_id=session_id))
@@ -0,0 +1,89 @@
+"""
+Benchmark: wall-clock time of a model step that emits several tool calls.
+
+Runs the real CalendarAgent graph with a scripted model that asks for
+list_events, get_available_time_slots and find_meeting_slots in one step.
+Every Google API call is served by a fake client that sleeps for a fixed
+latency, so the numbers isolate how the tool calls are scheduled.
+
+Usage:
+    python benchmarks/bench_async_tools.py [--latency-ms 300] [--calls 3]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agents.calendar import CalendarAgent
+from app.core.utils import console
+from app.tools.calendar import list_events, get_available_time_slots, find_meeting_slots
+
+START = "2030-01-07T09:00:00Z"
+END = "2030-01-07T17:00:00Z"
+
+TOOL_CALLS = [
+    {"name": "list_events", "args": {"start_datetime": START, "end_datetime": END}},
+    {"name": "get_available_time_slots", "args": {"attendees": ["a@example.com", "b@example.com"], "date": "2030-01-07", "duration_minutes": 30}},
+    {"name": "find_meeting_slots", "args": {"attendees": ["a@example.com", "b@example.com"], "duration_minutes": 30, "start_date": "2030-01-07", "end_date": "2030-01-11"}},
+]
+
+class ScriptedModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+def slow_service(latency):
+    def execute(*args, **kwargs):
+        time.sleep(latency)
+        return {"items": [], "calendars": {}}
+
+    service = MagicMock()
+    service.events().list().execute.side_effect = execute
+    service.freebusy().query().execute.side_effect = execute
+    return service
+
+def build_agent(calls):
+    tool_calls = [dict(call, id=f"call_{i}") for i, call in enumerate(calls)]
+    messages = iter([AIMessage(content="", tool_calls=tool_calls), AIMessage(content="Done.")])
+    agent = CalendarAgent.__new__(CalendarAgent)
+    agent.llm = ScriptedModel(messages=messages)
+    agent.checkpointer = InMemorySaver()
+    agent.agent_executor = agent._create_agent_executor()
+    return agent
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--latency-ms", type=float, default=300, help="Simulated time per Google API call")
+    arg_parser.add_argument("--calls", type=int, default=3, choices=range(1, len(TOOL_CALLS) + 1))
+    args = arg_parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    calls = TOOL_CALLS[:args.calls]
+    tools = {t.name: t for t in (list_events, get_available_time_slots, find_meeting_slots)}
+
+    with patch("app.tools.calendar.get_calendar_service", return_value=slow_service(latency)), \
+            patch.object(console, "quiet", True):
+        sequential = timed(lambda: [tools[c["name"]].invoke(c["args"]) for c in calls])
+        sync_step = timed(lambda: build_agent(calls).invoke("Plan my day"))
+        async_step = timed(lambda: asyncio.run(build_agent(calls).ainvoke("Plan my day")))
+
+    print(f"{args.calls} tool calls, {args.latency_ms:.0f} ms per API call")
+    print(f"{'variant':<32} {'ms':>10}")
+    print(f"{'tools called one after another':<32} {sequential * 1000:>10.1f}")
+    print(f"{'agent step, invoke()':<32} {sync_step * 1000:>10.1f}")
+    print(f"{'agent step, ainvoke()':<32} {async_step * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
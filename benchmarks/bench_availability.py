@@ -0,0 +1,104 @@
+"""
+Micro-benchmark: sweep-line availability engine vs. the original per-slot scan.
+
+Usage:
+    python benchmarks/bench_availability.py [--busy 3000] [--calendars 50] [--days 30]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.availability import find_slots
+
+def legacy_slots(busy_intervals, work_start, work_end, duration_minutes, granularity_minutes):
+    """The datetime-based algorithm previously inlined in get_available_time_slots."""
+    busy_intervals = sorted(busy_intervals, key=lambda x: x[0])
+    merged_busy = []
+    for b_start, b_end in busy_intervals:
+        if not merged_busy:
+            merged_busy.append((b_start, b_end))
+        else:
+            last_start, last_end = merged_busy[-1]
+            if b_start < last_end:
+                merged_busy[-1] = (last_start, max(last_end, b_end))
+            else:
+                merged_busy.append((b_start, b_end))
+
+    available_slots = []
+    current_time = work_start
+    while current_time + timedelta(minutes=duration_minutes) <= work_end:
+        slot_end = current_time + timedelta(minutes=duration_minutes)
+        is_busy = False
+        for b_start, b_end in merged_busy:
+            if current_time < b_end and slot_end > b_start:
+                is_busy = True
+                break
+        if not is_busy:
+            available_slots.append(current_time)
+        current_time += timedelta(minutes=granularity_minutes)
+    return available_slots
+
+def synthetic_busy(rng, count, calendars, window_start, days):
+    """Short meetings scattered across many calendars, like a FreeBusy response for a team."""
+    per_calendar = max(count // calendars, 1)
+    intervals = []
+    for _ in range(calendars):
+        for _ in range(per_calendar):
+            start = window_start + timedelta(minutes=rng.randrange(0, days * 24 * 60, 15))
+            intervals.append((start, start + timedelta(minutes=rng.choice([15, 30, 45, 60]))))
+    return intervals
+
+def best_of(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--busy", type=int, default=3000, help="Total synthetic busy blocks")
+    arg_parser.add_argument("--calendars", type=int, default=50, help="Calendars the blocks are spread over")
+    arg_parser.add_argument("--days", type=int, default=30, help="Length of the search window in days")
+    arg_parser.add_argument("--duration", type=int, default=15, help="Slot duration in minutes")
+    arg_parser.add_argument("--granularity", type=int, default=5, help="Candidate spacing in minutes")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(0)
+    window_start = datetime(2030, 1, 7, tzinfo=timezone.utc)
+    window_end = window_start + timedelta(days=args.days)
+    busy = synthetic_busy(rng, args.busy, args.calendars, window_start, args.days)
+
+    legacy_time, legacy_result = best_of(
+        lambda: legacy_slots(busy, window_start, window_end, args.duration, args.granularity),
+        args.repeat,
+    )
+
+    def engine():
+        starts = [int(b[0].timestamp()) for b in busy]
+        ends = [int(b[1].timestamp()) for b in busy]
+        return find_slots(
+            starts, ends,
+            int(window_start.timestamp()), int(window_end.timestamp()),
+            duration=args.duration * 60, granularity=args.granularity * 60,
+        )
+
+    engine_time, engine_result = best_of(engine, args.repeat)
+
+    assert [int(s.timestamp()) for s in legacy_result] == list(engine_result), "results differ"
+
+    print(f"busy blocks: {len(busy)}, window: {args.days} days, slots found: {len(engine_result)}")
+    print(f"legacy scan : {legacy_time * 1000:10.2f} ms")
+    print(f"sweep-line  : {engine_time * 1000:10.2f} ms  (including datetime -> epoch conversion)")
+    print(f"speedup     : {legacy_time / engine_time:10.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: process memory (RSS) growth over many turns, InMemorySaver vs SQLiteSaver.
+
+Drives the real CalendarAgent graph with a scripted model, spreading the turns
+over several sessions like the multi-user server does. Each backend runs in a
+fresh subprocess so RSS numbers are not polluted by the other run.
+
+Usage:
+    python benchmarks/bench_checkpoint.py [--turns 10000] [--sessions 100]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+REPLY = (
+    "You have three meetings tomorrow: a design review at 10:00, lunch with the "
+    "platform team at 12:30 and a planning session at 15:00. The afternoon between "
+    "13:30 and 15:00 is free if you want to add something. "
+)
+
+def rss_bytes():
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        # Peak rather than current RSS where /proc is unavailable (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def run_backend(backend, turns, sessions, depth):
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+    from langgraph.checkpoint.memory import InMemorySaver
+
+    from app.agents.calendar import CalendarAgent
+    from app.core.checkpoint import SQLiteSaver
+    from app.core.context import AgentContext
+    from app.core.utils import console
+
+    class ScriptedModel(GenericFakeChatModel):
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+    directory = tempfile.mkdtemp()
+    saver = InMemorySaver() if backend == "memory" else SQLiteSaver(os.path.join(directory, "bench.sqlite"), max_depth=depth)
+    with patch("app.core.models.ChatGoogleGenerativeAI"):
+        agent = CalendarAgent()
+    agent.checkpointer = saver
+    agent.llm = ScriptedModel(messages=(AIMessage(content=f"{REPLY}#{i}") for i in range(turns)))
+    agent.fallback_llms = []
+    agent.agent_executor = agent._create_agent_executor()
+    contexts = [AgentContext(session_id=f"session-{i}") for i in range(sessions)]
+
+    console.quiet = True
+    agent.chat("warm up", context=AgentContext(session_id="warm-up"))
+    agent.end_session("warm-up")
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    for turn in range(turns):
+        agent.chat(f"What is on my calendar tomorrow? ({turn})", context=contexts[turn % sessions])
+    elapsed = time.perf_counter() - started
+
+    result = {"rss_growth": rss_bytes() - rss_before, "seconds": elapsed, "disk_bytes": 0}
+    if backend == "sqlite":
+        result["disk_bytes"] = saver.stats()["disk_bytes"]
+    print(json.dumps(result))
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--turns", type=int, default=10000)
+    arg_parser.add_argument("--sessions", type=int, default=100)
+    arg_parser.add_argument("--depth", type=int, default=20, help="Checkpoints kept per thread by SQLiteSaver")
+    arg_parser.add_argument("--backend", choices=["memory", "sqlite"], help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.backend:
+        run_backend(args.backend, args.turns, args.sessions, args.depth)
+        return
+
+    print(f"{args.turns} turns over {args.sessions} sessions")
+    print(f"{'backend':<28} {'RSS growth MiB':>15} {'KiB/turn':>10} {'disk MiB':>10} {'turns/s':>10}")
+    for backend, label in [("memory", "InMemorySaver"), ("sqlite", f"SQLiteSaver (depth {args.depth})")]:
+        output = subprocess.run(
+            [sys.executable, __file__, "--backend", backend, "--turns", str(args.turns),
+             "--sessions", str(args.sessions), "--depth", str(args.depth)],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        print(
+            f"{label:<28} {result['rss_growth'] / 2**20:>15.1f} {result['rss_growth'] / 1024 / args.turns:>10.2f} "
+            f"{result['disk_bytes'] / 2**20:>10.1f} {args.turns / result['seconds']:>10.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Micro-benchmark: FreeBusy and tool-argument timestamp parsing, dateutil vs. app.core.datetimes.
+
+Builds a FreeBusy response for a team (RFC 3339 timestamps in UTC and with
+offsets, as the API returns them) plus a batch of model-supplied tool
+arguments, then converts them with dateutil.parser.parse, with the ISO fast
+path on a cold cache, and with a warm cache (a repeated search).
+
+Usage:
+    python benchmarks/bench_datetimes.py [--calendars 50] [--busy 40] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from dateutil import parser
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.datetimes import busy_arrays, clear_caches, parse_datetime
+
+def synthetic_freebusy(rng, calendars, busy_per_calendar):
+    """Busy blocks on a 15-minute grid over two weeks, like a FreeBusy response for a team."""
+    window_start = datetime(2030, 1, 7, tzinfo=timezone.utc)
+    zones = [timezone.utc, timezone(timedelta(hours=1)), timezone(timedelta(hours=-5)), timezone(timedelta(hours=5, minutes=30))]
+    response = {}
+    for i in range(calendars):
+        zone = rng.choice(zones)
+        busy = []
+        for _ in range(busy_per_calendar):
+            start = window_start + timedelta(minutes=rng.randrange(0, 14 * 24 * 60, 15))
+            end = start + timedelta(minutes=rng.choice([15, 30, 45, 60]))
+            if zone is timezone.utc:
+                busy.append({"start": start.strftime("%Y-%m-%dT%H:%M:%SZ"), "end": end.strftime("%Y-%m-%dT%H:%M:%SZ")})
+            else:
+                busy.append({"start": start.astimezone(zone).isoformat(), "end": end.astimezone(zone).isoformat()})
+        response[f"user{i}@example.com"] = {"busy": busy}
+    return response
+
+def dateutil_arrays(calendars):
+    """The loop previously inlined in get_available_time_slots and find_meeting_slots."""
+    starts, ends = [], []
+    for data in calendars.values():
+        for busy in data.get("busy", []):
+            starts.append(int(parser.parse(busy["start"]).timestamp()))
+            ends.append(int(parser.parse(busy["end"]).timestamp()))
+    return starts, ends
+
+def best_of(fn, repeat, before=None):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--calendars", type=int, default=50)
+    arg_parser.add_argument("--busy", type=int, default=40, help="Busy blocks per calendar")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(7)
+    calendars = synthetic_freebusy(rng, args.calendars, args.busy)
+    arguments = [f"2030-01-{day:02d}T{hour:02d}:00:00" for day in range(7, 21) for hour in range(8, 18)]
+    timestamps = 2 * args.calendars * args.busy
+
+    legacy_time, legacy = best_of(lambda: dateutil_arrays(calendars), args.repeat)
+    cold_time, fast = best_of(lambda: busy_arrays(calendars), args.repeat, before=clear_caches)
+    warm_time, _ = best_of(lambda: busy_arrays(calendars), args.repeat)
+    assert (list(fast[0]), list(fast[1])) == legacy, "fast path disagrees with dateutil"
+
+    args_legacy, _ = best_of(lambda: [parser.parse(value) for value in arguments], args.repeat)
+    args_cold, _ = best_of(lambda: [parse_datetime(value) for value in arguments], args.repeat, before=clear_caches)
+
+    print(f"FreeBusy: {args.calendars} calendars x {args.busy} busy blocks ({timestamps} timestamps)")
+    print(f"{'variant':<36} {'ms':>10} {'speedup':>10}")
+    print(f"{'dateutil.parser.parse':<36} {legacy_time * 1000:>10.2f} {1:>9.1f}x")
+    print(f"{'busy_arrays, cold cache':<36} {cold_time * 1000:>10.2f} {legacy_time / cold_time:>9.1f}x")
+    print(f"{'busy_arrays, warm cache':<36} {warm_time * 1000:>10.2f} {legacy_time / warm_time:>9.1f}x")
+    print(f"Tool arguments: {len(arguments)} naive ISO timestamps")
+    print(f"{'dateutil.parser.parse':<36} {args_legacy * 1000:>10.2f} {1:>9.1f}x")
+    print(f"{'parse_datetime, cold cache':<36} {args_cold * 1000:>10.2f} {args_legacy / args_cold:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
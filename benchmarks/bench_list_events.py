@@ -0,0 +1,163 @@
+"""
+Benchmark: list_events payload size and latency, before and after paging with field masks.
+
+Runs a local stand-in for the Calendar events.list endpoint that serves realistic,
+full event resources, honours maxResults/pageToken, and applies simple
+partial-response `fields` masks. The real Calendar client talks to it over HTTP.
+
+Usage:
+    python benchmarks/bench_list_events.py [--events 2000] [--latency-ms 20]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httplib2
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import config
+from app.tools.calendar import LIST_EVENTS_FIELDS, iter_events
+
+def full_event(i, start):
+    """An event resource shaped like a real recurring-meeting instance."""
+    end = start + timedelta(minutes=30)
+    return {
+        "kind": "calendar#event",
+        "etag": f'"31{i:014d}"',
+        "id": f"recurring{i // 10:06d}_{start:%Y%m%dT%H%M%SZ}",
+        "status": "confirmed",
+        "htmlLink": f"https://www.google.com/calendar/event?eid=ZXZlbnQ{i:08d}",
+        "created": "2023-11-02T09:15:00.000Z",
+        "updated": "2024-01-03T12:00:00.000Z",
+        "summary": f"Team sync #{i}",
+        "description": "Weekly sync to review progress, blockers and next steps. " * 3,
+        "location": "Meeting room 4 / https://meet.google.com/abc-defg-hij",
+        "creator": {"email": "organizer@example.com", "self": True},
+        "organizer": {"email": "organizer@example.com", "self": True},
+        "start": {"dateTime": start.isoformat(), "timeZone": "Europe/Berlin"},
+        "end": {"dateTime": end.isoformat(), "timeZone": "Europe/Berlin"},
+        "recurringEventId": f"recurring{i // 10:06d}",
+        "originalStartTime": {"dateTime": start.isoformat(), "timeZone": "Europe/Berlin"},
+        "iCalUID": f"recurring{i // 10:06d}@google.com",
+        "sequence": 0,
+        "attendees": [
+            {"email": f"person{j}@example.com", "responseStatus": "accepted"} for j in range(8)
+        ],
+        "hangoutLink": "https://meet.google.com/abc-defg-hij",
+        "conferenceData": {
+            "entryPoints": [{"entryPointType": "video", "uri": "https://meet.google.com/abc-defg-hij", "label": "meet.google.com/abc-defg-hij"}],
+            "conferenceSolution": {"key": {"type": "hangoutsMeet"}, "name": "Google Meet"},
+            "conferenceId": "abc-defg-hij",
+        },
+        "reminders": {"useDefault": True},
+        "eventType": "default",
+    }
+
+def apply_mask(page, fields):
+    """Applies masks of the form 'items(a,b),nextPageToken' used by the client."""
+    if not fields:
+        return page
+    result = {}
+    for part in fields.replace("),", ")|").split("|"):
+        if part.startswith("items("):
+            keys = part[len("items("):-1].split(",")
+            result["items"] = [{k: item[k] for k in keys if k in item} for item in page.get("items", [])]
+        elif part in page:
+            result[part] = page[part]
+    return result
+
+class StandInServer:
+    def __init__(self, events, latency):
+        self.events = events
+        self.latency = latency
+        self.bytes_sent = 0
+        self.requests = 0
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                offset = int(query.get("pageToken", "0"))
+                size = int(query.get("maxResults", "250"))
+                page = {"kind": "calendar#events", "items": owner.events[offset:offset + size]}
+                if offset + size < len(owner.events):
+                    page["nextPageToken"] = str(offset + size)
+                body = json.dumps(apply_mask(page, query.get("fields"))).encode()
+                owner.bytes_sent += len(body)
+                owner.requests += 1
+                time.sleep(owner.latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}/calendar/v3/"
+
+    def reset(self):
+        self.bytes_sent = 0
+        self.requests = 0
+
+def legacy_list(service, time_min, time_max):
+    """The previous implementation: one request, full resources, first page only."""
+    return service.events().list(
+        calendarId=config.CALENDAR_ID,
+        timeMin=time_min,
+        timeMax=time_max,
+        singleEvents=True,
+        orderBy="startTime",
+    ).execute().get("items", [])
+
+def measure(server, label, fn, repeat=3):
+    elapsed = float("inf")
+    for _ in range(repeat):
+        server.reset()
+        started = time.perf_counter()
+        events = fn()
+        elapsed = min(elapsed, time.perf_counter() - started)
+    print(f"{label:<28} {len(events):>7} {server.requests:>9} {server.bytes_sent / 1024:>10.1f} {elapsed * 1000:>10.1f}")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--events", type=int, default=2000)
+    arg_parser.add_argument("--latency-ms", type=float, default=20, help="Simulated server time per page")
+    args = arg_parser.parse_args()
+
+    start = datetime(2030, 1, 7, 9, tzinfo=timezone.utc)
+    events = [full_event(i, start + timedelta(hours=i)) for i in range(args.events)]
+    server = StandInServer(events, args.latency_ms / 1000)
+
+    document = json.loads(discovery_cache.get_static_doc("calendar", "v3"))
+    service = build_from_document(document, http=httplib2.Http(), client_options={"api_endpoint": server.base_url})
+    time_min = start.isoformat()
+    time_max = (start + timedelta(hours=args.events)).isoformat()
+
+    print(f"{'variant':<28} {'events':>7} {'requests':>9} {'KiB':>10} {'ms':>10}")
+    measure(server, "before (first page only)", lambda: legacy_list(service, time_min, time_max))
+    measure(server, "paged, full resources", lambda: list(iter_events(service, time_min, time_max, fields=None)))
+    measure(server, "paged, field mask", lambda: list(iter_events(service, time_min, time_max)))
+    measure(server, "paged, mask, max_events=50", lambda: list(iter_events(service, time_min, time_max, max_events=50)))
+    print(f"field mask: {LIST_EVENTS_FIELDS}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: end-to-end supervisor latency on the fast and the standard tier.
+
+Sends the same requests through SupervisorAgent with its model on each tier.
+Sub-agents are replaced by stubs answering instantly, so the numbers are the
+supervisor's own model calls: choosing the sub-agent and relaying its answer.
+The pre-router and the response cache are disabled so every request reaches
+the model. Needs GOOGLE_API_KEY and makes real model calls.
+
+Usage:
+    python benchmarks/bench_model_tiers.py [--rounds 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agents.base import BaseAgent
+from app.agents.supervisor import SupervisorAgent
+from app.core.config import config
+from app.core.context import AgentContext
+from app.core.models import ModelRegistry, tier_models
+from app.core.utils import console
+
+REQUESTS = [
+    "What's on my calendar tomorrow?",
+    "Schedule a 30 minute sync with ana@example.com on Friday at 10am",
+    "Email bob@example.com that the report is ready",
+    "Am I free on Thursday afternoon?",
+]
+
+def stub(answer):
+    agent = MagicMock(spec=BaseAgent)
+    agent.invoke.return_value = answer
+    return agent
+
+def run_tier(tier, rounds):
+    with patch.object(config, "SUPERVISOR_MODEL_TIER", tier), \
+            patch("app.core.models._registry", ModelRegistry()):
+        agent = SupervisorAgent(calendar_agent=stub("Done: the calendar request was handled."), email_agent=stub("Done: the email was sent."))
+    latencies = []
+    for round_number in range(rounds):
+        for i, request in enumerate(REQUESTS):
+            context = AgentContext(session_id=f"bench-{tier}-{round_number}-{i}")
+            started = time.perf_counter()
+            agent.chat(request, context=context)
+            latencies.append(time.perf_counter() - started)
+            agent.end_session(context.session_id)
+    return latencies
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rounds", type=int, default=3, help="Times each request is sent per tier")
+    args = arg_parser.parse_args()
+    if not (os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")):
+        sys.exit("GOOGLE_API_KEY is not set; this benchmark calls the real models.")
+
+    results = {}
+    with patch.object(config, "ROUTER_ENABLED", False), \
+            patch.object(config, "LLM_CACHE_ENABLED", False), \
+            patch.object(config, "CHECKPOINT_BACKEND", "memory"), \
+            patch.object(console, "quiet", True):
+        for tier in ("standard", "fast"):
+            results[tier] = run_tier(tier, args.rounds)
+
+    print(f"{len(REQUESTS)} requests x {args.rounds} rounds per tier")
+    print(f"{'tier':<10} {'model':<32} {'median ms':>10} {'p90 ms':>10}")
+    for tier, latencies in results.items():
+        ms = sorted(latency * 1000 for latency in latencies)
+        print(f"{tier:<10} {tier_models(tier)[0]:<32} {statistics.median(ms):>10.1f} {ms[int(0.9 * (len(ms) - 1))]:>10.1f}")
+    gain = 1 - statistics.median(results["fast"]) / statistics.median(results["standard"])
+    print(f"fast tier median latency gain: {gain:.0%}")
+
+if __name__ == "__main__":
+    main()
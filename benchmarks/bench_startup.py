@@ -0,0 +1,88 @@
+"""
+Benchmark: CLI startup time, failing when it regresses past a threshold.
+
+Starts main.py in fresh interpreters (imports are cached per process) with
+the console input replaced by a probe, and measures:
+  - import: time to import the main module
+  - prompt: time until the first prompt is shown
+  - ready: time until the supervisor takes its first message
+The medians are compared against the thresholds and the script exits with
+status 1 if any is exceeded, so it can gate CI.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--max-import-ms 300] [--max-prompt-ms 500] [--max-ready-ms 3000]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+import main
+marks = {"import": time.perf_counter() - started}
+from app.core.utils import console
+
+def probe_input(prompt=""):
+    # The first prompt asks for the user's name, the second for a message
+    marks.setdefault("prompt", time.perf_counter() - started)
+    if "You:" in str(prompt):
+        marks["ready"] = time.perf_counter() - started
+    raise EOFError
+
+console.input = probe_input
+main.main()
+sys.__stdout__.write("\n" + json.dumps(marks) + "\n")
+"""
+
+def measure() -> dict:
+    env = dict(os.environ)
+    # The Gemini client is built but never called; threads are kept in memory
+    env.setdefault("GOOGLE_API_KEY", "startup-benchmark")
+    env["CHECKPOINT_BACKEND"] = "memory"
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+        stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=120,
+    )
+    lines = result.stdout.strip().splitlines()
+    try:
+        marks = json.loads(lines[-1])
+    except (IndexError, ValueError):
+        raise RuntimeError(f"Startup probe failed:\n{result.stdout}\n{result.stderr}")
+    if "ready" not in marks:
+        raise RuntimeError(f"The agent did not start:\n{result.stdout}\n{result.stderr}")
+    return marks
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--max-import-ms", type=float, default=300, help="Threshold for importing main")
+    arg_parser.add_argument("--max-prompt-ms", type=float, default=500, help="Threshold for the first prompt")
+    arg_parser.add_argument("--max-ready-ms", type=float, default=3000, help="Threshold for taking the first message")
+    args = arg_parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    thresholds = {"import": args.max_import_ms, "prompt": args.max_prompt_ms, "ready": args.max_ready_ms}
+
+    print(f"{args.runs} runs")
+    print(f"{'phase':<8} {'median ms':>10} {'max ms':>10} {'limit ms':>10}")
+    failed = []
+    for phase, limit in thresholds.items():
+        values = [run[phase] * 1000 for run in runs]
+        median = statistics.median(values)
+        print(f"{phase:<8} {median:>10.1f} {max(values):>10.1f} {limit:>10.0f}")
+        if median > limit:
+            failed.append(phase)
+
+    if failed:
+        print(f"FAIL: startup regressed ({', '.join(failed)})")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
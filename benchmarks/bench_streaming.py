@@ -0,0 +1,112 @@
+"""
+Benchmark: time to first token of chat() versus stream().
+
+Runs the real agent graphs with a scripted model that takes a fixed time per
+token, both for a CalendarAgent on its own and for the supervisor delegating
+to it (through its model and through the intent pre-router). chat() shows
+nothing until the whole answer is back; stream() yields the first token as
+soon as the model produces it.
+
+Usage:
+    python benchmarks/bench_streaming.py [--token-ms 20] [--tokens 60]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agents.base import BaseAgent
+from app.agents.calendar import CalendarAgent
+from app.agents.supervisor import SupervisorAgent
+from app.core.router import IntentRouter
+from app.core.streaming import Token
+from app.core.utils import console
+
+class SlowModel(GenericFakeChatModel):
+    """Takes `token_delay` seconds per whitespace-separated token, streamed or not."""
+    token_delay: float = 0.0
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = next(self.messages)
+        time.sleep(self.token_delay * max(len(message.content.split()), 1))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = next(self.messages)
+        for word in message.content.split(" "):
+            time.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_calls=message.tool_calls))
+
+def with_model(agent, delay, *replies):
+    agent.llm = SlowModel(messages=iter(replies), token_delay=delay)
+    agent.agent_executor = agent._create_agent_executor()
+    return agent
+
+def calendar(delay, answer):
+    return with_model(CalendarAgent(), delay, AIMessage(content=answer))
+
+def supervisor(delay, answer, routed):
+    call = {"name": "schedule_event", "args": {"request": "What's on my calendar tomorrow?"}, "id": "call_0"}
+    return with_model(
+        SupervisorAgent(calendar_agent=calendar(delay, answer), email_agent=MagicMock(spec=BaseAgent), router=IntentRouter(enabled=routed)),
+        delay, AIMessage(content="", tool_calls=[call]), AIMessage(content="Here is your day."),
+    )
+
+def chat_latency(agent):
+    started = time.perf_counter()
+    agent.chat("What's on my calendar tomorrow?")
+    return time.perf_counter() - started
+
+def stream_latency(agent):
+    """Returns the time to the first token and to the end of the stream."""
+    started = time.perf_counter()
+    first = None
+    for event in agent.stream("What's on my calendar tomorrow?"):
+        if first is None and isinstance(event, Token):
+            first = time.perf_counter() - started
+    return first, time.perf_counter() - started
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--token-ms", type=float, default=20, help="Simulated time per generated token")
+    arg_parser.add_argument("--tokens", type=int, default=60, help="Tokens in the sub-agent's answer")
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.INFO)
+    delay = args.token_ms / 1000
+    answer = " ".join(["word"] * args.tokens)
+    variants = [
+        ("calendar agent", lambda: calendar(delay, answer)),
+        ("supervisor -> calendar", lambda: supervisor(delay, answer, routed=False)),
+        ("pre-routed -> calendar", lambda: supervisor(delay, answer, routed=True)),
+    ]
+
+    print(f"{args.tokens} tokens, {args.token_ms:.0f} ms per token")
+    print(f"{'variant':<24} {'chat() ms':>10} {'first token ms':>15} {'stream end ms':>14}")
+    # Agents are built without a Gemini client and keep their threads in memory
+    with patch("app.core.models.ChatGoogleGenerativeAI"), \
+            patch("app.core.config.config.CHECKPOINT_BACKEND", "memory"), \
+            patch.object(console, "quiet", True):
+        for name, build in variants:
+            blocking = chat_latency(build())
+            first, total = stream_latency(build())
+            print(f"{name:<24} {blocking * 1000:>10.1f} {first * 1000:>15.1f} {total * 1000:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,6 @@
-from app.agents.supervisor import SupervisorAgent
-from app.agents.calendar import CalendarAgent
-from app.agents.email import EmailAgent
 import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from rich.logging import RichHandler
 
 # Force UTF-8 encoding for Windows
@@ -21,16 +19,29 @@ logging.basicConfig(
 from app.core.utils import console
 from rich.panel import Panel
 
+def build_agent():
+    """
+    Builds the supervisor. LangChain and the Gemini client are imported here
+    rather than at module load; the sub-agents are built on first delegation.
+    """
+    from app.agents.supervisor import SupervisorAgent
+    return SupervisorAgent()
+
 def main():
     console.print(Panel.fit("[bold white]Multi-Agent Productivity Suite[/]", style="bold blue", title="Welcome"))
-    
+
     try:
-        # Initialize agents with dependency injection
-        calendar_agent = CalendarAgent()
-        email_agent = EmailAgent()
-        
-        agent = SupervisorAgent(calendar_agent=calendar_agent, email_agent=email_agent)
-        agent.run_interactive()
+        # Load the agent in the background while the user types their name
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="startup") as executor:
+            agent_future = executor.submit(build_agent)
+            try:
+                user_name = console.input("[bold yellow]Enter your name (default: User): [/]") or "User"
+            except EOFError:
+                user_name = "User"
+            agent = agent_future.result()
+
+        from app.core.context import AgentContext
+        agent.run_interactive(context=AgentContext(user_name=user_name))
     except Exception as e:
         print(f"Failed to start the agent: {e}")
 
@@ -0,0 +1,133 @@
+"""
+Multi-user HTTP server for the productivity suite.
+
+Every conversation is a session with its own history. Requests of different
+sessions are processed in parallel on a bounded worker pool.
+
+Endpoints:
+    POST   /chat               {"message": "...", "session_id": "...", "user_name": "...", "time_zone": "Europe/Berlin"}
+                               -> {"session_id": "...", "response": "..."}
+                               Omit session_id to start a new session.
+    DELETE /sessions/<id>      Ends a session and drops its history (409 while a turn is running).
+    GET    /health             Session and worker counts.
+
+Usage:
+    python server.py [--host 127.0.0.1] [--port 8000] [--verbose]
+"""
+import argparse
+import json
+import logging
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from rich.logging import RichHandler
+
+from app.agents.calendar import CalendarAgent
+from app.agents.email import EmailAgent
+from app.agents.supervisor import SupervisorAgent
+from app.core.config import config
+from app.core.sessions import SessionManager
+from app.core.utils import console
+
+logger = logging.getLogger(__name__)
+
+def make_handler(sessions: SessionManager):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok", **sessions.stats()})
+            else:
+                self._send(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if self.path != "/chat":
+                self._send(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send(400, {"error": "Body must be JSON"})
+                return
+            message = payload.get("message")
+            if not isinstance(message, str) or not message.strip():
+                self._send(400, {"error": "'message' is required"})
+                return
+            time_zone = payload.get("time_zone") or None
+            if time_zone is not None:
+                try:
+                    ZoneInfo(time_zone)
+                except (ZoneInfoNotFoundError, ValueError, TypeError):
+                    self._send(400, {"error": f"Unknown time zone: {time_zone}"})
+                    return
+
+            session_id, response = sessions.chat(
+                payload.get("session_id"),
+                message,
+                user_name=payload.get("user_name") or "User",
+                time_zone=time_zone,
+            )
+            self._send(200, {"session_id": session_id, "response": str(response)})
+
+        def do_DELETE(self):
+            prefix = "/sessions/"
+            if not self.path.startswith(prefix):
+                self._send(404, {"error": "Not found"})
+                return
+            try:
+                ended = sessions.end(self.path[len(prefix):])
+            except RuntimeError as e:
+                self._send(409, {"error": str(e)})
+                return
+            if ended:
+                self._send(200, {"status": "ended"})
+            else:
+                self._send(404, {"error": "Unknown session"})
+
+        def _send(self, status: int, body: dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logger.info(f"{self.address_string()} {format % args}")
+
+    return Handler
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Multi-user HTTP server for the productivity suite.")
+    arg_parser.add_argument("--host", default=config.SERVER_HOST)
+    arg_parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    arg_parser.add_argument("--verbose", action="store_true", help="Print every agent step to the console")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(message)s',
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks=True, markup=True)]
+    )
+    # Agent steps of many sessions would interleave on one console
+    console.quiet = not args.verbose
+
+    # One set of agents serves every session; each session uses its own checkpoint thread
+    agent = SupervisorAgent(calendar_agent=CalendarAgent(), email_agent=EmailAgent())
+    sessions = SessionManager(agent)
+    sessions.start()
+
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(sessions))
+    logger.info(f"Serving on http://{args.host}:{args.port} with {sessions.max_workers} workers")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        sessions.shutdown()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,8 +9,12 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 @pytest.fixture
 def mock_llm():
-    """Mock the ChatGoogleGenerativeAI class."""
-    with unittest.mock.patch('app.agents.base.ChatGoogleGenerativeAI') as MockLLM:
+    """Mock the ChatGoogleGenerativeAI class, with a fresh model registry and no fallback models."""
+    from app.core.models import ModelRegistry
+    with unittest.mock.patch('app.core.models.ChatGoogleGenerativeAI') as MockLLM, \
+            unittest.mock.patch('app.core.models._registry', ModelRegistry()), \
+            unittest.mock.patch('app.core.config.config.FALLBACK_MODEL_NAME', ""), \
+            unittest.mock.patch('app.core.config.config.FAST_FALLBACK_MODEL_NAME', ""):
         mock_instance = MockLLM.return_value
         yield mock_instance
 
@@ -37,3 +41,9 @@ def mock_prompt_loader():
         # Mock get_prompt to return a simple string
         MockLoader.get_prompt.return_value = "Mock Prompt"
         yield MockLoader
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path):
+    """Keep agent checkpoint databases out of the working tree."""
+    with unittest.mock.patch('app.core.config.config.CHECKPOINT_DIR', str(tmp_path / "checkpoints")):
+        yield tmp_path / "checkpoints"
@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from unittest.mock import patch
+from google.oauth2.credentials import Credentials
+from app.core.auth import CredentialManager
+
+SCOPES = ["https://www.googleapis.com/auth/calendar"]
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _write_token(path, token, expires_in):
+    creds = Credentials(
+        token=token,
+        refresh_token="refresh",
+        client_id="client",
+        client_secret="secret",
+        token_uri="https://oauth2.googleapis.com/token",
+        scopes=SCOPES,
+        expiry=_utcnow() + timedelta(seconds=expires_in),
+    )
+    path.write_text(creds.to_json())
+
+def _fake_refresh(creds, request):
+    time.sleep(0.05)
+    creds.token = "refreshed"
+    creds.expiry = _utcnow() + timedelta(hours=1)
+
+@pytest.fixture
+def token_file(tmp_path):
+    return tmp_path / "token.json"
+
+def _manager(token_file):
+    return CredentialManager(token_file=str(token_file), scopes=SCOPES, refresh_margin=300, background=False)
+
+def test_valid_token_loaded_once(token_file):
+    """Test that fresh credentials are read from disk once and then served from memory."""
+    _write_token(token_file, "fresh", expires_in=3600)
+    manager = _manager(token_file)
+
+    with patch('app.core.auth.Credentials.from_authorized_user_file', wraps=Credentials.from_authorized_user_file) as mock_load:
+        first = manager.get_credentials()
+        second = manager.get_credentials()
+
+    assert first is second
+    assert first.token == "fresh"
+    mock_load.assert_called_once()
+
+def test_proactive_refresh_before_expiry(token_file):
+    """Test that credentials inside the refresh margin are refreshed and saved atomically."""
+    _write_token(token_file, "stale", expires_in=60)
+    manager = _manager(token_file)
+
+    with patch.object(Credentials, 'refresh', autospec=True, side_effect=_fake_refresh):
+        creds = manager.get_credentials()
+
+    assert creds.token == "refreshed"
+    assert json.loads(token_file.read_text())["token"] == "refreshed"
+    assert not list(token_file.parent.glob(".token-*.tmp"))
+
+def test_single_flight_refresh(token_file):
+    """Test that concurrent callers share a single in-flight refresh."""
+    _write_token(token_file, "stale", expires_in=60)
+    manager = _manager(token_file)
+    results = []
+
+    with patch.object(Credentials, 'refresh', autospec=True, side_effect=_fake_refresh) as mock_refresh:
+        threads = [threading.Thread(target=lambda: results.append(manager.get_credentials())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert mock_refresh.call_count == 1
+    assert len({id(c) for c in results}) == 1
+
+def test_adopts_token_refreshed_by_other_process(token_file):
+    """Test that a token refreshed on disk by another process is adopted in place."""
+    _write_token(token_file, "stale", expires_in=60)
+    manager = _manager(token_file)
+    manager._creds = Credentials.from_authorized_user_file(str(token_file), SCOPES)
+    held = manager._creds
+
+    _write_token(token_file, "from-other-process", expires_in=3600)
+    with patch.object(Credentials, 'refresh', autospec=True) as mock_refresh:
+        creds = manager.get_credentials()
+
+    mock_refresh.assert_not_called()
+    assert creds is held
+    assert creds.token == "from-other-process"
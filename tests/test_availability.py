@@ -0,0 +1,94 @@
+import random
+from datetime import datetime
+from app.core.availability import merge_intervals, free_gaps, find_slots, off_hours, rank_slots
+from app.tools.calendar import get_available_time_slots
+from app.core.config import config
+
+def _brute_force_slots(busy, window_start, window_end, duration, granularity):
+    """The original per-candidate overlap scan, used as a reference."""
+    slots = []
+    current = window_start
+    while current + duration <= window_end:
+        if not any(current < b_end and current + duration > b_start for b_start, b_end in busy):
+            slots.append(current)
+        current += granularity
+    return slots
+
+def test_merge_intervals_overlapping_and_unsorted():
+    """Test that overlapping and touching intervals are merged regardless of input order."""
+    starts, ends = merge_intervals([50, 0, 10, 100], [60, 20, 30, 110])
+    assert list(starts) == [0, 50, 100]
+    assert list(ends) == [30, 60, 110]
+
+def test_free_gaps_clipped_to_window():
+    """Test that gaps are clipped to the search window."""
+    starts, ends = free_gaps([0, 40], [20, 200], window_start=10, window_end=100)
+    assert list(zip(starts, ends)) == [(20, 40)]
+
+def test_buffer_pads_busy_intervals():
+    """Test that the buffer keeps time free around busy intervals."""
+    slots = find_slots([3600], [7200], 0, 4 * 3600, duration=1800, granularity=1800, buffer=900)
+    assert list(slots) == [0, 9000, 10800, 12600]
+
+def test_find_slots_matches_brute_force():
+    """Test the sweep-line engine against the original scan on random calendars."""
+    rng = random.Random(42)
+    for _ in range(50):
+        window_start, window_end = 0, 9 * 3600
+        busy = []
+        for _ in range(rng.randint(0, 30)):
+            start = rng.randrange(-3600, window_end, 300)
+            busy.append((start, start + rng.randrange(300, 7200, 300)))
+        duration = rng.choice([900, 1800, 3600])
+        granularity = rng.choice([300, 900, 1800])
+
+        expected = _brute_force_slots(busy, window_start, window_end, duration, granularity)
+        actual = find_slots(
+            [b[0] for b in busy], [b[1] for b in busy],
+            window_start, window_end, duration, granularity,
+        )
+        assert list(actual) == expected
+
+def test_get_available_time_slots_uses_engine(mock_calendar_service):
+    """Test that the tool skips busy time on a future date and reports the free range."""
+    busy_start = datetime(2099, 1, 5, 8).astimezone().isoformat()
+    busy_end = datetime(2099, 1, 5, 9).astimezone().isoformat()
+    mock_calendar_service.freebusy.return_value.query.return_value.execute.return_value = {
+        "calendars": {config.CALENDAR_ID: {"busy": [{"start": busy_start, "end": busy_end}]}}
+    }
+
+    result = get_available_time_slots.invoke({"attendees": [], "date": "2099-01-05", "duration_minutes": 60})
+
+    last_start = datetime(2099, 1, 5, 16).astimezone().isoformat()
+    assert result == [f"{busy_end} to {last_start} (any start every 30 min)"]
+
+def test_off_hours_respects_time_zone():
+    """Test that working hours are applied in the attendee's own time zone."""
+    from datetime import time, timezone
+    from zoneinfo import ZoneInfo
+    tz = ZoneInfo("America/New_York")
+    # Monday 2030-01-07, 00:00 to 24:00 UTC
+    window_start = int(datetime(2030, 1, 7, tzinfo=timezone.utc).timestamp())
+    window_end = window_start + 24 * 3600
+
+    starts, ends = off_hours(window_start, window_end, time(9), time(17), tz)
+
+    # 09:00-17:00 EST is 14:00-22:00 UTC
+    assert list(zip(starts, ends)) == [(window_start, window_start + 14 * 3600), (window_start + 22 * 3600, window_end)]
+
+def test_off_hours_skips_weekends():
+    """Test that weekends are treated as off hours unless included."""
+    from datetime import time, timezone
+    saturday = int(datetime(2030, 1, 12, tzinfo=timezone.utc).timestamp())
+    window_end = saturday + 2 * 24 * 3600
+
+    starts, ends = off_hours(saturday, window_end, time(9), time(17), timezone.utc)
+    assert list(zip(starts, ends)) == [(saturday, window_end)]
+
+    starts, ends = off_hours(saturday, window_end, time(9), time(17), timezone.utc, include_weekends=True)
+    assert len(starts) == 3
+
+def test_rank_slots_spreads_across_gaps():
+    """Test that ranking offers the start of every gap before repeating a gap."""
+    ranked = rank_slots([0, 10000], [3600, 13600], duration=1800, granularity=900, origin=0, limit=4)
+    assert ranked == [0, 10800, 900, 11700]
@@ -1,9 +1,37 @@
 import pytest
-from unittest.mock import MagicMock
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from googleapiclient.errors import HttpError
+from pydantic import ValidationError
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from app.agents.base import BaseAgent
 from app.agents.calendar import CalendarAgent
-from app.tools.calendar import list_events, create_event, get_available_time_slots
+from app.agents.supervisor import SupervisorAgent
+from app.core.context import AgentContext
+from app.tools.calendar import list_events, create_event, create_events_bulk, get_available_time_slots, find_meeting_slots
 from app.core.config import config
 
+class FakeBatch:
+    """Stands in for BatchHttpRequest, answering each insert from `responder`."""
+    def __init__(self, responder, callback, sizes):
+        self.responder = responder
+        self.callback = callback
+        self.sizes = sizes
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append(request_id)
+
+    def execute(self):
+        self.sizes.append(len(self.requests))
+        for request_id in self.requests:
+            response, exception = self.responder(int(request_id))
+            self.callback(request_id, response, exception)
+
 class TestCalendarAgent:
     def test_initialization(self, mock_llm, mock_prompt_loader):
         """Test that the agent initializes correctly."""
@@ -30,6 +58,44 @@ class TestCalendarAgent:
         assert "Meeting B" in result
         mock_calendar_service.events.return_value.list.assert_called_once()
 
+    def test_list_events_follows_pages(self, mock_calendar_service):
+        """Test that list_events streams every page and requests a field mask."""
+        pages = [
+            {"items": [{"start": {"dateTime": "2024-01-01T10:00:00"}, "summary": "Meeting A"}], "nextPageToken": "page2"},
+            {"items": [{"start": {"dateTime": "2024-01-01T14:00:00"}, "summary": "Meeting B"}]},
+        ]
+        mock_list = mock_calendar_service.events.return_value.list
+        mock_list.return_value.execute.side_effect = pages
+
+        result = list_events.invoke({"start_datetime": "2024-01-01T00:00:00", "end_datetime": "2024-01-01T23:59:59"})
+
+        assert "Meeting A" in result
+        assert "Meeting B" in result
+        assert mock_list.call_count == 2
+        assert mock_list.call_args_list[1].kwargs["pageToken"] == "page2"
+        assert mock_list.call_args.kwargs["fields"] == "items(start,summary),nextPageToken"
+
+    def test_list_events_max_events(self, mock_calendar_service):
+        """Test that max_events caps the result and stops paging early."""
+        items = [{"start": {"dateTime": f"2024-01-01T{h:02d}:00:00"}, "summary": f"Meeting {h}"} for h in range(9, 13)]
+        mock_list = mock_calendar_service.events.return_value.list
+        mock_list.return_value.execute.return_value = {"items": items, "nextPageToken": "more"}
+
+        result = list_events.invoke({"start_datetime": "2024-01-01T00:00:00", "end_datetime": "2024-01-01T23:59:59", "max_events": 2})
+
+        assert "Meeting 9" in result and "Meeting 10" in result
+        assert "Meeting 11" not in result
+        assert "showing the first 2" in result
+        mock_list.assert_called_once()
+        assert mock_list.call_args.kwargs["maxResults"] == 3
+
+    @pytest.mark.parametrize("max_events", [0, -2])
+    def test_list_events_rejects_bad_max_events(self, mock_calendar_service, max_events):
+        """Test that max_events must be at least 1."""
+        with pytest.raises(ValidationError):
+            list_events.invoke({"start_datetime": "2024-01-01T00:00:00", "end_datetime": "2024-01-01T23:59:59", "max_events": max_events})
+        mock_calendar_service.events.return_value.list.assert_not_called()
+
     def test_create_event_tool(self, mock_calendar_service):
         """Test the create_event tool."""
         # Setup mock response
@@ -49,6 +115,60 @@ class TestCalendarAgent:
         assert "http://calendar.google.com/event123" in result
         mock_calendar_service.events.return_value.insert.assert_called_once()
 
+    def test_tools_use_users_time_zone(self, mock_calendar_service):
+        """Test that naive times and the default search zone follow the user's time zone."""
+        runtime = SimpleNamespace(context=AgentContext(time_zone="Europe/Berlin"))
+        insert = mock_calendar_service.events.return_value.insert
+        insert.return_value.execute.return_value = {"htmlLink": "http://calendar.google.com/event123"}
+        mock_calendar_service.freebusy.return_value.query.return_value.execute.return_value = {"calendars": {}}
+
+        with patch('app.core.utils.config.TIME_ZONE', "America/New_York"):
+            create_event.invoke({
+                "title": "Standup",
+                "start_datetime": "2030-01-07T15:00:00",
+                "end_datetime": "2030-01-07T15:30:00",
+                "runtime": runtime,
+            })
+            result = find_meeting_slots.invoke({
+                "attendees": [],
+                "start_date": "2030-01-07",
+                "end_date": "2030-01-07",
+                "runtime": runtime,
+            })
+
+        assert insert.call_args.kwargs["body"]["start"]["dateTime"] == "2030-01-07T15:00:00+01:00"
+        assert mock_calendar_service.freebusy.return_value.query.call_args.kwargs["body"]["timeZone"] == "Europe/Berlin"
+        assert result[0] == f"2030-01-07T{config.WORKDAY_START}:00+01:00"
+
+    def test_find_meeting_slots_names_the_system_time_zone(self, mock_calendar_service):
+        """Test that the organizer's local zone is sent by its IANA name and an attendee in UTC stays in UTC."""
+        query = mock_calendar_service.freebusy.return_value.query
+        query.return_value.execute.return_value = {"calendars": {}}
+        request = {
+            "attendees": ["ana@example.com"],
+            "start_date": "2030-01-07",
+            "end_date": "2030-01-07",
+            "working_hours": {
+                config.CALENDAR_ID: {"start": "08:00", "end": "17:00"},
+                "ana@example.com": {"start": "08:00", "end": "17:00", "time_zone": "UTC"},
+            },
+            "top_n": 20,
+        }
+
+        with patch('app.core.utils.config.TIME_ZONE', ""), \
+             patch('app.core.utils.system_time_zone_name', return_value="America/New_York"):
+            result = find_meeting_slots.invoke(request)
+        with patch('app.core.utils.config.TIME_ZONE', ""), \
+             patch('app.core.utils.system_time_zone_name', return_value=None):
+            unnamed = find_meeting_slots.invoke(request)
+
+        assert query.call_args_list[0].kwargs["body"]["timeZone"] == "America/New_York"
+        # New York works 08:00-17:00 (-05:00), Ana 08:00-17:00 UTC: 08:00-12:00 in New York
+        assert min(result) == "2030-01-07T08:00:00-05:00"
+        assert max(result) == "2030-01-07T11:30:00-05:00"
+        assert "set TIME_ZONE" in unnamed[0]
+        assert query.call_count == 1
+
     def test_get_available_time_slots_tool(self, mock_calendar_service):
         """Test the get_available_time_slots tool."""
         # Setup mock freebusy response
@@ -79,3 +199,138 @@ class TestCalendarAgent:
         # This is a bit complex to assert exactly without mocking datetime.now() and timezone, 
         # but we can check that we got slots.
         assert len(result) > 0
+
+    def test_find_meeting_slots_tool(self, mock_calendar_service):
+        """Test the find_meeting_slots tool with chunked queries and per-attendee hours."""
+        mock_calendar_service.freebusy.return_value.query.return_value.execute.return_value = {
+            "calendars": {
+                config.CALENDAR_ID: {"busy": [{"start": "2099-01-05T08:00:00Z", "end": "2099-01-05T10:00:00Z"}]},
+                "missing@example.com": {"busy": [], "errors": [{"domain": "global", "reason": "notFound"}]},
+            }
+        }
+        attendees = [f"user{i}@example.com" for i in range(120)]
+
+        result = find_meeting_slots.invoke({
+            "attendees": attendees,
+            "start_date": "2099-01-05",
+            "end_date": "2099-01-05",
+            "duration_minutes": 60,
+            "time_zone": "UTC",
+            "working_hours": {"user0@example.com": {"start": "10:00", "end": "18:00", "time_zone": "Europe/Berlin"}},
+            "top_n": 3,
+        })
+
+        # 121 calendars are split into chunks of 50
+        assert mock_calendar_service.freebusy.return_value.query.call_count == 3
+        # Organizer busy until 10:00 UTC, user0 works 09:00-17:00 UTC
+        assert result[:3] == ["2099-01-05T10:00:00+00:00", "2099-01-05T10:30:00+00:00", "2099-01-05T11:00:00+00:00"]
+        assert result[-1] == "Could not check availability for: missing@example.com"
+
+    def test_create_events_bulk_tool(self, mock_calendar_service):
+        """Test that bulk creation batches inserts and retries only transient failures."""
+        sizes = []
+        attempts = {}
+
+        def responder(index):
+            attempts[index] = attempts.get(index, 0) + 1
+            if index == 3 and attempts[index] == 1:
+                return None, HttpError(MagicMock(status=503), b"Backend Error")
+            if index == 4:
+                return None, HttpError(MagicMock(status=400), b"Bad Request")
+            return {"id": f"e{index}", "htmlLink": f"http://calendar.google.com/e{index}"}, None
+
+        mock_calendar_service.new_batch_http_request.side_effect = (
+            lambda callback: FakeBatch(responder, callback, sizes)
+        )
+        events = [
+            {"title": f"1:1 with person {i}", "start_datetime": f"2099-01-05T{9 + i:02d}:00:00", "end_datetime": f"2099-01-05T{9 + i:02d}:30:00", "attendees": [f"p{i}@example.com"]}
+            for i in range(5)
+        ] + [{"title": "Broken", "start_datetime": "not a date", "end_datetime": "2099-01-05T10:00:00"}]
+
+        with patch('app.tools.calendar.config.CALENDAR_BATCH_SIZE', 2), \
+             patch('app.tools.calendar.sleep_before_retry') as mock_sleep:
+            result = create_events_bulk.invoke({"events": events})
+
+        lines = result.splitlines()
+        assert lines[0] == "Created 4 of 6 events."
+        assert "http://calendar.google.com/e3" in lines[4]
+        assert "Error creating event" in lines[5]
+        assert "Error parsing dates" in lines[6]
+        # 5 valid items in batches of 2, then a retry batch for the single 503
+        assert sizes == [2, 2, 1, 1]
+        assert attempts == {0: 1, 1: 1, 2: 1, 3: 2, 4: 1}
+        mock_sleep.assert_called_once_with(1)
+
+    def test_create_events_bulk_keeps_earlier_batches_when_one_fails(self, mock_calendar_service):
+        """Test that a batch failing as a whole only retries its own events."""
+        sizes = []
+        attempts = {}
+        batches = []
+
+        def responder(index):
+            attempts[index] = attempts.get(index, 0) + 1
+            return {"id": f"e{index}", "htmlLink": f"http://calendar.google.com/e{index}"}, None
+
+        def new_batch(callback):
+            batch = FakeBatch(responder, callback, sizes)
+            batches.append(batch)
+            if len(batches) == 2:
+                # The second of three batches is rejected before any item is answered
+                batch.execute = MagicMock(side_effect=HttpError(MagicMock(status=503), b"Backend Error"))
+            return batch
+
+        mock_calendar_service.new_batch_http_request.side_effect = new_batch
+        events = [
+            {"title": f"Event {i}", "start_datetime": f"2099-01-05T{9 + i:02d}:00:00", "end_datetime": f"2099-01-05T{9 + i:02d}:30:00"}
+            for i in range(6)
+        ]
+
+        with patch('app.tools.calendar.config.CALENDAR_BATCH_SIZE', 2), \
+             patch('app.tools.calendar.sleep_before_retry'):
+            result = create_events_bulk.invoke({"events": events})
+
+        lines = result.splitlines()
+        assert lines[0] == "Created 6 of 6 events."
+        assert "http://calendar.google.com/e0" in lines[1]
+        assert "http://calendar.google.com/e1" in lines[2]
+        # Batches 1 and 3 went through once; only batch 2's events were sent again
+        assert sizes == [2, 2, 2]
+        assert attempts == {0: 1, 1: 1, 2: 1, 3: 1, 4: 1, 5: 1}
+        assert batches[3].requests == ["2", "3"]
+
+class PromptRecordingModel(GenericFakeChatModel):
+    """Answers every call and remembers the system prompts it was given."""
+    prompts: list = []
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, *args, **kwargs):
+        self.prompts.append(messages[0].content)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+def test_prompt_carries_date_in_users_time_zone(mock_llm):
+    """Test that every request gets the current date in the user's time zone, without rebuilding the graph."""
+    agent = CalendarAgent()
+    agent.llm = PromptRecordingModel(messages=iter([]), prompts=[])
+    agent.agent_executor = agent._create_agent_executor()
+    graph = agent.agent_executor
+
+    # 25 hours apart, so the dates always differ
+    for zone in ["Pacific/Kiritimati", "Pacific/Pago_Pago"]:
+        agent.chat("What's on today?", context=AgentContext(session_id=zone, time_zone=zone))
+        today = datetime.now(ZoneInfo(zone)).date().isoformat()
+        assert f"Today's date is {today}. The user's time zone is {zone}." in agent.llm.prompts[-1]
+
+    assert agent.agent_executor is graph
+    assert agent.llm.prompts[0] != agent.llm.prompts[1]
+
+def test_compiled_graph_is_shared(mock_llm, mock_prompt_loader):
+    """Test that agents of one class share their compiled graph, unlike supervisors."""
+    first, second = CalendarAgent(), CalendarAgent()
+    assert first.agent_executor is second.agent_executor
+    assert first.history is second.history
+    assert first.checkpointer is second.checkpointer
+
+    supervisors = [SupervisorAgent(calendar_agent=first, email_agent=MagicMock(spec=BaseAgent)) for _ in range(2)]
+    assert supervisors[0].agent_executor is not supervisors[1].agent_executor
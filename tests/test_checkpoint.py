@@ -0,0 +1,109 @@
+import time
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from app.agents.calendar import CalendarAgent
+from app.core.checkpoint import CompressedSerializer, SQLiteSaver, create_checkpointer
+from app.core.context import AgentContext
+
+class ScriptedModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+def _agent(checkpointer, replies):
+    agent = CalendarAgent()
+    agent.checkpointer = checkpointer
+    agent.llm = ScriptedModel(messages=iter([AIMessage(content=r) for r in replies]))
+    agent.agent_executor = agent._create_agent_executor()
+    return agent
+
+def _history(agent, session_id="default"):
+    state = agent.agent_executor.get_state({"configurable": {"thread_id": session_id}})
+    return [m.content for m in state.values.get("messages", [])]
+
+def test_compressed_serializer_round_trips():
+    """Test that large payloads are compressed and everything decodes unchanged."""
+    serde = CompressedSerializer()
+    big = {"text": "meeting notes " * 200}
+
+    type_, data = serde.dumps_typed(big)
+    assert type_.endswith("+zlib")
+    assert len(data) < len("meeting notes " * 200)
+    assert serde.loads_typed((type_, data)) == big
+    assert serde.loads_typed(serde.dumps_typed("hi")) == "hi"
+
+def test_state_survives_restart(mock_llm, mock_prompt_loader, tmp_path):
+    """Test that a conversation continues from disk with a new saver instance."""
+    path = str(tmp_path / "agent.sqlite")
+    _agent(SQLiteSaver(path), ["first reply"]).chat("hello")
+
+    agent = _agent(SQLiteSaver(path), ["second reply"])
+    agent.chat("again")
+    assert _history(agent) == ["hello", "first reply", "again", "second reply"]
+
+def test_superseded_checkpoints_are_pruned(mock_llm, mock_prompt_loader):
+    """Test that only the newest checkpoints are kept and the latest state is intact."""
+    saver = SQLiteSaver(max_depth=3, ttl=0)
+    agent = _agent(saver, [f"reply {i}" for i in range(10)])
+    for i in range(10):
+        agent.chat(f"message {i}")
+
+    stats = saver.stats()
+    assert stats["checkpoints"] == 3
+    assert stats["pruned_checkpoints"] > 0
+    assert _history(agent)[-2:] == ["message 9", "reply 9"]
+    assert len(_history(agent)) == 20
+
+def test_idle_threads_expire(mock_llm, mock_prompt_loader):
+    """Test that threads not written to within the TTL are deleted."""
+    saver = SQLiteSaver(ttl=0)
+    agent = _agent(saver, ["a", "b"])
+    agent.chat("old", context=AgentContext(session_id="old"))
+    time.sleep(0.05)
+    agent.chat("fresh", context=AgentContext(session_id="fresh"))
+
+    assert saver.expire_idle(ttl=0.03) == 1
+    assert _history(agent, "old") == []
+    assert _history(agent, "fresh") == ["fresh", "b"]
+
+def test_delete_thread_removes_everything(mock_llm, mock_prompt_loader):
+    """Test that ending a session leaves no rows behind."""
+    saver = SQLiteSaver()
+    agent = _agent(saver, ["reply"])
+    agent.chat("hello", context=AgentContext(session_id="s1"))
+
+    agent.end_session("s1")
+    stats = saver.stats()
+    assert (stats["threads"], stats["checkpoints"], stats["blobs"], stats["writes"]) == (0, 0, 0, 0)
+
+def test_create_checkpointer_backends(checkpoint_dir):
+    """Test that the backend is selected by configuration, one database per agent."""
+    saver = create_checkpointer("CalendarAgent")
+    assert isinstance(saver, SQLiteSaver)
+    assert (checkpoint_dir / "CalendarAgent.sqlite").exists()
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("app.core.config.config.CHECKPOINT_BACKEND", "memory")
+        assert isinstance(create_checkpointer("CalendarAgent"), InMemorySaver)
+        mp.setattr("app.core.config.config.CHECKPOINT_BACKEND", "redis")
+        with pytest.raises(ValueError):
+            create_checkpointer("CalendarAgent")
+
+def test_approval_interrupt_resumes_from_sqlite(mock_llm, mock_prompt_loader, mock_gmail_service):
+    """Test that a pending email approval is stored and resumed through the SQLite saver."""
+    from langgraph.types import Command
+    from app.agents.email import EmailAgent
+
+    mock_gmail_service.users().messages().send().execute.return_value = {"id": "msg-1"}
+    agent = EmailAgent()
+    agent.checkpointer = SQLiteSaver(max_depth=2)
+    call = {"name": "send_email", "args": {"to": "a@example.com", "subject": "Hi", "body": "Hello"}, "id": "call_1"}
+    agent.llm = ScriptedModel(messages=iter([AIMessage(content="", tool_calls=[call]), AIMessage(content="Sent.")]))
+    agent.agent_executor = agent._create_agent_executor()
+
+    interrupt = agent.chat("Email a@example.com")
+    assert interrupt[0].value["action_requests"][0]["name"] == "send_email"
+
+    assert agent.resume(Command(resume={"decisions": [{"type": "approve"}]})) == "Sent."
+    assert "Email sent! Message ID: msg-1" in _history(agent)
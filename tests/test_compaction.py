@@ -0,0 +1,107 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+from app.core.compaction import (
+    ResultStore, compact_events, compact_slots, estimate_tokens, fit_to_budget,
+)
+from app.core.config import config
+from app.core.context import AgentContext
+from app.tools.calendar import list_events
+from app.tools.results import get_more_results
+
+@pytest.fixture
+def store():
+    """Route compaction through a fresh result store."""
+    fresh = ResultStore(max_results=4)
+    with patch('app.core.compaction.result_store', fresh), patch('app.tools.results.result_store', fresh):
+        yield fresh
+
+def test_compact_events_groups_by_day():
+    """Test that events are grouped into one line per day."""
+    events = [
+        {"start": {"dateTime": "2024-01-01T10:00:00+00:00"}, "summary": "Meeting A"},
+        {"start": {"dateTime": "2024-01-01T14:00:00+00:00"}, "summary": "Meeting B"},
+        {"start": {"date": "2024-01-02"}, "summary": "Holiday"},
+    ]
+    assert compact_events(events, ZoneInfo("UTC")) == [
+        "2024-01-01 (Mon): 10:00 Meeting A | 14:00 Meeting B",
+        "2024-01-02 (Tue): all day Holiday",
+    ]
+
+def test_compact_events_shows_times_in_users_zone():
+    """Test that events from calendars in other zones are converted, including across midnight."""
+    events = [
+        {"start": {"dateTime": "2024-01-01T09:00:00-08:00"}, "summary": "Call with SF"},
+        {"start": {"dateTime": "2024-01-02T08:00:00+09:00"}, "summary": "Call with Tokyo"},
+    ]
+    assert compact_events(events, ZoneInfo("Europe/Berlin")) == [
+        "2024-01-01 (Mon): 18:00 Call with SF",
+        "2024-01-02 (Tue): 00:00 Call with Tokyo",
+    ]
+
+def test_compact_slots_collapses_runs():
+    """Test that consecutive slot starts collapse into ranges."""
+    slots = [
+        "2024-01-01T09:00:00+00:00", "2024-01-01T09:30:00+00:00", "2024-01-01T10:00:00+00:00",
+        "2024-01-01T13:00:00+00:00",
+    ]
+    assert compact_slots(slots, 30) == [
+        "2024-01-01T09:00:00+00:00 to 2024-01-01T10:00:00+00:00 (any start every 30 min)",
+        "2024-01-01T13:00:00+00:00",
+    ]
+
+def test_fit_to_budget_truncates_with_marker(store):
+    """Test that overflowing lines are replaced with an 'N more' marker and stored."""
+    lines = [f"line {i:03d} " + "x" * 36 for i in range(20)]
+
+    page = fit_to_budget(lines, budget=50)
+
+    assert len(page) == 4
+    assert page[-1].startswith("... 17 more.")
+    assert store.get(page[-1].split("'")[1]) == lines
+
+def test_get_more_results_pages_through(store):
+    """Test that the paging tool returns the next slice and a new marker."""
+    lines = [f"line {i:03d} " + "x" * 36 for i in range(20)]
+    marker = fit_to_budget(lines, budget=50)[-1]
+    result_id = marker.split("'")[1]
+
+    with patch.object(config, "TOOL_OUTPUT_TOKEN_BUDGET", 50):
+        page = get_more_results.invoke({"result_id": result_id, "offset": 3})
+
+    assert page.splitlines()[0].startswith("line 003")
+    assert "offset=6" in page.splitlines()[-1]
+    assert "No stored result" in get_more_results.invoke({"result_id": "missing", "offset": 0})
+
+def test_results_are_scoped_to_their_session(store):
+    """Test that a session cannot page another session's results, nor push them out."""
+    lines = [f"line {i:03d} " + "x" * 36 for i in range(20)]
+    marker = fit_to_budget(lines, budget=50, session_id="a")[-1]
+    result_id = marker.split("'")[1]
+    for _ in range(store.max_results):
+        fit_to_budget(lines, budget=50, session_id="b")
+
+    as_b = SimpleNamespace(context=AgentContext(session_id="b"))
+    as_a = SimpleNamespace(context=AgentContext(session_id="a"))
+    assert "No stored result" in get_more_results.invoke({"result_id": result_id, "offset": 3, "runtime": as_b})
+    assert get_more_results.invoke({"result_id": result_id, "offset": 3, "runtime": as_a}).startswith("line 003")
+
+    store.drop("a")
+    assert store.get(result_id, "a") is None
+
+def test_list_events_reports_tokens_saved(store, mock_calendar_service):
+    """Test that a busy range is compacted within budget and the saving is recorded."""
+    items = [
+        {"start": {"dateTime": f"2024-01-{day:02d}T{hour:02d}:00:00+00:00"}, "summary": f"Standup with team {hour}"}
+        for day in range(1, 29) for hour in range(9, 17)
+    ]
+    mock_calendar_service.events.return_value.list.return_value.execute.return_value = {"items": items}
+
+    result = list_events.invoke({"start_datetime": "2024-01-01T00:00:00", "end_datetime": "2024-01-31T23:59:59"})
+
+    assert estimate_tokens(result) <= 450
+    assert "more. Call get_more_results" in result
+    stats = store.stats()
+    assert stats["calls"] == 1
+    assert stats["tokens_saved"] > 0
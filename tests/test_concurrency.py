@@ -0,0 +1,47 @@
+import asyncio
+import contextvars
+import threading
+import time
+import pytest
+from app.core.concurrency import run_blocking
+from app.tools.calendar import list_events, create_event, create_events_bulk, get_available_time_slots, find_meeting_slots
+from app.tools.email import send_email, send_emails_bulk
+
+@pytest.mark.parametrize("tool", [
+    list_events, create_event, create_events_bulk, get_available_time_slots,
+    find_meeting_slots, send_email, send_emails_bulk,
+])
+def test_every_tool_has_async_variant(tool):
+    """Test that calendar and email tools can be awaited by async graph runs."""
+    assert tool.coroutine is not None
+
+def test_run_blocking_runs_off_loop_and_keeps_context():
+    """Test that blocking calls run on a worker thread with the caller's context variables."""
+    request_id = contextvars.ContextVar("request_id")
+
+    async def main():
+        request_id.set("abc")
+        return await run_blocking(lambda: (threading.current_thread().name, request_id.get()))
+
+    thread_name, value = asyncio.run(main())
+    assert thread_name.startswith("tool")
+    assert value == "abc"
+
+def test_async_tool_calls_overlap(mock_calendar_service):
+    """Test that several async tool calls in one step run concurrently."""
+    def slow_execute(*args, **kwargs):
+        time.sleep(0.2)
+        return {"items": []}
+    mock_calendar_service.events().list().execute.side_effect = slow_execute
+
+    args = {"start_datetime": "2030-01-01T00:00:00Z", "end_datetime": "2030-01-02T00:00:00Z"}
+
+    async def main():
+        return await asyncio.gather(*(list_events.ainvoke(args) for _ in range(3)))
+
+    started = time.monotonic()
+    results = asyncio.run(main())
+    elapsed = time.monotonic() - started
+
+    assert results == ["No events found."] * 3
+    assert elapsed < 0.5
@@ -0,0 +1,92 @@
+import os
+import time
+import pytest
+from zoneinfo import ZoneInfo
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from dateutil import parser
+from app.core.datetimes import _parse_iso, busy_arrays, clear_caches, epoch_seconds, parse_datetime
+from app.core.utils import format_dt
+
+@pytest.mark.parametrize("value", [
+    "2030-01-07T09:00:00Z",
+    "2030-01-07T09:00:00.250Z",
+    "2030-01-07T09:00:00+05:30",
+    "2030-01-07T09:00:00-08:00",
+    "2030-01-07T09:00:00",
+    "2030-01-07 09:00",
+    "2030-01-07",
+])
+def test_iso_fast_path_matches_dateutil(value):
+    """Test that ISO / RFC 3339 strings parse to the same instant as with dateutil."""
+    fast, slow = parse_datetime(value), parser.parse(value)
+    assert fast == slow
+    assert fast.utcoffset() == slow.utcoffset()
+
+def test_free_form_input_falls_back_to_dateutil():
+    """Test that non-ISO strings still parse, and garbage raises ValueError."""
+    assert parse_datetime("Jan 7 2030 9am") == parser.parse("Jan 7 2030 9am")
+    with pytest.raises(ValueError):
+        parse_datetime("not a date")
+    with pytest.raises(ValueError):
+        format_dt("not a date")
+
+def test_results_are_memoized():
+    """Test that repeated timestamps are served from the cache."""
+    clear_caches()
+    for _ in range(3):
+        parse_datetime("2030-01-07T09:30:00Z")
+    info = _parse_iso.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+
+class ShiftedDatetime(datetime):
+    """A datetime whose now() is a fixed number of days ahead."""
+    days = 0
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(days=cls.days)
+
+def test_partial_inputs_follow_the_current_date():
+    """Test that time-only strings are completed from today's date on every call, not cached."""
+    today = parse_datetime("10:00")
+    assert epoch_seconds("10:00") == int(today.astimezone().timestamp())
+
+    with patch("dateutil.parser._parser.datetime.datetime", ShiftedDatetime):
+        ShiftedDatetime.days = 1
+        tomorrow = parse_datetime("10:00")
+        assert epoch_seconds("10:00") == int(tomorrow.astimezone().timestamp())
+
+    assert tomorrow.date() == today.date() + timedelta(days=1)
+    assert tomorrow.time() == today.time()
+
+def test_naive_times_keep_their_own_dst_offset():
+    """Test that a fixed-offset zone does not pin naive times across a DST change to today's offset."""
+    winter, summer = "2030-01-07T15:00:00", "2030-07-07T15:00:00"
+    berlin = ZoneInfo("Europe/Berlin")
+    assert format_dt(winter, berlin) == "2030-01-07T15:00:00+01:00"
+    assert format_dt(summer, berlin) == "2030-07-07T15:00:00+02:00"
+
+    # The host zone has no IANA name to go by, only today's offset
+    try:
+        with patch.dict(os.environ, {"TZ": "Europe/Berlin"}):
+            time.tzset()
+            fixed = datetime.now().astimezone().tzinfo
+            assert format_dt(winter, fixed) == "2030-01-07T15:00:00+01:00"
+            assert format_dt(summer, fixed) == "2030-07-07T15:00:00+02:00"
+    finally:
+        time.tzset()
+
+def test_busy_arrays():
+    """Test that a FreeBusy response becomes epoch arrays and a list of unavailable calendars."""
+    calendars = {
+        "primary": {"busy": [{"start": "2030-01-07T09:00:00Z", "end": "2030-01-07T10:00:00Z"}]},
+        "ana@example.com": {"busy": [{"start": "2030-01-07T11:00:00+01:00", "end": "2030-01-07T11:30:00+01:00"}]},
+        "bob@example.com": {"errors": [{"domain": "global", "reason": "notFound"}]},
+    }
+    starts, ends, unavailable = busy_arrays(calendars)
+
+    nine = epoch_seconds("2030-01-07T09:00:00Z")
+    assert list(starts) == [nine, nine + 3600]
+    assert list(ends) == [nine + 3600, nine + 5400]
+    assert unavailable == ["bob@example.com"]
@@ -0,0 +1,36 @@
+from app.core.draft_edits import apply_edits
+
+DRAFT = {
+    "to": "team@example.com",
+    "subject": "Sync",
+    "body": "Hi team,\n\nLet's meet on Monday.\n\nBest regards,\nAna",
+}
+
+def test_structured_edits_are_applied():
+    """Test that subject, cc and paragraph edits change only the targeted args."""
+    edited = apply_edits(
+        "change subject to 'Q3 planning sync'.; add cc bob@example.com, eve@example.com\nreplace paragraph 2 with Let's meet on Tuesday.",
+        DRAFT,
+    )
+
+    assert edited == {
+        "to": "team@example.com",
+        "subject": "Q3 planning sync",
+        "cc": "bob@example.com, eve@example.com",
+        "body": "Hi team,\n\nLet's meet on Tuesday.\n\nBest regards,\nAna",
+    }
+    assert DRAFT["subject"] == "Sync"
+
+def test_text_and_paragraph_edits():
+    """Test quoted replacements, appending and removing paragraphs."""
+    edited = apply_edits("replace 'Monday' with 'Friday'; append See you there!; remove paragraph 1", DRAFT)
+
+    assert edited["body"] == "Let's meet on Friday.\n\nBest regards,\nAna\n\nSee you there!"
+
+def test_free_form_edits_need_a_redraft():
+    """Test that anything not fully understood is left to the email agent."""
+    assert apply_edits("make it more formal", DRAFT) is None
+    assert apply_edits("change subject to Hi; make it shorter", DRAFT) is None
+    assert apply_edits("add cc Bob", DRAFT) is None
+    assert apply_edits("replace paragraph 7 with Hello", DRAFT) is None
+    assert apply_edits("replace 'Tuesday' with 'Friday'", DRAFT) is None
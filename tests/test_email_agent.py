@@ -1,7 +1,11 @@
+import base64
 import pytest
-from unittest.mock import MagicMock
+import threading
+from email import message_from_bytes
+from unittest.mock import MagicMock, patch
+from googleapiclient.errors import HttpError
 from app.agents.email import EmailAgent
-from app.tools.email import send_email
+from app.tools.email import send_email, send_emails_bulk
 from app.core.context import AgentContext
 
 class TestEmailAgent:
@@ -27,3 +31,62 @@ class TestEmailAgent:
         assert "Email sent" in result
         assert "msg123" in result
         mock_gmail_service.users.return_value.messages.return_value.send.assert_called_once()
+
+    def test_send_emails_bulk_tool(self, mock_gmail_service):
+        """Test bulk sending with retries on rate limits and per-message status."""
+        lock = threading.Lock()
+        attempts = {}
+
+        def execute_for(body):
+            def execute():
+                with lock:
+                    attempts[body["raw"]] = attempts.get(body["raw"], 0) + 1
+                    count = attempts[body["raw"]]
+                if "bounce" in _recipient(body):
+                    raise HttpError(MagicMock(status=400), b"Invalid To header")
+                if "busy" in _recipient(body) and count == 1:
+                    raise HttpError(MagicMock(status=429), b"Too Many Requests")
+                return {"id": f"msg-{_recipient(body)}"}
+            return MagicMock(execute=execute)
+
+        mock_gmail_service.users.return_value.messages.return_value.send.side_effect = (
+            lambda userId, body: execute_for(body)
+        )
+
+        with patch('app.tools.email.sleep_before_retry') as mock_sleep:
+            result = send_emails_bulk.invoke({
+                "recipients": ["a@example.com", "busy@example.com", "bounce@example.com", "b@example.com"],
+                "subject": "Team update",
+                "body": "Hello team",
+            })
+
+        lines = result.splitlines()
+        assert lines[0] == "Sent 3 of 4 emails."
+        assert lines[2] == "busy@example.com: Sent (Message ID: msg-busy@example.com)"
+        assert lines[3].startswith("bounce@example.com: Failed after 1 attempt(s)")
+        assert mock_sleep.call_count == 1
+
+    def test_send_emails_bulk_reports_setup_errors(self, mock_gmail_service):
+        """Test that a message whose service cannot be built is reported as failed, and the rest are still sent."""
+        with patch('app.tools.email.get_gmail_service', side_effect=[RuntimeError("token expired"), mock_gmail_service, mock_gmail_service]), \
+             patch('app.tools.email.config.EMAIL_MAX_CONCURRENCY', 1):
+            mock_gmail_service.users.return_value.messages.return_value.send.return_value.execute.return_value = {"id": "msg"}
+            result = send_emails_bulk.invoke({
+                "recipients": ["a@example.com", "b@example.com", "c@example.com"],
+                "subject": "Team update",
+                "body": "Hello team",
+            })
+
+        lines = result.splitlines()
+        assert lines[0] == "Sent 2 of 3 emails."
+        assert lines[1] == "a@example.com: Failed: token expired"
+
+    def test_send_emails_bulk_requires_content(self, mock_gmail_service):
+        """Test that recipients without a shared subject and body are rejected."""
+        result = send_emails_bulk.invoke({"recipients": ["a@example.com"]})
+        assert result.startswith("Error")
+        mock_gmail_service.users.return_value.messages.return_value.send.assert_not_called()
+
+def _recipient(body):
+    """Extracts the To header from a messages.send body."""
+    return message_from_bytes(base64.urlsafe_b64decode(body["raw"]))["to"]
@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from googleapiclient.errors import HttpError
+from app.core.event_store import EventStore, event_bounds
+from app.tools.calendar import list_events, create_event
+
+def _event(event_id, start, end, summary="Meeting", status="confirmed"):
+    return {"id": event_id, "status": status, "summary": summary,
+            "start": {"dateTime": start}, "end": {"dateTime": end}}
+
+def _epoch(value):
+    return event_bounds({"start": {"dateTime": value}, "end": {"dateTime": value}})[0]
+
+@pytest.fixture
+def service():
+    return MagicMock()
+
+@pytest.fixture
+def store(service):
+    return EventStore("primary", lambda: service, max_age=3600, past_days=3650)
+
+def _responses(service, *responses):
+    service.events.return_value.list.return_value.execute.side_effect = list(responses)
+
+def test_full_sync_follows_pages(store, service):
+    """Test that the first sync pages through every event and keeps the sync token."""
+    _responses(
+        service,
+        {"items": [_event("a", "2099-01-01T09:00:00Z", "2099-01-01T10:00:00Z")], "nextPageToken": "p2"},
+        {"items": [_event("b", "2099-01-01T11:00:00Z", "2099-01-01T12:00:00Z")], "nextSyncToken": "s1"},
+    )
+
+    store.sync()
+
+    assert store.full_syncs == 1
+    assert store._sync_token == "s1"
+    events = store.query(_epoch("2099-01-01T00:00:00Z"), _epoch("2099-01-02T00:00:00Z"))
+    assert [e["id"] for e in events] == ["a", "b"]
+
+def test_incremental_sync_applies_changes(store, service):
+    """Test that incremental syncs send the token and apply updates and deletions."""
+    _responses(
+        service,
+        {"items": [_event("a", "2099-01-01T09:00:00Z", "2099-01-01T10:00:00Z"),
+                   _event("b", "2099-01-01T11:00:00Z", "2099-01-01T12:00:00Z")], "nextSyncToken": "s1"},
+        {"items": [_event("a", "2099-01-01T09:00:00Z", "2099-01-01T10:00:00Z", summary="Moved"),
+                   {"id": "b", "status": "cancelled"}], "nextSyncToken": "s2"},
+    )
+    store.sync()
+    store.sync()
+
+    assert service.events.return_value.list.call_args.kwargs["syncToken"] == "s1"
+    assert store.incremental_syncs == 1
+    events = store.query(_epoch("2099-01-01T00:00:00Z"), _epoch("2099-01-02T00:00:00Z"))
+    assert [e["summary"] for e in events] == ["Moved"]
+
+def test_expired_sync_token_triggers_full_resync(store, service):
+    """Test that HTTP 410 from an incremental sync falls back to a full resync."""
+    gone = HttpError(MagicMock(status=410), b"Sync token is no longer valid")
+    _responses(
+        service,
+        {"items": [_event("a", "2099-01-01T09:00:00Z", "2099-01-01T10:00:00Z")], "nextSyncToken": "s1"},
+        gone,
+        {"items": [_event("c", "2099-01-01T13:00:00Z", "2099-01-01T14:00:00Z")], "nextSyncToken": "s2"},
+    )
+    store.sync()
+    store.sync()
+
+    assert store.full_syncs == 2
+    assert list(store._events) == ["c"]
+
+def test_query_includes_events_spanning_the_range(store, service):
+    """Test that long events starting before the range are returned."""
+    _responses(service, {"items": [
+        _event("long", "2099-01-01T00:00:00Z", "2099-01-05T00:00:00Z"),
+        _event("short", "2099-01-03T09:00:00Z", "2099-01-03T10:00:00Z"),
+        _event("after", "2099-01-06T09:00:00Z", "2099-01-06T10:00:00Z"),
+    ], "nextSyncToken": "s1"})
+    events = store.query(_epoch("2099-01-03T00:00:00Z"), _epoch("2099-01-04T00:00:00Z"))
+
+    assert [e["id"] for e in events] == ["long", "short"]
+
+def test_query_before_mirrored_window_returns_none(service):
+    """Test that ranges older than the mirrored window are not answered locally."""
+    _responses(service, {"items": [], "nextSyncToken": "s1"})
+    store = EventStore("primary", lambda: service, max_age=3600, past_days=1)
+
+    assert store.query(_epoch("2000-01-01T00:00:00Z"), _epoch("2000-01-02T00:00:00Z")) is None
+
+def test_list_events_served_from_mirror(service, store):
+    """Test that list_events reads from the mirror and create_event writes through to it."""
+    _responses(service, {"items": [_event("a", "2099-01-01T09:00:00Z", "2099-01-01T10:00:00Z")], "nextSyncToken": "s1"})
+    service.events.return_value.insert.return_value.execute.return_value = _event(
+        "new", "2099-01-01T15:00:00Z", "2099-01-01T16:00:00Z", summary="Created")
+
+    with patch('app.tools.calendar.get_event_store', return_value=store), \
+         patch('app.tools.calendar.get_calendar_service', return_value=service):
+        before = list_events.invoke({"start_datetime": "2099-01-01T00:00:00Z", "end_datetime": "2099-01-01T23:59:59Z"})
+        create_event.invoke({"title": "Created", "start_datetime": "2099-01-01T15:00:00Z", "end_datetime": "2099-01-01T16:00:00Z"})
+        after = list_events.invoke({"start_datetime": "2099-01-01T00:00:00Z", "end_datetime": "2099-01-01T23:59:59Z"})
+        morning = list_events.invoke({"start_datetime": "2099-01-01T00:00:00Z", "end_datetime": "2099-01-01T12:00:00Z"})
+
+    assert before == "2099-01-01 (Thu): 09:00 Meeting"
+    assert "Meeting" in after and "Created" in after
+    assert "Created" not in morning
+    service.events.return_value.list.assert_called_once()
@@ -0,0 +1,90 @@
+import pytest
+from typing import Any, List
+from pydantic import Field
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from app.agents.calendar import CalendarAgent
+from app.core.config import config
+from app.core.history import HistoryBudgetMiddleware
+
+class RecordingModel(BaseChatModel):
+    """Answers summary requests with a numbered summary and everything else with a reply."""
+    calls: List[Any] = Field(default_factory=list)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append(messages)
+        if "running summary" in str(messages[-1].content):
+            text = f"SUMMARY {sum(1 for c in self.calls if 'running summary' in str(c[-1].content))}"
+        else:
+            text = "reply " + "x" * 200
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    @property
+    def _llm_type(self):
+        return "recording"
+
+@pytest.fixture
+def agent(mock_llm, mock_prompt_loader, monkeypatch):
+    monkeypatch.setattr(config, "CALENDAR_HISTORY_TOKEN_BUDGET", 100)
+    monkeypatch.setattr(config, "HISTORY_KEEP_EXCHANGES", 1)
+    agent = CalendarAgent()
+    agent.llm = RecordingModel()
+    agent.agent_executor = agent._create_agent_executor()
+    return agent
+
+def _state(agent):
+    return agent.agent_executor.get_state({"configurable": {"thread_id": "default"}}).values
+
+def _agent_calls(agent):
+    return [c for c in agent.llm.calls if "running summary" not in str(c[-1].content)]
+
+def test_old_turns_are_folded_into_summary(agent):
+    """Test that the model gets the summary plus the recent exchange, while state keeps everything."""
+    for i in range(4):
+        agent.chat(f"question {i} " + "y" * 200)
+
+    last_call = _agent_calls(agent)[-1]
+    assert isinstance(last_call[0], SystemMessage)
+    assert "Summary of the earlier conversation:\nSUMMARY" in last_call[0].content
+    assert [m.content for m in last_call[1:]] == ["question 3 " + "y" * 200]
+
+    state = _state(agent)
+    assert len(state["messages"]) == 8
+    assert state["summarized_count"] == 6
+    assert agent.history.stats()["tokens_saved"] > 0
+
+def test_summary_is_updated_incrementally(agent):
+    """Test that each summary update sees the previous summary and only the newly folded turns."""
+    for i in range(4):
+        agent.chat(f"question {i} " + "y" * 200)
+
+    summary_prompts = [str(c[-1].content) for c in agent.llm.calls if "running summary" in str(c[-1].content)]
+    assert len(summary_prompts) >= 2
+    assert "question 0" in summary_prompts[0]
+    assert "SUMMARY 1" in summary_prompts[1]
+    assert "question 0" not in summary_prompts[1]
+
+def test_pending_tool_calls_are_never_folded():
+    """Test that the latest exchange, with its unanswered tool call, stays verbatim."""
+    messages = [
+        HumanMessage(content="first"), AIMessage(content="done"),
+        HumanMessage(content="send it"),
+        AIMessage(content="", tool_calls=[{"name": "send_email", "args": {}, "id": "c1"}]),
+    ]
+    middleware = HistoryBudgetMiddleware(model=None, budget=1, keep_exchanges=0)
+
+    assert middleware._cut_index(messages, 0) == 2
+    assert middleware._cut_index(messages[:2] + [ToolMessage(content="ok", tool_call_id="x")], 0) == 0
+
+def test_zero_budget_disables_trimming(agent):
+    """Test that a budget of 0 sends the full history without summarizing."""
+    agent.history.budget = 0
+    for i in range(3):
+        agent.chat(f"question {i} " + "y" * 200)
+
+    assert len(_agent_calls(agent)) == len(agent.llm.calls)
+    assert len(_agent_calls(agent)[-1]) == 6
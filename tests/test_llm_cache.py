@@ -0,0 +1,94 @@
+import time
+import pytest
+from unittest.mock import patch
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.load import dumps
+from langchain_core.outputs import ChatGeneration
+from app.core.llm_cache import SQLiteLLMCache, get_llm_cache, normalize_prompt
+
+def _model(cache, *replies):
+    return GenericFakeChatModel(messages=iter([AIMessage(content=r) for r in replies]), cache=cache)
+
+def test_repeated_prompt_is_served_from_cache():
+    """Test that an identical request skips the model and counts as a hit."""
+    cache = SQLiteLLMCache(":memory:")
+    model = _model(cache, "first answer", "second answer")
+
+    assert model.invoke([HumanMessage(content="What's on today?")]).content == "first answer"
+    assert model.invoke([HumanMessage(content="What's on today?")]).content == "first answer"
+    assert model.invoke([HumanMessage(content="Anything tomorrow?")]).content == "second answer"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+def test_normalization_ignores_ids():
+    """Test that message ids and per-run tool call ids do not change the key."""
+    def conversation(call_id, message_id):
+        return dumps([
+            HumanMessage(content="book lunch", id=message_id),
+            AIMessage(content="", id=message_id, tool_calls=[{"name": "create_event", "args": {"summary": "Lunch"}, "id": call_id}]),
+            ToolMessage(content="Event created", tool_call_id=call_id),
+        ])
+
+    assert normalize_prompt(conversation("abc", "m1")) == normalize_prompt(conversation("xyz", "m2"))
+    assert normalize_prompt(conversation("abc", "m1")) != normalize_prompt(dumps([HumanMessage(content="book dinner")]))
+
+def test_hits_get_fresh_ids():
+    """Test that a replayed response can be appended next to the original in one thread."""
+    cache = SQLiteLLMCache(":memory:")
+    call = {"name": "list_events", "args": {}, "id": "call_1", "type": "tool_call"}
+    generations = [ChatGeneration(message=AIMessage(content="", id="run-1", tool_calls=[call]))]
+    cache.update("prompt", "llm", generations)
+
+    replayed = cache.lookup("prompt", "llm")[0].message
+    assert replayed.id is None
+    assert replayed.tool_calls[0]["id"] != "call_1"
+    assert replayed.tool_calls[0]["name"] == "list_events"
+
+def test_entries_do_not_outlive_the_day_or_ttl():
+    """Test that time-sensitive entries are invalidated by the date bucket and the TTL."""
+    cache = SQLiteLLMCache(":memory:", ttl=60)
+    cache.update("prompt", "llm", [ChatGeneration(message=AIMessage(content="today's agenda"))])
+    assert cache.lookup("prompt", "llm") is not None
+
+    with patch("app.core.llm_cache.date") as mock_date:
+        mock_date.today.return_value.isoformat.return_value = "2099-01-01"
+        assert cache.lookup("prompt", "llm") is None
+
+    with patch("app.core.llm_cache.time.time", return_value=time.time() + 120):
+        assert cache.lookup("prompt", "llm") is None
+
+def test_least_recently_used_entries_are_evicted():
+    """Test that the entry cap evicts the least recently used entry."""
+    cache = SQLiteLLMCache(":memory:", max_entries=2)
+    for name in ["a", "b"]:
+        cache.update(name, "llm", [ChatGeneration(message=AIMessage(content=name))])
+        time.sleep(0.01)
+    cache.lookup("a", "llm")
+    cache.update("c", "llm", [ChatGeneration(message=AIMessage(content="c"))])
+
+    assert cache.lookup("b", "llm") is None
+    assert cache.lookup("a", "llm") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_saved_latency_is_tracked():
+    """Test that hits add up the latency the original call took."""
+    cache = SQLiteLLMCache(":memory:")
+    assert cache.lookup("prompt", "llm") is None
+    time.sleep(0.05)
+    cache.update("prompt", "llm", [ChatGeneration(message=AIMessage(content="x"))])
+    cache.lookup("prompt", "llm")
+
+    assert cache.stats()["saved_seconds"] >= 0.05
+
+def test_cache_is_opt_in_and_deterministic_only(monkeypatch, tmp_path):
+    """Test that the cache is off by default and never used for sampled responses."""
+    monkeypatch.setattr("app.core.llm_cache._cache", None)
+    monkeypatch.setattr("app.core.config.config.LLM_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    assert get_llm_cache(0) is None
+
+    monkeypatch.setattr("app.core.config.config.LLM_CACHE_ENABLED", True)
+    assert isinstance(get_llm_cache(0), SQLiteLLMCache)
+    assert get_llm_cache(0.7) is None
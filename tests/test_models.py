@@ -0,0 +1,73 @@
+import pytest
+from unittest.mock import MagicMock
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from app.agents.base import BaseAgent
+from app.agents.calendar import CalendarAgent
+from app.agents.supervisor import SupervisorAgent
+from app.core.config import config
+from app.core.models import ModelRegistry, ModelSettings, tier_models
+
+@pytest.fixture
+def registry(monkeypatch):
+    """A fresh registry building real (never called) Gemini clients."""
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    registry = ModelRegistry()
+    monkeypatch.setattr("app.core.models._registry", registry)
+    return registry
+
+class ScriptedModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+class OverloadedModel(ScriptedModel):
+    def _generate(self, *args, **kwargs):
+        raise TimeoutError("model overloaded")
+
+def test_agents_share_one_client_per_model(registry):
+    """Test that per-agent limits are applied to copies sharing the model's client."""
+    capped = registry.get(ModelSettings("standard", max_output_tokens=256, timeout=5))
+    default = registry.get(ModelSettings("standard"))
+
+    assert capped is not default
+    assert capped.client is default.client
+    assert (capped.max_output_tokens, capped.timeout) == (256, 5)
+    assert default.timeout == config.MODEL_TIMEOUT
+    assert registry.get(ModelSettings("standard", max_output_tokens=256, timeout=5)) is capped
+    assert registry.get(ModelSettings("fast")).client is not default.client
+
+def test_tier_models(monkeypatch):
+    """Test that each tier has its primary model first and drops missing or repeated fallbacks."""
+    monkeypatch.setattr("app.core.config.config.MODEL_NAME", "standard-model")
+    monkeypatch.setattr("app.core.config.config.FALLBACK_MODEL_NAME", "backup-model")
+    monkeypatch.setattr("app.core.config.config.FAST_MODEL_NAME", "fast-model")
+    monkeypatch.setattr("app.core.config.config.FAST_FALLBACK_MODEL_NAME", "standard-model")
+
+    assert tier_models("standard") == ["standard-model", "backup-model"]
+    assert tier_models("fast") == ["fast-model", "standard-model"]
+
+    monkeypatch.setattr("app.core.config.config.FALLBACK_MODEL_NAME", "standard-model")
+    monkeypatch.setattr("app.core.config.config.FAST_MODEL_NAME", "")
+    assert tier_models("standard") == ["standard-model"]
+    assert tier_models("fast") == ["standard-model"]
+    with pytest.raises(ValueError):
+        tier_models("huge")
+
+def test_supervisor_runs_on_the_fast_tier(registry, mock_prompt_loader):
+    """Test that agents get the models their settings ask for."""
+    supervisor = SupervisorAgent(calendar_agent=MagicMock(spec=BaseAgent), email_agent=MagicMock(spec=BaseAgent))
+    calendar = CalendarAgent()
+
+    assert supervisor.llm.model.endswith(config.FAST_MODEL_NAME)
+    assert supervisor.llm.max_output_tokens == config.SUPERVISOR_MAX_OUTPUT_TOKENS
+    assert calendar.llm.model.endswith(config.MODEL_NAME)
+    assert [m.model for m in supervisor.fallback_llms] == [calendar.llm.model]
+
+def test_failed_model_call_falls_back(mock_llm, mock_prompt_loader):
+    """Test that a timed out or overloaded primary model is retried on the fallback model."""
+    agent = CalendarAgent()
+    agent.llm = OverloadedModel(messages=iter([]))
+    agent.fallback_llms = [ScriptedModel(messages=iter([AIMessage(content="Answered by the fallback.")]))]
+    agent.agent_executor = agent._create_agent_executor()
+
+    assert agent.chat("What's on today?") == "Answered by the fallback."
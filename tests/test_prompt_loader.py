@@ -48,3 +48,56 @@ def test_load_prompts_file_not_found():
     """Test error when file does not exist."""
     with pytest.raises(FileNotFoundError):
         PromptLoader.load_prompts("non_existent_file.yaml")
+
+@pytest.fixture
+def prompts_file(tmp_path):
+    """A prompts file that tests can rewrite, with PromptLoader reset around the test."""
+    path = tmp_path / "prompts.yaml"
+    path.write_text(yaml.dump({"greeting": "Hello {{ name }}!", "static": "No variables here.\n"}))
+    PromptLoader._prompts = {}
+    yield path
+    PromptLoader._prompts = {}
+
+def _rewrite(path, text):
+    stat = os.stat(path)
+    path.write_text(text)
+    # Make sure the modification time changes even on coarse-grained file systems
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_templates_are_compiled_once(prompts_file, monkeypatch):
+    """Test that rendering reuses the templates compiled at load."""
+    PromptLoader.load_prompts(str(prompts_file))
+    monkeypatch.setattr("app.core.prompt_loader._env.from_string", lambda *args, **kwargs: pytest.fail("compiled again"))
+
+    assert PromptLoader.get_prompt("greeting", name="Ana") == "Hello Ana!"
+    assert PromptLoader.get_prompt("greeting", name="Bob") == "Hello Bob!"
+    assert PromptLoader.get_prompt("static") == "No variables here."
+
+def test_static_prefix_is_shared_by_every_rendering(prompts_file):
+    """Test that the text before the first variable is split off and reused as is."""
+    PromptLoader.load_prompts(str(prompts_file))
+
+    prefix = PromptLoader.get_static_prefix("greeting")
+    assert prefix == "Hello "
+    assert PromptLoader.get_prompt("greeting", name="Ana").startswith(prefix)
+    assert PromptLoader.get_static_prefix("static") == "No variables here."
+
+def test_prompts_reload_when_the_file_changes(prompts_file):
+    """Test that edits are picked up without a restart, and broken edits are ignored."""
+    PromptLoader.load_prompts(str(prompts_file))
+    assert PromptLoader.get_prompt("greeting", name="Ana") == "Hello Ana!"
+
+    _rewrite(prompts_file, yaml.dump({"greeting": "Hi {{ name }}."}))
+    assert PromptLoader.get_prompt("greeting", name="Ana") == "Hi Ana."
+    with pytest.raises(KeyError):
+        PromptLoader.get_prompt("static")
+
+    _rewrite(prompts_file, "greeting: [unclosed")
+    assert PromptLoader.get_prompt("greeting", name="Ana") == "Hi Ana."
+
+def test_default_file_does_not_depend_on_working_directory(tmp_path, monkeypatch):
+    """Test that the packaged prompts load from any working directory."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(PromptLoader, "_prompts", {})
+
+    assert PromptLoader.get_prompt("email", user_name="Ana").endswith("Best regards,\nAna")
@@ -0,0 +1,55 @@
+import json
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from googleapiclient.errors import HttpError
+import time
+from app.core.ratelimit import TokenBucket, backoff_delay, is_retryable
+
+def _http_error(status, reason=None):
+    content = b""
+    if reason:
+        content = json.dumps({"error": {"message": "quota", "errors": [{"reason": reason}]}}).encode()
+    return HttpError(MagicMock(status=status, reason="error"), content)
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_transient_statuses_are_retryable(status):
+    """Test that rate limits and server errors are retried."""
+    assert is_retryable(_http_error(status))
+
+def test_rate_limited_403_is_retryable():
+    """Test that 403 quota errors are retried but other 403s are not."""
+    assert is_retryable(_http_error(403, "userRateLimitExceeded"))
+    assert not is_retryable(_http_error(403, "forbidden"))
+
+def test_client_errors_are_not_retryable():
+    """Test that bad requests and non-API errors are not retried."""
+    assert not is_retryable(_http_error(400))
+    assert not is_retryable(ValueError("boom"))
+
+def test_backoff_delay_is_capped_full_jitter():
+    """Test that backoff grows exponentially, is jittered, and respects the cap."""
+    with patch('app.core.ratelimit.random.uniform', side_effect=lambda low, high: high):
+        assert [backoff_delay(n, base=1, cap=10) for n in range(1, 6)] == [1, 2, 4, 8, 10]
+    assert 0 <= backoff_delay(3, base=1, cap=10) <= 4
+
+def test_token_bucket_allows_burst_then_limits_rate():
+    """Test that the bucket serves a burst immediately, then paces callers to the rate."""
+    bucket = TokenBucket(rate=50, capacity=5)
+
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    burst = time.monotonic() - started
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    paced = time.monotonic() - started
+
+    assert burst < 0.05
+    # 10 more tokens at 50/s take about 0.2s
+    assert 0.15 <= paced < 1.0
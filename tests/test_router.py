@@ -0,0 +1,51 @@
+import json
+import pytest
+from app.core.router import IntentRouter, RouteDecision
+
+@pytest.fixture
+def router():
+    return IntentRouter(enabled=True, threshold=0.85)
+
+@pytest.mark.parametrize("text, agent", [
+    ("What's on my calendar tomorrow?", "calendar"),
+    ("Schedule a meeting with the design team next Tuesday at 2pm", "calendar"),
+    ("Am I free Thursday afternoon?", "calendar"),
+    ("Send an email to bob@example.com saying the report is ready", "email"),
+    ("Write a thank-you note to Sam", "email"),
+])
+def test_unambiguous_requests_are_routed(router, text, agent):
+    """Test that obvious single-agent requests clear the threshold."""
+    decision = router.route(text)
+    assert decision.agent == agent
+    assert router.should_route(decision)
+
+@pytest.mark.parametrize("text", [
+    "Schedule lunch Monday and email Bob an invite",
+    "Send them a reminder about the meeting",
+    "Move it to Friday",
+    "Hello",
+    "What can you do?",
+])
+def test_everything_else_falls_back(router, text):
+    """Test that mixed, context-dependent and off-topic requests go to the supervisor."""
+    assert not router.should_route(router.route(text))
+
+def test_threshold_and_switch_are_respected():
+    """Test that the threshold and the enabled flag gate routing."""
+    decision = RouteDecision("calendar", 0.9, "rule:agenda_query")
+    assert IntentRouter(enabled=True, threshold=0.85).should_route(decision)
+    assert not IntentRouter(enabled=True, threshold=0.95).should_route(decision)
+    assert not IntentRouter(enabled=False).should_route(decision)
+
+def test_decisions_are_logged_with_accuracy(router, tmp_path):
+    """Test that the JSON lines log and stats capture routed and fallback decisions."""
+    router.log_path = str(tmp_path / "logs" / "routing.jsonl")
+    router.record("What's on today?", RouteDecision("calendar", 0.95, "rule:agenda_query"), routed=True, outcome="ok")
+    router.record("Tell Ana I'm late", RouteDecision("calendar", 0.6, "classifier:calendar"), routed=False, actual="email")
+    router.record("Hi", RouteDecision(None, 0.0, "classifier:other"), routed=False, actual=None)
+
+    entries = [json.loads(line) for line in open(router.log_path)]
+    assert [e["routed"] for e in entries] == [True, False, False]
+    assert entries[1]["actual"] == "email"
+    stats = router.stats()
+    assert (stats["routed"], stats["fallbacks"], stats["agreement"]) == (1, 2, 0.5)
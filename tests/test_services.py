@@ -0,0 +1,68 @@
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from app.core.services import ServiceRegistry
+
+@pytest.fixture
+def registry():
+    """A registry with authentication and client building mocked out."""
+    with patch('app.core.services.authenticate_google_services') as mock_auth, \
+         patch('app.core.services.build_from_document') as mock_build, \
+         patch('app.core.services.google_auth_httplib2.AuthorizedHttp'):
+        mock_auth.return_value = MagicMock()
+        mock_build.side_effect = lambda *args, **kwargs: MagicMock()
+        yield ServiceRegistry(), mock_auth, mock_build
+
+def test_client_reused_within_thread(registry):
+    """Test that repeated lookups return the same client and count hits."""
+    reg, mock_auth, mock_build = registry
+
+    first = reg.get("calendar", "v3")
+    second = reg.get("calendar", "v3")
+
+    assert first is second
+    assert reg.stats()["hits"] == 1
+    assert reg.stats()["misses"] == 1
+    mock_auth.assert_called_once()
+    mock_build.assert_called_once()
+
+def test_separate_clients_per_api(registry):
+    """Test that different APIs get different clients but share credentials."""
+    reg, mock_auth, mock_build = registry
+
+    calendar = reg.get("calendar", "v3")
+    gmail = reg.get("gmail", "v1")
+
+    assert calendar is not gmail
+    assert mock_build.call_count == 2
+    mock_auth.assert_called_once()
+
+def test_one_client_per_thread(registry):
+    """Test that each thread builds its own client from shared credentials."""
+    reg, mock_auth, mock_build = registry
+    clients = []
+
+    def worker():
+        clients.append(reg.get("calendar", "v3"))
+        clients.append(reg.get("calendar", "v3"))
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(c) for c in clients}) == 3
+    assert reg.stats() == {"hits": 3, "misses": 3, "credentials": 1}
+    mock_auth.assert_called_once()
+
+def test_clear_forces_rebuild(registry):
+    """Test that clear() drops cached clients and credentials."""
+    reg, mock_auth, mock_build = registry
+
+    first = reg.get("calendar", "v3")
+    reg.clear()
+    second = reg.get("calendar", "v3")
+
+    assert first is not second
+    assert mock_auth.call_count == 2
@@ -0,0 +1,197 @@
+import json
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from app.agents.calendar import CalendarAgent
+from app.core.context import AgentContext
+from app.core.sessions import SessionManager
+from server import make_handler
+
+class RecordingAgent:
+    """Stands in for the supervisor: records turns and how many ran at once."""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.turns = []
+        self.ended = []
+        self.running = {}
+        self.max_parallel = 0
+        self._lock = threading.Lock()
+
+    def chat(self, message, context=None):
+        with self._lock:
+            self.running[context.session_id] = self.running.get(context.session_id, 0) + 1
+            assert self.running[context.session_id] == 1, "turns of one session overlapped"
+            self.max_parallel = max(self.max_parallel, sum(self.running.values()))
+        time.sleep(self.delay)
+        with self._lock:
+            self.running[context.session_id] -= 1
+            self.turns.append((context.session_id, message))
+        return f"{context.user_name}: {message}"
+
+    def end_session(self, session_id):
+        self.ended.append(session_id)
+
+def test_sessions_run_in_parallel_but_turns_of_one_session_do_not():
+    """Test that different sessions overlap while one session's turns are serialized."""
+    agent = RecordingAgent()
+    sessions = SessionManager(agent, max_workers=4)
+
+    futures = [sessions.submit(sid, f"msg {i}")[1] for i, sid in enumerate(["a", "b", "c", "a", "a"])]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert agent.max_parallel == 3
+    assert [m for sid, m in agent.turns if sid == "a"] == ["msg 0", "msg 3", "msg 4"]
+
+def test_queued_turns_do_not_hold_workers():
+    """Test that a session with a backlog of turns leaves workers free for other sessions."""
+    agent = RecordingAgent(delay=0.05)
+    sessions = SessionManager(agent, max_workers=2)
+
+    backlog = [sessions.submit("busy", f"msg {i}")[1] for i in range(6)]
+    started = time.monotonic()
+    sessions.chat("other", "hi", timeout=5)
+    waited = time.monotonic() - started
+    for future in backlog:
+        future.result(timeout=5)
+
+    # "other" ran next to the first "busy" turn instead of behind all six
+    assert waited < 0.2
+    assert [m for sid, m in agent.turns if sid == "busy"] == [f"msg {i}" for i in range(6)]
+    assert sessions.stats()["active"] == 0
+
+def test_new_session_gets_id_and_context():
+    """Test that a session is created on first use and keeps its user name."""
+    sessions = SessionManager(RecordingAgent(delay=0))
+
+    session_id, response = sessions.chat(None, "hi", user_name="Ana")
+    assert session_id
+    assert response == "Ana: hi"
+    assert sessions.chat(session_id, "again")[1] == "Ana: again"
+
+def test_idle_sessions_are_evicted_with_history():
+    """Test that idle sessions are ended and their history dropped."""
+    agent = RecordingAgent(delay=0)
+    sessions = SessionManager(agent, idle_timeout=0.05)
+    sessions.chat("old", "hi")
+    time.sleep(0.1)
+    sessions.chat("fresh", "hi")
+
+    assert sessions.evict_idle() == 1
+    assert agent.ended == ["old"]
+    assert sessions.stats()["sessions"] == 1
+
+def test_session_limit_evicts_least_recently_used():
+    """Test that the oldest idle session makes room when the limit is reached."""
+    agent = RecordingAgent(delay=0)
+    sessions = SessionManager(agent, max_sessions=2)
+    for sid in ["a", "b", "a", "c"]:
+        sessions.chat(sid, "hi")
+
+    assert agent.ended == ["b"]
+    assert sessions.stats()["sessions"] == 2
+
+def test_sessions_with_queued_turns_are_not_ended():
+    """Test that end() refuses a busy session and eviction skips it."""
+    agent = RecordingAgent(delay=0.2)
+    sessions = SessionManager(agent, idle_timeout=0)
+    _, future = sessions.submit("a", "hi")
+
+    with pytest.raises(RuntimeError):
+        sessions.end("a")
+    assert sessions.evict_idle() == 0
+    future.result(timeout=5)
+
+    assert agent.ended == []
+    assert sessions.end("a")
+    assert agent.ended == ["a"]
+
+def test_turn_waits_until_ended_history_is_dropped():
+    """Test that a turn for an id being ended starts a new session after its history is gone."""
+    agent = RecordingAgent(delay=0)
+    dropping, release = threading.Event(), threading.Event()
+
+    def end_session(session_id):
+        dropping.set()
+        release.wait(5)
+        agent.ended.append(session_id)
+
+    agent.end_session = end_session
+    sessions = SessionManager(agent)
+    sessions.chat("a", "first")
+
+    ender = threading.Thread(target=sessions.end, args=("a",))
+    ender.start()
+    assert dropping.wait(5)
+    submitter = threading.Thread(target=lambda: sessions.chat("a", "second"))
+    submitter.start()
+    time.sleep(0.1)
+    # Still blocked behind the history deletion
+    assert agent.turns == [("a", "first")]
+
+    release.set()
+    ender.join(5)
+    submitter.join(5)
+    assert agent.ended == ["a"]
+    assert agent.turns == [("a", "first"), ("a", "second")]
+    assert sessions.stats()["sessions"] == 1
+
+class ScriptedModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+def test_agent_history_is_per_session(mock_llm, mock_prompt_loader):
+    """Test that each session has its own checkpoint thread."""
+    agent = CalendarAgent()
+    agent.llm = ScriptedModel(messages=iter([AIMessage(content=f"reply {i}") for i in range(3)]))
+    agent.agent_executor = agent._create_agent_executor()
+
+    agent.chat("first", context=AgentContext(session_id="a"))
+    agent.chat("second", context=AgentContext(session_id="b"))
+    agent.chat("third", context=AgentContext(session_id="a"))
+
+    def history(session_id):
+        state = agent.agent_executor.get_state({"configurable": {"thread_id": session_id}})
+        return [m.content for m in state.values["messages"]]
+
+    assert history("a") == ["first", "reply 0", "third", "reply 2"]
+    assert history("b") == ["second", "reply 1"]
+
+    agent.end_session("a")
+    assert agent.agent_executor.get_state({"configurable": {"thread_id": "a"}}).values == {}
+
+@pytest.fixture
+def server():
+    sessions = SessionManager(RecordingAgent(delay=0))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(sessions))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def _request(url, method="GET", body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def test_server_chat_and_end_session(server):
+    """Test the chat, session and health endpoints."""
+    status, body = _request(f"{server}/chat", "POST", {"message": "hi", "user_name": "Ana"})
+    assert status == 200 and body["response"] == "Ana: hi"
+
+    status, body = _request(f"{server}/chat", "POST", {"message": "again", "session_id": body["session_id"]})
+    assert body["response"] == "Ana: again"
+    assert _request(f"{server}/health")[1]["sessions"] == 1
+
+    assert _request(f"{server}/sessions/{body['session_id']}", "DELETE")[0] == 200
+    assert _request(f"{server}/sessions/{body['session_id']}", "DELETE")[0] == 404
+    assert _request(f"{server}/chat", "POST", {})[0] == 400
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import re
+from unittest.mock import MagicMock
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from app.agents.base import BaseAgent
+from app.agents.calendar import CalendarAgent
+from app.agents.email import EmailAgent
+from app.agents.supervisor import SupervisorAgent
+from app.core.router import IntentRouter
+from app.core.streaming import Done, Interrupt, Token, ToolCallEnd, ToolCallStart
+
+class StreamingModel(GenericFakeChatModel):
+    """Streams scripted replies word by word, followed by their tool calls."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = next(self.messages)
+        for word in re.split(r"(\s)", message.content):
+            if word:
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+                if run_manager:
+                    run_manager.on_llm_new_token(word, chunk=chunk)
+                yield chunk
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(message.tool_calls)
+            ]))
+
+def _with_model(agent, *replies):
+    agent.llm = StreamingModel(messages=iter(replies))
+    agent.agent_executor = agent._create_agent_executor()
+    return agent
+
+def _calendar(*replies):
+    return _with_model(CalendarAgent(), *replies)
+
+def _tokens(events, agent=None):
+    return "".join(e.text for e in events if isinstance(e, Token) and (agent is None or e.agent == agent))
+
+def test_stream_yields_tokens_and_tool_calls_in_order(mock_llm, mock_prompt_loader, mock_calendar_service):
+    """Test that tokens arrive one by one, around the tool call they lead to."""
+    mock_calendar_service.events().list().execute.return_value = {"items": []}
+    call = {"name": "list_events", "args": {"start_datetime": "2030-01-07T00:00:00Z", "end_datetime": "2030-01-08T00:00:00Z"}, "id": "c1"}
+    agent = _calendar(AIMessage(content="Checking your day.", tool_calls=[call]), AIMessage(content="Nothing planned."))
+
+    events = list(agent.stream("What's on Monday?"))
+
+    kinds = [type(e).__name__ for e in events]
+    assert kinds.index("ToolCallStart") < kinds.index("ToolCallEnd") < len(kinds) - 1
+    assert [e.text for e in events[:3]] == ["Checking", " ", "your"]
+    assert _tokens(events) == "Checking your day.Nothing planned."
+    assert events[-1] == Done(agent="calendar", response="Nothing planned.")
+
+def test_stream_includes_sub_agent_tokens(mock_llm, mock_prompt_loader, monkeypatch):
+    """Test that tokens of a sub-agent called through a supervisor tool are streamed and attributed."""
+    monkeypatch.setattr("app.core.config.config.ROUTER_ENABLED", False)
+    calendar = _calendar(AIMessage(content="Two meetings tomorrow."))
+    call = {"name": "schedule_event", "args": {"request": "tomorrow"}, "id": "c1"}
+    supervisor = _with_model(
+        SupervisorAgent(calendar_agent=calendar, email_agent=MagicMock(spec=BaseAgent)),
+        AIMessage(content="", tool_calls=[call]), AIMessage(content="You have two meetings."),
+    )
+
+    events = list(supervisor.stream("What's on tomorrow?"))
+
+    assert _tokens(events, "calendar") == "Two meetings tomorrow."
+    assert _tokens(events, "supervisor") == "You have two meetings."
+    assert isinstance(events[-1], Done) and events[-1].response == "You have two meetings."
+
+def test_stream_does_not_print_branch_timings(mock_llm, mock_prompt_loader, monkeypatch, capsys):
+    """Test that sub-agent timings are not printed between streamed tokens."""
+    monkeypatch.setattr("app.core.config.config.ROUTER_ENABLED", False)
+    calendar = _calendar(AIMessage(content="Two meetings tomorrow."))
+    call = {"name": "schedule_event", "args": {"request": "tomorrow"}, "id": "c1"}
+    supervisor = _with_model(
+        SupervisorAgent(calendar_agent=calendar, email_agent=MagicMock(spec=BaseAgent)),
+        AIMessage(content="", tool_calls=[call]), AIMessage(content="You have two meetings."),
+    )
+
+    events = list(supervisor.stream("What's on tomorrow?"))
+
+    assert events[-1].response == "You have two meetings."
+    assert supervisor.dispatcher.stats()[0]["tool"] == "schedule_event"
+    assert "⏱" not in capsys.readouterr().out
+
+def test_routed_request_streams_sub_agent_tokens(mock_llm, mock_prompt_loader):
+    """Test that a request routed past the supervisor model still streams the sub-agent's tokens."""
+    calendar = _calendar(AIMessage(content="You are free all day."))
+    supervisor = SupervisorAgent(calendar_agent=calendar, email_agent=MagicMock(spec=BaseAgent), router=IntentRouter(enabled=True))
+
+    events = list(supervisor.stream("What's on my calendar tomorrow?"))
+
+    assert isinstance(events[0], ToolCallStart) and events[0].name == "schedule_event"
+    assert _tokens(events, "calendar") == "You are free all day."
+    assert isinstance(events[-2], ToolCallEnd)
+    assert events[-1].response == "You are free all day."
+
+def test_stream_stops_at_interrupt(mock_llm, mock_prompt_loader):
+    """Test that an approval interrupt is yielded and ends the stream."""
+    call = {"name": "send_email", "args": {"to": "a@example.com", "subject": "Hi", "body": "Hello"}, "id": "c1"}
+    agent = _with_model(EmailAgent(), AIMessage(content="", tool_calls=[call]))
+
+    events = list(agent.stream("Email a@example.com"))
+
+    assert isinstance(events[-2], Interrupt)
+    assert events[-1].response == events[-2].value
+    assert events[-2].value[0].value["action_requests"][0]["name"] == "send_email"
+
+def test_astream_matches_stream(mock_llm, mock_prompt_loader):
+    """Test that the async iterator yields the same events."""
+    agent = _calendar(AIMessage(content="All clear."))
+
+    async def collect():
+        return [event async for event in agent.astream("Anything today?")]
+
+    events = asyncio.run(collect())
+    assert _tokens(events) == "All clear."
+    assert events[-1] == Done(agent="calendar", response="All clear.")
@@ -1,7 +1,18 @@
+import json
 import pytest
+import time
 from unittest.mock import MagicMock
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, ToolMessage
 from app.agents.supervisor import SupervisorAgent
 from app.agents.base import BaseAgent
+from app.core.context import AgentContext
+from app.core.router import IntentRouter
+
+@pytest.fixture(autouse=True)
+def no_pre_router(monkeypatch):
+    """These tests drive the supervisor model; the pre-router is tested separately."""
+    monkeypatch.setattr("app.core.config.config.ROUTER_ENABLED", False)
 
 class TestSupervisorAgent:
     def test_initialization(self, mock_llm, mock_prompt_loader):
@@ -29,3 +40,318 @@ class TestSupervisorAgent:
         
     #     # Skipping tool access test as LangGraph structure hides tools.
     #     pass
+
+class ScriptedModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+def _supervisor_with_calls(tool_calls, cal_agent, email_agent):
+    agent = SupervisorAgent(calendar_agent=cal_agent, email_agent=email_agent)
+    calls = [dict(call, id=f"call_{i}") for i, call in enumerate(tool_calls)]
+    agent.llm = ScriptedModel(messages=iter([AIMessage(content="", tool_calls=calls), AIMessage(content="All done.")]))
+    agent.agent_executor = agent._create_agent_executor()
+    return agent
+
+def _tool_outputs(agent):
+    state = agent.agent_executor.get_state({"configurable": {"thread_id": "default"}})
+    return {m.tool_call_id: m.content for m in state.values["messages"] if isinstance(m, ToolMessage)}
+
+def test_independent_sub_agents_run_concurrently(mock_llm, mock_prompt_loader):
+    """Test that calendar and email delegations from one step overlap."""
+    def slow(result):
+        def call(*args, **kwargs):
+            time.sleep(0.3)
+            return result
+        return call
+
+    mock_cal_agent = MagicMock(spec=BaseAgent)
+    mock_cal_agent.invoke.side_effect = slow("Meeting scheduled")
+    mock_email_agent = MagicMock(spec=BaseAgent)
+    mock_email_agent.invoke.side_effect = slow("Invite sent")
+
+    agent = _supervisor_with_calls([
+        {"name": "schedule_event", "args": {"request": "design sync Tuesday 2pm"}},
+        {"name": "manage_email", "args": {"request": "email the design team an invite"}},
+    ], mock_cal_agent, mock_email_agent)
+
+    started = time.monotonic()
+    assert agent.invoke("Schedule a design sync and email an invite") == "All done."
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.55
+    assert mock_cal_agent.invoke.call_args.kwargs["context"].session_id == "default"
+    assert _tool_outputs(agent) == {"call_0": "Meeting scheduled", "call_1": "Invite sent"}
+    assert sorted(t["tool"] for t in agent.dispatcher.stats()) == ["manage_email", "schedule_event"]
+    assert all(t["seconds"] >= 0.3 for t in agent.dispatcher.stats())
+
+def test_calls_to_same_sub_agent_run_in_order(mock_llm, mock_prompt_loader):
+    """Test that two delegations to one sub-agent run one after another, as emitted."""
+    order = []
+
+    def record(request, context=None, thread_id=None):
+        order.append(("start", request))
+        time.sleep(0.2 if request == "first" else 0)
+        order.append(("end", request))
+        return request
+
+    mock_email_agent = MagicMock(spec=BaseAgent)
+    mock_email_agent.invoke.side_effect = record
+
+    agent = _supervisor_with_calls([
+        {"name": "manage_email", "args": {"request": "first"}},
+        {"name": "manage_email", "args": {"request": "second"}},
+    ], MagicMock(spec=BaseAgent), mock_email_agent)
+    agent.invoke("Send two emails")
+
+    assert order == [("start", "first"), ("end", "first"), ("start", "second"), ("end", "second")]
+
+def test_sub_agent_failure_is_isolated(mock_llm, mock_prompt_loader):
+    """Test that one failing delegation is reported without losing the other's result."""
+    mock_cal_agent = MagicMock(spec=BaseAgent)
+    mock_cal_agent.invoke.return_value = "Meeting scheduled"
+    mock_email_agent = MagicMock(spec=BaseAgent)
+    mock_email_agent.resume.side_effect = RuntimeError("thread missing")
+
+    agent = _supervisor_with_calls([
+        {"name": "schedule_event", "args": {"request": "design sync Tuesday 2pm"}},
+        {"name": "manage_email", "args": {"request": "Approve"}},
+    ], mock_cal_agent, mock_email_agent)
+    agent.tasks.set_pending("default", "email", "default:email:draft")
+
+    assert agent.invoke("Schedule it and approve the email") == "All done."
+
+    outputs = _tool_outputs(agent)
+    assert outputs["call_0"] == "Meeting scheduled"
+    assert outputs["call_1"] == "Error in manage_email: thread missing"
+    assert [t["ok"] for t in agent.dispatcher.stats() if t["tool"] == "manage_email"] == [False]
+
+def _supervisor_with_turns(turns, cal_agent, email_agent):
+    """Scripts one tool call per supervisor turn, each followed by a final answer."""
+    agent = SupervisorAgent(calendar_agent=cal_agent, email_agent=email_agent)
+    messages = []
+    for i, call in enumerate(turns):
+        messages += [AIMessage(content="", tool_calls=[dict(call, id=f"call_{i}")]), AIMessage(content=f"Turn {i} done.")]
+    agent.llm = ScriptedModel(messages=iter(messages))
+    agent.agent_executor = agent._create_agent_executor()
+    return agent
+
+def test_each_delegated_task_gets_a_fresh_thread(mock_llm, mock_prompt_loader):
+    """Test that sub-agent tasks never share a thread and their threads are dropped afterwards."""
+    mock_cal_agent = MagicMock(spec=BaseAgent)
+    mock_cal_agent.invoke.return_value = "Scheduled"
+
+    agent = _supervisor_with_turns([
+        {"name": "schedule_event", "args": {"request": "lunch Monday"}},
+        {"name": "schedule_event", "args": {"request": "dinner Friday"}},
+    ], mock_cal_agent, MagicMock(spec=BaseAgent))
+    agent.invoke("Schedule lunch Monday")
+    agent.invoke("Schedule dinner Friday")
+
+    threads = [c.kwargs["thread_id"] for c in mock_cal_agent.invoke.call_args_list]
+    assert len(set(threads)) == 2
+    assert all(t.startswith("default:calendar:") for t in threads)
+    assert [c.args[0] for c in mock_cal_agent.delete_thread.call_args_list] == threads
+    assert [c.args[0] for c in mock_cal_agent.invoke.call_args_list] == ["lunch Monday", "dinner Friday"]
+
+def test_pending_email_thread_stays_resumable(mock_llm, mock_prompt_loader):
+    """Test that an email awaiting approval is resumed in its own thread, which is dropped once sent."""
+    mock_email_agent = MagicMock(spec=BaseAgent)
+    mock_email_agent.invoke.return_value = [MagicMock(value={"action_requests": [{"name": "send_email", "args": {"to": "a@example.com"}}]})]
+    mock_email_agent.resume.return_value = "Email sent."
+
+    agent = _supervisor_with_turns([
+        {"name": "manage_email", "args": {"request": "email a@example.com"}},
+        {"name": "manage_email", "args": {"request": "Approve"}},
+    ], MagicMock(spec=BaseAgent), mock_email_agent)
+
+    agent.invoke("Email a@example.com")
+    thread_id = mock_email_agent.invoke.call_args.kwargs["thread_id"]
+    assert "Action required" in _tool_outputs(agent)["call_0"]
+    mock_email_agent.delete_thread.assert_not_called()
+
+    agent.invoke("Approve")
+    assert mock_email_agent.resume.call_args.kwargs["thread_id"] == thread_id
+    mock_email_agent.delete_thread.assert_called_once_with(thread_id)
+    assert agent.tasks.pending("default", "email") is None
+
+def test_carry_summary_prepends_earlier_tasks(mock_llm, mock_prompt_loader, monkeypatch):
+    """Test that the opt-in task summary gives a new task one line per earlier task."""
+    monkeypatch.setattr("app.core.config.config.SUBAGENT_CARRY_SUMMARY", True)
+    mock_cal_agent = MagicMock(spec=BaseAgent)
+    mock_cal_agent.invoke.side_effect = ["Lunch booked Monday 12:00", "Moved to 13:00"]
+
+    agent = _supervisor_with_turns([
+        {"name": "schedule_event", "args": {"request": "lunch Monday"}},
+        {"name": "schedule_event", "args": {"request": "move it an hour later"}},
+    ], mock_cal_agent, MagicMock(spec=BaseAgent))
+    agent.invoke("Schedule lunch Monday")
+    agent.invoke("Move it an hour later")
+
+    second_task = mock_cal_agent.invoke.call_args_list[1].args[0]
+    assert "- lunch Monday -> Lunch booked Monday 12:00" in second_task
+    assert second_task.endswith("Current task: move it an hour later")
+
+def test_parse_approval():
+    """Test that approval commands are recognized with their details."""
+    from app.agents.supervisor import parse_approval
+
+    assert parse_approval("Approve") == ("approve", "")
+    assert parse_approval("approved!") == ("approve", "")
+    assert parse_approval("Reject: wrong date") == ("reject", "wrong date")
+    assert parse_approval("edit - make it shorter") == ("edit", "make it shorter")
+    assert parse_approval("Editorial review on Friday") is None
+    assert parse_approval("Schedule lunch") is None
+
+def _supervisor_with_pending_email(email_agent):
+    # The supervisor model must not be called: its script is empty
+    agent = SupervisorAgent(calendar_agent=MagicMock(spec=BaseAgent), email_agent=email_agent)
+    agent.llm = ScriptedModel(messages=iter([]))
+    agent.agent_executor = agent._create_agent_executor()
+    agent.tasks.set_pending("default", "email", "default:email:draft")
+    return agent
+
+def test_approval_skips_supervisor_model(mock_llm, mock_prompt_loader):
+    """Test that a bare approval resumes the email agent directly and is kept in the transcript."""
+    mock_email_agent = MagicMock(spec=BaseAgent)
+    mock_email_agent.resume.return_value = "Email sent."
+    agent = _supervisor_with_pending_email(mock_email_agent)
+
+    assert agent.invoke("Approve") == "Email sent."
+    assert mock_email_agent.resume.call_args.args[0].resume == {"decisions": [{"type": "approve"}]}
+    assert mock_email_agent.resume.call_args.kwargs["thread_id"] == "default:email:draft"
+    assert agent.fast_approvals == 1
+    assert agent.tasks.pending("default", "email") is None
+
+    state = agent.agent_executor.get_state({"configurable": {"thread_id": "default"}})
+    assert [(m.type, m.content) for m in state.values["messages"]] == [("human", "Approve"), ("ai", "Email sent.")]
+
+def test_pending_approval_survives_restart(mock_llm, mock_prompt_loader):
+    """Test that an approval waiting when the process stopped can be given after a restart."""
+    action = {"name": "send_email", "args": {"to": "a@example.com", "subject": "Hi", "body": "Hello"}}
+    before = _supervisor_with_pending_email(MagicMock(spec=BaseAgent))
+    before.tasks.set_pending("default", "email", "default:email:draft", action)
+    before.tasks.edit_pending_action("default", "email", dict(action["args"], subject="Hello there"))
+
+    mock_email_agent = MagicMock(spec=BaseAgent)
+    mock_email_agent.resume.return_value = "Email sent."
+    after = SupervisorAgent(calendar_agent=MagicMock(spec=BaseAgent), email_agent=mock_email_agent)
+    after.llm = ScriptedModel(messages=iter([]))
+    after.agent_executor = after._create_agent_executor()
+
+    assert after.tasks.pending_action("default", "email")["args"]["subject"] == "Hello there"
+    assert after.invoke("Approve") == "Email sent."
+    assert mock_email_agent.resume.call_args.kwargs["thread_id"] == "default:email:draft"
+    assert SupervisorAgent(calendar_agent=MagicMock(spec=BaseAgent)).tasks.pending("default", "email") is None
+
+def test_reject_and_edit_skip_supervisor_model(mock_llm, mock_prompt_loader):
+    """Test that rejections and edits are turned into resume commands without a model turn."""
+    mock_email_agent = MagicMock(spec=BaseAgent)
+    mock_email_agent.resume.return_value = [MagicMock(value={"action_requests": [{"name": "send_email", "args": {"subject": "Hi"}}]})]
+    agent = _supervisor_with_pending_email(mock_email_agent)
+
+    assert "Action required" in agent.invoke("Edit: shorter subject")
+    decision = mock_email_agent.resume.call_args.args[0].resume["decisions"][0]
+    assert decision["type"] == "reject" and "shorter subject" in decision["message"]
+
+    agent.invoke("Reject: not now")
+    assert mock_email_agent.resume.call_args.args[0].resume == {"decisions": [{"type": "reject", "message": "not now"}]}
+    assert agent.fast_approvals == 2
+
+def test_other_input_goes_to_supervisor_model(mock_llm, mock_prompt_loader):
+    """Test that approvals with extra requests, or without a pending email, still use the model."""
+    mock_email_agent = MagicMock(spec=BaseAgent)
+    agent = SupervisorAgent(calendar_agent=MagicMock(spec=BaseAgent), email_agent=mock_email_agent)
+    agent.llm = ScriptedModel(messages=iter([AIMessage(content="Nothing to approve."), AIMessage(content="On it.")]))
+    agent.agent_executor = agent._create_agent_executor()
+
+    assert agent.invoke("Approve") == "Nothing to approve."
+    agent.tasks.set_pending("default", "email", "default:email:draft")
+    assert agent.invoke("Approve the budget and book a review") == "On it."
+    mock_email_agent.resume.assert_not_called()
+    assert agent.fast_approvals == 0
+
+def test_structured_edit_is_applied_without_redrafting(mock_llm, mock_prompt_loader):
+    """Test that a structured edit updates the pending draft locally and is sent as an edit decision."""
+    mock_email_agent = MagicMock(spec=BaseAgent)
+    mock_email_agent.resume.return_value = "Email sent."
+    agent = _supervisor_with_pending_email(mock_email_agent)
+    args = {"to": "a@example.com", "subject": "Hi", "body": "Hello"}
+    agent.tasks.set_pending("default", "email", "default:email:draft", {"name": "send_email", "args": args})
+
+    response = agent.invoke("Edit: change subject to Lunch; add cc b@example.com")
+    assert "'subject': 'Lunch'" in response and "'cc': 'b@example.com'" in response
+    mock_email_agent.resume.assert_not_called()
+
+    agent.invoke("Approve")
+    edited_action = {"name": "send_email", "args": dict(args, subject="Lunch", cc="b@example.com")}
+    assert mock_email_agent.resume.call_args.args[0].resume == {"decisions": [{"type": "edit", "edited_action": edited_action}]}
+    assert agent.tasks.pending_action("default", "email") is None
+
+def test_unambiguous_request_skips_supervisor_model(mock_llm, mock_prompt_loader, tmp_path):
+    """Test that a routed request goes straight to the sub-agent and is recorded as a delegation."""
+    mock_cal_agent = MagicMock(spec=BaseAgent)
+    mock_cal_agent.invoke.return_value = "You have a standup at 9:00."
+    router = IntentRouter(enabled=True, log_path=str(tmp_path / "routing.jsonl"))
+    agent = SupervisorAgent(calendar_agent=mock_cal_agent, email_agent=MagicMock(spec=BaseAgent), router=router)
+    agent.llm = ScriptedModel(messages=iter([]))
+    agent.agent_executor = agent._create_agent_executor()
+
+    assert agent.invoke("What's on my calendar tomorrow?") == "You have a standup at 9:00."
+    assert mock_cal_agent.invoke.call_args.args[0] == "What's on my calendar tomorrow?"
+
+    messages = agent.agent_executor.get_state({"configurable": {"thread_id": "default"}}).values["messages"]
+    assert [m.type for m in messages] == ["human", "ai", "tool", "ai"]
+    assert messages[1].tool_calls[0]["name"] == "schedule_event"
+    assert router.stats()["routed"] == 1
+    assert '"routed": true' in (tmp_path / "routing.jsonl").read_text()
+
+def test_ambiguous_request_falls_back_and_is_compared(mock_llm, mock_prompt_loader):
+    """Test that mixed requests use the supervisor and its choice is recorded against the router's."""
+    mock_cal_agent = MagicMock(spec=BaseAgent)
+    mock_cal_agent.invoke.return_value = "Scheduled"
+    mock_email_agent = MagicMock(spec=BaseAgent)
+    mock_email_agent.invoke.return_value = "Sent"
+    router = IntentRouter(enabled=True)
+    agent = _supervisor_with_calls([
+        {"name": "schedule_event", "args": {"request": "lunch Monday"}},
+        {"name": "manage_email", "args": {"request": "invite Bob"}},
+    ], mock_cal_agent, mock_email_agent)
+    agent.router = router
+
+    assert agent.invoke("Schedule lunch Monday and email Bob an invite") == "All done."
+    assert router.stats()["fallbacks"] == 1
+    assert router.stats()["agreement"] == 1.0
+    assert agent._supervisor_choice(AgentContext()) == "mixed"
+
+def test_disabled_router_still_records_its_choice(mock_llm, mock_prompt_loader, tmp_path):
+    """Test that with the router off, the supervisor handles everything and the router's choice is logged against it."""
+    mock_cal_agent = MagicMock(spec=BaseAgent)
+    mock_cal_agent.invoke.return_value = "You have a standup at 9:00."
+    router = IntentRouter(enabled=False, log_path=str(tmp_path / "routing.jsonl"))
+    agent = _supervisor_with_calls([{"name": "schedule_event", "args": {"request": "tomorrow"}}], mock_cal_agent, MagicMock(spec=BaseAgent))
+    agent.router = router
+
+    assert agent.invoke("What's on my calendar tomorrow?") == "All done."
+    assert mock_cal_agent.invoke.call_args.args[0] == "tomorrow"
+    assert (router.stats()["routed"], router.stats()["fallbacks"], router.stats()["agreement"]) == (0, 1, 1.0)
+    entry = json.loads((tmp_path / "routing.jsonl").read_text())
+    assert (entry["agent"], entry["routed"], entry["actual"]) == ("calendar", False, "calendar")
+
+def test_sub_agents_are_built_on_first_delegation(mock_llm, mock_prompt_loader):
+    """Test that sub-agent factories run once, only for the agent a request needs."""
+    cal_agent = MagicMock(spec=BaseAgent)
+    cal_agent.invoke.return_value = "Booked."
+    cal_factory = MagicMock(return_value=cal_agent)
+    email_factory = MagicMock()
+    agent = _supervisor_with_calls(
+        [{"name": "schedule_event", "args": {"request": "book lunch"}}, {"name": "schedule_event", "args": {"request": "book dinner"}}],
+        cal_factory, email_factory,
+    )
+    assert not cal_factory.called
+
+    agent.chat("Book lunch and dinner")
+    agent.end_session("default")
+
+    cal_factory.assert_called_once_with()
+    assert cal_agent.invoke.call_count == 2
+    assert not email_factory.called